@@ -2,5 +2,7 @@
 # AI Agent模块，用于关键词提取和相关性判断
 
 from .llm_agent import LLMAgent
+from .rate_limiter import LLMRateLimiter
+from .verdict_cache import RelevanceVerdictCache
 
-__all__ = ['LLMAgent']
+__all__ = ['LLMAgent', 'LLMRateLimiter', 'RelevanceVerdictCache']
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # @Desc: AI Agent模块，用于关键词提取和相关性判断
 
+import asyncio
 import json
 import os
 from typing import Dict, List, Optional
@@ -8,6 +9,12 @@ from typing import Dict, List, Optional
 import httpx
 from tools import utils
 
+from .rate_limiter import LLMRateLimiter
+from .verdict_cache import RelevanceVerdictCache
+
+# 内容文本过短时的判断结果，不调用大模型
+SHORT_CONTENT_VERDICT = {"is_relevant": False, "reason": "内容文本过短", "score": 0.0}
+
 
 class LLMAgent:
     """大语言模型Agent，用于关键词提取和相关性判断"""
@@ -18,6 +25,9 @@ class LLMAgent:
         base_url: Optional[str] = None,
         model: str = "gpt-4o-mini",
         timeout: int = 60,
+        rate_limiter: Optional[LLMRateLimiter] = None,
+        max_retries: int = 3,
+        verdict_cache: Optional[RelevanceVerdictCache] = None,
     ):
         """
         初始化LLM Agent
@@ -26,11 +36,17 @@ class LLMAgent:
             base_url: API基础URL，如果为None则使用默认值
             model: 模型名称
             timeout: 请求超时时间
+            rate_limiter: 限流器，为None时不限流
+            max_retries: 遇到 429 限流响应时的最大重试次数
+            verdict_cache: 相关性判断结果缓存，为None时不缓存
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY") or os.getenv("LLM_API_KEY")
         self.base_url = base_url or os.getenv("LLM_BASE_URL", "https://api.openai.com/v1")
         self.model = model or os.getenv("LLM_MODEL", "gpt-4o-mini")
         self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.verdict_cache = verdict_cache
         
         if not self.api_key:
             utils.logger.warning("[LLMAgent] 未设置API密钥，AI功能将不可用")
@@ -118,24 +134,17 @@ class LLMAgent:
             utils.logger.warning("[LLMAgent.judge_relevance] API密钥未设置，默认返回相关")
             return {"is_relevant": True, "reason": "API未配置，默认相关", "score": 0.5}
         
-        # 提取内容文本
-        content_text = ""
-        if platform == "weibo":
-            content_text = content.get("content", "") or content.get("text", "")
-        elif platform == "bilibili":
-            content_text = content.get("title", "") + " " + content.get("desc", "")
-        elif platform == "zhihu":
-            content_text = content.get("title", "") + " " + content.get("content", "")
-        else:
-            content_text = str(content.get("title", "")) + " " + str(content.get("content", ""))
-        
-        if not content_text or len(content_text.strip()) < 10:
-            return {"is_relevant": False, "reason": "内容文本过短", "score": 0.0}
-        
-        # 限制内容长度，避免token过多
-        if len(content_text) > 1000:
-            content_text = content_text[:1000] + "..."
-        
+        content_text = self._extract_content_text(content, platform)
+        if not content_text:
+            return dict(SHORT_CONTENT_VERDICT)
+        if self.verdict_cache:
+            cached = self.verdict_cache.get(event_description, platform, content_text, self.model)
+            if cached:
+                return cached
+        return await self._judge_content_text(content_text, event_description, platform)
+
+    async def _judge_content_text(self, content_text: str, event_description: str, platform: str) -> Dict:
+        """对已提取的内容文本调用大模型判断相关性，解析成功的结果写入缓存"""
         prompt = f"""你是一个内容相关性判断专家。请判断以下社交媒体内容是否与给定的事件描述相关。
 
 事件描述：
@@ -163,28 +172,17 @@ class LLMAgent:
             
             # 尝试解析JSON响应
             if isinstance(response, str):
-                # 尝试提取JSON部分
-                if "```json" in response:
-                    response = response.split("```json")[1].split("```")[0].strip()
-                elif "```" in response:
-                    response = response.split("```")[1].split("```")[0].strip()
-                
                 try:
-                    result = json.loads(response)
-                    is_relevant = result.get("is_relevant", False)
-                    score = result.get("score", 0.0)
-                    reason = result.get("reason", "未提供理由")
-                    
+                    result = json.loads(self._strip_code_fence(response))
+                    verdict = self._to_verdict(result)
+                    if self.verdict_cache:
+                        self.verdict_cache.put(event_description, platform, content_text, self.model, verdict)
                     utils.logger.info(
-                        f"[LLMAgent.judge_relevance] 相关性判断: {is_relevant}, "
-                        f"评分: {score}, 理由: {reason}"
+                        f"[LLMAgent.judge_relevance] 相关性判断: {verdict['is_relevant']}, "
+                        f"评分: {verdict['score']}, 理由: {verdict['reason']}"
                     )
-                    return {
-                        "is_relevant": is_relevant,
-                        "score": score,
-                        "reason": reason
-                    }
-                except json.JSONDecodeError:
+                    return verdict
+                except (json.JSONDecodeError, AttributeError):
                     utils.logger.warning(f"[LLMAgent.judge_relevance] JSON解析失败，响应: {response}")
             
             # Fallback: 简单关键词匹配
@@ -195,6 +193,165 @@ class LLMAgent:
             # Fallback: 简单关键词匹配
             return self._simple_relevance_check(content_text, event_description)
     
+    async def judge_relevance_batch(
+        self,
+        contents: Dict[str, Dict],
+        event_description: str,
+        platform: str = "unknown"
+    ) -> Dict[str, Dict]:
+        """
+        在一次请求中判断多条内容是否与事件相关，事件描述和判断要求只发送一次。
+        批量结果中缺失或无法解析的条目会回退到单条判断
+        Args:
+            contents: 内容ID -> 内容字典，调用方可以用 split_relevance_batches 控制每批的大小
+            event_description: 事件描述
+            platform: 平台名称（weibo/bilibili/zhihu）
+        Returns:
+            内容ID -> 判断结果（与 judge_relevance 的返回格式一致）
+        """
+        verdicts: Dict[str, Dict] = {}
+        if not self.api_key:
+            utils.logger.warning("[LLMAgent.judge_relevance_batch] API密钥未设置，默认返回相关")
+            return {content_id: {"is_relevant": True, "reason": "API未配置，默认相关", "score": 0.5} for content_id in contents}
+
+        # 提示词中使用短序号代替原始ID，节省 token
+        numbered: Dict[str, str] = {}
+        texts: Dict[str, str] = {}
+        lines: List[str] = []
+        for content_id, content in contents.items():
+            content_text = self._extract_content_text(content, platform)
+            if not content_text:
+                verdicts[content_id] = dict(SHORT_CONTENT_VERDICT)
+                continue
+            if self.verdict_cache:
+                cached = self.verdict_cache.get(event_description, platform, content_text, self.model)
+                if cached:
+                    verdicts[content_id] = cached
+                    continue
+            index = str(len(numbered) + 1)
+            numbered[index] = content_id
+            texts[content_id] = content_text
+            lines.append(f"[{index}] {content_text}")
+
+        if len(numbered) == 1:
+            content_id = next(iter(numbered.values()))
+            verdicts[content_id] = await self._judge_content_text(texts[content_id], event_description, platform)
+            return verdicts
+
+        if numbered:
+            contents_block = "\n\n".join(lines)
+            prompt = f"""你是一个内容相关性判断专家。请逐条判断以下社交媒体内容是否与给定的事件描述相关。
+
+事件描述：
+{event_description}
+
+内容（来自{platform}平台，共{len(numbered)}条，每条以[编号]开头）：
+{contents_block}
+
+要求：
+1. 判断每条内容是否与事件描述相关（直接相关、间接相关、不相关）
+2. 相关性评分范围0-1，0.5以上认为相关
+3. 简要说明判断理由
+
+请以JSON数组格式返回，每条内容一个元素，格式如下：
+[
+    {{"id": "编号", "is_relevant": true/false, "score": 0.0-1.0, "reason": "判断理由"}}
+]
+
+只返回JSON，不要包含其他文字说明。"""
+
+            try:
+                response = await self._call_llm(prompt, max_tokens=min(4000, 100 * len(numbered) + 200))
+                result = json.loads(self._strip_code_fence(response))
+                if isinstance(result, list):
+                    for entry in result:
+                        if not isinstance(entry, dict):
+                            continue
+                        content_id = numbered.get(str(entry.get("id", "")).strip("[] "))
+                        if content_id and "is_relevant" in entry:
+                            verdicts[content_id] = self._to_verdict(entry)
+                            if self.verdict_cache:
+                                self.verdict_cache.put(event_description, platform, texts[content_id], self.model, verdicts[content_id])
+            except Exception as e:
+                utils.logger.warning(f"[LLMAgent.judge_relevance_batch] 批量判断失败，回退到单条判断: {e}")
+
+        missing_ids = [content_id for content_id in numbered.values() if content_id not in verdicts]
+        if missing_ids:
+            utils.logger.info(f"[LLMAgent.judge_relevance_batch] {len(missing_ids)}/{len(numbered)} 条未获得有效结果，逐条重新判断")
+        for content_id in missing_ids:
+            verdicts[content_id] = await self._judge_content_text(texts[content_id], event_description, platform)
+        return verdicts
+
+    def split_relevance_batches(
+        self,
+        contents: Dict[str, Dict],
+        platform: str,
+        max_items: int,
+        max_chars: int,
+    ) -> List[Dict[str, Dict]]:
+        """
+        按条数和文本总长度（近似 token 预算）把内容拆分为多个批次
+        Args:
+            contents: 内容ID -> 内容字典
+            platform: 平台名称
+            max_items: 每批最多条数
+            max_chars: 每批内容文本的最大总字符数
+        Returns:
+            批次列表
+        """
+        batches: List[Dict[str, Dict]] = []
+        batch: Dict[str, Dict] = {}
+        batch_chars = 0
+        for content_id, content in contents.items():
+            text_len = len(self._extract_content_text(content, platform))
+            if batch and (len(batch) >= max_items or batch_chars + text_len > max_chars):
+                batches.append(batch)
+                batch, batch_chars = {}, 0
+            batch[content_id] = content
+            batch_chars += text_len
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def _extract_content_text(content: Dict, platform: str) -> str:
+        """
+        提取用于判断相关性的内容文本，文本过短时返回空字符串
+        """
+        if platform == "weibo":
+            content_text = content.get("content", "") or content.get("text", "")
+        elif platform == "bilibili":
+            content_text = content.get("title", "") + " " + content.get("desc", "")
+        elif platform == "zhihu":
+            content_text = content.get("title", "") + " " + content.get("content", "")
+        else:
+            content_text = str(content.get("title", "")) + " " + str(content.get("content", ""))
+
+        if not content_text or len(content_text.strip()) < 10:
+            return ""
+
+        # 限制内容长度，避免token过多
+        if len(content_text) > 1000:
+            content_text = content_text[:1000] + "..."
+        return content_text
+
+    @staticmethod
+    def _strip_code_fence(response: str) -> str:
+        """去掉模型返回的 ```json 代码块包裹"""
+        if "```json" in response:
+            return response.split("```json")[1].split("```")[0].strip()
+        if "```" in response:
+            return response.split("```")[1].split("```")[0].strip()
+        return response
+
+    @staticmethod
+    def _to_verdict(result: Dict) -> Dict:
+        return {
+            "is_relevant": result.get("is_relevant", False),
+            "score": result.get("score", 0.0),
+            "reason": result.get("reason", "未提供理由"),
+        }
+
     def _simple_relevance_check(self, content_text: str, event_description: str) -> Dict:
         """简单的关键词匹配作为fallback"""
         # 提取事件描述中的关键词
@@ -216,11 +373,12 @@ class LLMAgent:
             "reason": f"关键词匹配度: {len(intersection)}/{len(event_keywords)}"
         }
     
-    async def _call_llm(self, prompt: str) -> str:
+    async def _call_llm(self, prompt: str, max_tokens: int = 1000) -> str:
         """
         调用LLM API
         Args:
             prompt: 提示词
+            max_tokens: 最大输出 token 数
         Returns:
             LLM响应文本
         """
@@ -236,15 +394,26 @@ class LLMAgent:
                 {"role": "user", "content": prompt}
             ],
             "temperature": 0.3,
-            "max_tokens": 1000
+            "max_tokens": max_tokens
         }
         
+        # 粗略估算 token 数：中文约 1 字 1 token，再加上最大输出长度
+        estimated_tokens = len(prompt) + data["max_tokens"]
         async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=data
-            )
-            response.raise_for_status()
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
+            for attempt in range(self.max_retries + 1):
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire(estimated_tokens)
+                response = await client.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    json=data
+                )
+                if response.status_code == 429 and attempt < self.max_retries:
+                    retry_after = response.headers.get("Retry-After", "")
+                    delay = float(retry_after) if retry_after.isdigit() else 2 ** attempt
+                    utils.logger.warning(f"[LLMAgent._call_llm] 触发限流(429)，{delay}秒后重试 ({attempt + 1}/{self.max_retries})")
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                result = response.json()
+                return result["choices"][0]["message"]["content"]
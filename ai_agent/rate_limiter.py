@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# @Desc: LLM API 限流器，按每分钟请求数和每分钟 token 数进行令牌桶限流
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """令牌桶，容量为每分钟额度，按秒匀速补充"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """获取 amount 个令牌需要等待的秒数"""
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+class LLMRateLimiter:
+    """
+    同时限制每分钟请求数（RPM）和每分钟 token 数（TPM），额度为 0 表示不限制。
+    多个协程并发调用 acquire 时按先来先得的顺序放行
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 0):
+        """
+        等待直到可以发送一个预计消耗 tokens 个 token 的请求
+        Args:
+            tokens: 预计消耗的 token 数（提示词 + 最大输出）
+        """
+        async with self._lock:
+            while True:
+                wait = 0.0
+                if self.request_bucket:
+                    self.request_bucket.refill()
+                    wait = max(wait, self.request_bucket.wait_time(1))
+                if self.token_bucket:
+                    self.token_bucket.refill()
+                    # 单个请求超过整分钟额度时最多等到桶满，避免永远等待
+                    tokens = min(tokens, self.token_bucket.capacity)
+                    wait = max(wait, self.token_bucket.wait_time(tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.request_bucket:
+                self.request_bucket.tokens -= 1
+            if self.token_bucket:
+                self.token_bucket.tokens -= tokens
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# @Desc: 大模型相关性判断结果的本地持久化缓存（SQLite），相关/不相关的结果都会缓存
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from tools import utils
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RelevanceVerdictCache:
+    """
+    以 (事件描述哈希, 平台, 内容哈希, 模型) 为键缓存相关性判断结果，
+    超过 ttl_seconds 的记录视为过期，记录数超过 max_entries 时淘汰最旧的记录
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: int = 30 * 24 * 3600, max_entries: int = 200000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS relevance_verdict (
+                event_hash TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                is_relevant INTEGER NOT NULL,
+                score REAL NOT NULL,
+                reason TEXT,
+                created_at INTEGER NOT NULL,
+                PRIMARY KEY (event_hash, platform, content_hash, model)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_relevance_verdict_created_at ON relevance_verdict (created_at)")
+        self._conn.commit()
+        self.evict()
+
+    def get(self, event_description: str, platform: str, content_text: str, model: str) -> Optional[Dict]:
+        """
+        查询缓存的判断结果
+        Returns:
+            与 LLMAgent.judge_relevance 返回格式一致的字典，未命中或已过期时返回None
+        """
+        row = self._conn.execute(
+            "SELECT is_relevant, score, reason, created_at FROM relevance_verdict "
+            "WHERE event_hash = ? AND platform = ? AND content_hash = ? AND model = ?",
+            (_sha256(event_description), platform, _sha256(content_text), model),
+        ).fetchone()
+        if row is None or (self.ttl_seconds > 0 and row[3] < time.time() - self.ttl_seconds):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"is_relevant": bool(row[0]), "score": row[1], "reason": row[2]}
+
+    def put(self, event_description: str, platform: str, content_text: str, model: str, verdict: Dict):
+        """写入判断结果，已存在时覆盖"""
+        try:
+            score = float(verdict.get("score") or 0.0)
+        except (TypeError, ValueError):
+            score = 0.0
+        self._conn.execute(
+            "INSERT OR REPLACE INTO relevance_verdict "
+            "(event_hash, platform, content_hash, model, is_relevant, score, reason, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                _sha256(event_description), platform, _sha256(content_text), model,
+                int(bool(verdict.get("is_relevant"))), score, str(verdict.get("reason", "")), int(time.time()),
+            ),
+        )
+        self._conn.commit()
+
+    def evict(self):
+        """删除过期记录，并在超出容量时删除最旧的记录"""
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM relevance_verdict WHERE created_at < ?", (int(time.time()) - self.ttl_seconds,))
+        if self.max_entries > 0:
+            count = self._conn.execute("SELECT COUNT(*) FROM relevance_verdict").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM relevance_verdict WHERE rowid IN "
+                    "(SELECT rowid FROM relevance_verdict ORDER BY created_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+        self._conn.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def log_stats(self):
+        utils.logger.info(
+            f"[RelevanceVerdictCache] 命中 {self.hits} 次，未命中 {self.misses} 次，命中率 {self.hit_rate:.1%}"
+        )
+
+    def close(self):
+        self.evict()
+        self._conn.close()
@@ -9,10 +9,14 @@ from typing import List
 
 import config
 from ai_agent import LLMAgent
+from base.crawler_settings import CrawlerSettings
 from media_platform.bilibili import BilibiliCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.zhihu import ZhihuCrawler
 from tools import utils
+from tools.crawl_checkpoint import close_crawl_checkpoints
+from tools.js_worker import close_js_worker_pools
+from tools.seen_index import close_seen_indexes
 
 from cookies import WB_cookie, BILI_cookie, ZHIHU_cookie
 
@@ -51,39 +55,26 @@ class AICrawlerManager:
         """
         utils.logger.info("[AICrawlerManager] 开始爬取微博数据...")
 
-        # 保存原始配置
-        original_platform = config.PLATFORM
-        original_keywords = config.KEYWORDS
-        original_cookies = config.COOKIES
-        original_crawler_type = config.CRAWLER_TYPE
-        original_headless = config.HEADLESS
-        original_enable_comments = config.ENABLE_GET_COMMENTS
+        # 微博的运行参数只作用于这个爬虫实例，不修改全局配置，可以与其它平台并发爬取
+        settings = CrawlerSettings.from_config(
+            "wb",
+            keywords=",".join(self.keywords),
+            cookies=WB_cookie,
+            crawler_type="search",
+            headless=True,
+            enable_get_comments=True,
+        )
 
+        # 使用WeiboCrawler进行搜索和数据保存
+        utils.logger.info("[AICrawlerManager] 使用WeiboCrawler进行搜索和数据保存...")
+        weibo_crawler = WeiboCrawler(settings)
         try:
-            # 设置微博配置
-            config.PLATFORM = "wb"
-            config.KEYWORDS = ",".join(self.keywords)
-            config.COOKIES = WB_cookie
-            config.CRAWLER_TYPE = "search"
-            config.HEADLESS = True
-            config.ENABLE_GET_COMMENTS = True
-
-            # 使用WeiboCrawler进行搜索和数据保存
-            utils.logger.info("[AICrawlerManager] 使用WeiboCrawler进行搜索和数据保存...")
-            weibo_crawler = WeiboCrawler()
             await weibo_crawler.start()
-
-            utils.logger.info(
-                "[AICrawlerManager] 微博搜索和数据保存完成，数据已保存到 data/weibo/ 目录")
-
         finally:
-            # 恢复原始配置
-            config.PLATFORM = original_platform
-            config.KEYWORDS = original_keywords
-            config.COOKIES = original_cookies
-            config.CRAWLER_TYPE = original_crawler_type
-            config.HEADLESS = original_headless
-            config.ENABLE_GET_COMMENTS = original_enable_comments
+            await weibo_crawler.close()
+
+        utils.logger.info(
+            "[AICrawlerManager] 微博搜索和数据保存完成，数据已保存到 data/weibo/ 目录")
 
     async def crawl_bilibili(self):
         """
@@ -91,37 +82,26 @@ class AICrawlerManager:
         """
         utils.logger.info("[AICrawlerManager] 开始爬取B站数据...")
 
-        # 保存原始配置
-        original_platform = config.PLATFORM
-        original_keywords = config.KEYWORDS
-        original_cookies = config.COOKIES
-        original_crawler_type = config.CRAWLER_TYPE
-        original_headless = config.HEADLESS
+        # B站的运行参数（是否爬取评论沿用全局配置）
+        settings = CrawlerSettings.from_config(
+            "bili",
+            keywords=",".join(self.keywords),
+            cookies=BILI_cookie,
+            crawler_type="search",
+            headless=True,
+        )
 
+        # 使用BilibiliCrawler进行搜索和数据保存
+        utils.logger.info(
+            "[AICrawlerManager] 使用BilibiliCrawler进行搜索和数据保存...")
+        bili_crawler = BilibiliCrawler(settings)
         try:
-            # 设置B站配置
-            config.PLATFORM = "bili"
-            config.KEYWORDS = ",".join(self.keywords)
-            config.COOKIES = BILI_cookie
-            config.CRAWLER_TYPE = "search"
-            config.HEADLESS = True
-
-            # 使用BilibiliCrawler进行搜索和数据保存
-            utils.logger.info(
-                "[AICrawlerManager] 使用BilibiliCrawler进行搜索和数据保存...")
-            bili_crawler = BilibiliCrawler()
             await bili_crawler.start()
-
-            utils.logger.info(
-                "[AICrawlerManager] B站搜索和数据保存完成，数据已保存到 data/bilibili/ 目录")
-
         finally:
-            # 恢复原始配置
-            config.PLATFORM = original_platform
-            config.KEYWORDS = original_keywords
-            config.COOKIES = original_cookies
-            config.CRAWLER_TYPE = original_crawler_type
-            config.HEADLESS = original_headless
+            await bili_crawler.close()
+
+        utils.logger.info(
+            "[AICrawlerManager] B站搜索和数据保存完成，数据已保存到 data/bilibili/ 目录")
 
     async def crawl_zhihu(self):
         """
@@ -129,40 +109,27 @@ class AICrawlerManager:
         """
         utils.logger.info("[AICrawlerManager] 开始爬取知乎数据...")
 
-        # 保存原始配置
-        original_platform = config.PLATFORM
-        original_keywords = config.KEYWORDS
-        original_cookies = config.COOKIES
-        original_crawler_type = config.CRAWLER_TYPE
-        original_headless = config.HEADLESS
-        original_enable_comments = config.ENABLE_GET_COMMENTS
+        # 知乎的运行参数
+        settings = CrawlerSettings.from_config(
+            "zhihu",
+            keywords=",".join(self.keywords),
+            cookies=ZHIHU_cookie,
+            crawler_type="search",
+            headless=True,
+            enable_get_comments=False,
+        )
 
+        # 使用ZhihuCrawler进行搜索和数据保存
+        utils.logger.info("[AICrawlerManager] 使用ZhihuCrawler进行搜索和数据保存...")
+        zhihu_crawler = ZhihuCrawler(settings)
         try:
-            # 设置知乎配置
-            config.PLATFORM = "zhihu"
-            config.KEYWORDS = ",".join(self.keywords)
-            config.COOKIES = ZHIHU_cookie
-            config.CRAWLER_TYPE = "search"
-            config.HEADLESS = True
-            config.ENABLE_GET_COMMENTS = False
-
-            # 使用ZhihuCrawler进行搜索和数据保存
-            utils.logger.info("[AICrawlerManager] 使用ZhihuCrawler进行搜索和数据保存...")
-            zhihu_crawler = ZhihuCrawler()
             await zhihu_crawler.start()
-
-            utils.logger.info(
-                "[AICrawlerManager] 知乎搜索和数据保存完成，数据已保存到 data/zhihu/ 目录"
-            )
-
         finally:
-            # 恢复原始配置
-            config.PLATFORM = original_platform
-            config.KEYWORDS = original_keywords
-            config.COOKIES = original_cookies
-            config.CRAWLER_TYPE = original_crawler_type
-            config.HEADLESS = original_headless
-            config.ENABLE_GET_COMMENTS = original_enable_comments
+            await zhihu_crawler.close()
+
+        utils.logger.info(
+            "[AICrawlerManager] 知乎搜索和数据保存完成，数据已保存到 data/zhihu/ 目录"
+        )
 
     async def crawl_all_platforms(self):
         """爬取所有平台的数据"""
@@ -171,7 +138,7 @@ class AICrawlerManager:
         # 提取关键词
         await self.extract_keywords()
 
-        # 并行爬取三个平台（只做搜索和存储，不做相关性判断）
+        # 并行爬取三个平台（只做搜索和存储，不做相关性判断），各平台的运行参数互不影响
         utils.logger.info("[AICrawlerManager] 开始并行爬取所有平台数据...")
         await asyncio.gather(
             self.crawl_weibo(),
@@ -204,6 +171,10 @@ async def main():
         # 执行爬取
         await manager.crawl_all_platforms()
     finally:
+        # 各平台共用的断点记录、已爬取索引和签名进程池在所有平台结束后关闭
+        close_crawl_checkpoints()
+        close_seen_indexes()
+        await close_js_worker_pools()
         # 清理所有待处理的任务
         await _cleanup_tasks()
 
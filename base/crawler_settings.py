@@ -0,0 +1,86 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬虫实例的运行参数：平台、关键词、cookies、爬取类型等按实例传入，
+#            同一进程内多个爬虫可以使用不同的参数并发运行，不需要修改 config 中的全局变量
+
+from typing import NamedTuple, Tuple
+
+import config
+
+# 各平台指定ID（detail 模式）和创作者（creator 模式）列表对应的配置项
+_SPECIFIED_ID_LIST_NAMES = {
+    "xhs": "XHS_SPECIFIED_NOTE_URL_LIST",
+    "dy": "DY_SPECIFIED_ID_LIST",
+    "ks": "KS_SPECIFIED_ID_LIST",
+    "bili": "BILI_SPECIFIED_ID_LIST",
+    "wb": "WEIBO_SPECIFIED_ID_LIST",
+    "tieba": "TIEBA_SPECIFIED_ID_LIST",
+    "zhihu": "ZHIHU_SPECIFIED_ID_LIST",
+}
+_CREATOR_ID_LIST_NAMES = {
+    "xhs": "XHS_CREATOR_ID_LIST",
+    "dy": "DY_CREATOR_ID_LIST",
+    "ks": "KS_CREATOR_ID_LIST",
+    "bili": "BILI_CREATOR_ID_LIST",
+    "wb": "WEIBO_CREATOR_ID_LIST",
+    "tieba": "TIEBA_CREATOR_URL_LIST",
+    "zhihu": "ZHIHU_CREATOR_URL_LIST",
+}
+
+
+class CrawlerSettings(NamedTuple):
+    """
+    一个爬虫实例的运行参数（不可变）。爬虫只从这里读取以下参数，不再读取 config 中的同名全局变量；
+    并发数、存储方式等其余参数仍然是进程级别的全局配置
+    """
+    platform: str
+    login_type: str
+    crawler_type: str
+    keywords: str
+    cookies: str
+    headless: bool
+    enable_get_comments: bool
+    # 爬取的作品数量上限，各平台搜索时会提高到至少一页的数量
+    max_notes_count: int
+    # detail 模式的作品ID（小红书、知乎为链接）
+    specified_id_list: Tuple[str, ...]
+    # creator 模式的创作者ID（贴吧、知乎为主页链接）
+    creator_id_list: Tuple[str, ...]
+
+    @classmethod
+    def from_config(cls, platform: str, **overrides) -> "CrawlerSettings":
+        """
+        根据当前的全局配置创建运行参数
+        Args:
+            platform: 平台名称，xhs | dy | ks | bili | wb | tieba | zhihu
+            **overrides: 需要覆盖的参数，如 keywords="a,b", cookies="..."
+
+        Returns:
+
+        """
+        settings = cls(
+            platform=platform,
+            login_type=config.LOGIN_TYPE,
+            crawler_type=config.CRAWLER_TYPE,
+            keywords=config.KEYWORDS,
+            cookies=config.COOKIES,
+            headless=config.HEADLESS,
+            enable_get_comments=config.ENABLE_GET_COMMENTS,
+            max_notes_count=config.CRAWLER_MAX_NOTES_COUNT,
+            specified_id_list=tuple(getattr(config, _SPECIFIED_ID_LIST_NAMES[platform], ())),
+            creator_id_list=tuple(getattr(config, _CREATOR_ID_LIST_NAMES[platform], ())),
+        )
+        for name in ("specified_id_list", "creator_id_list"):
+            if name in overrides:
+                overrides[name] = tuple(overrides[name])
+        return settings._replace(**overrides)
@@ -61,6 +61,7 @@ class SaveDataOptionEnum(str, Enum):
     CSV = "csv"
     DB = "db"
     JSON = "json"
+    JSONL = "jsonl"
     SQLITE = "sqlite"
 
 
@@ -168,6 +169,14 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 rich_help_panel="基础配置",
             ),
         ] = config.KEYWORDS,
+        resume: Annotated[
+            bool,
+            typer.Option(
+                "--resume",
+                help="从上次中断的断点继续爬取，跳过已完成的搜索页、作品和评论",
+                rich_help_panel="基础配置",
+            ),
+        ] = config.RESUME_CRAWL,
         get_comment: Annotated[
             str,
             typer.Option(
@@ -190,7 +199,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             SaveDataOptionEnum,
             typer.Option(
                 "--save_data_option",
-                help="数据保存方式 (csv=CSV文件 | db=MySQL数据库 | json=JSON文件 | sqlite=SQLite数据库)",
+                help="数据保存方式 (csv=CSV文件 | db=MySQL数据库 | json=JSON文件 | jsonl=JSON Lines文件 | sqlite=SQLite数据库)",
                 rich_help_panel="存储配置",
             ),
         ] = _coerce_enum(
@@ -204,6 +213,14 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 rich_help_panel="存储配置",
             ),
         ] = None,
+        export_json: Annotated[
+            bool,
+            typer.Option(
+                "--export_json",
+                help="将 data/<platform>/jsonl 下的 JSON Lines 文件导出为旧版 JSON 数组格式后退出",
+                rich_help_panel="存储配置",
+            ),
+        ] = False,
         cookies: Annotated[
             str,
             typer.Option(
@@ -212,6 +229,15 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 rich_help_panel="账号配置",
             ),
         ] = config.COOKIES,
+        workers: Annotated[
+            int,
+            typer.Option(
+                "--workers",
+                min=1,
+                help="爬取子进程数量，大于1时关键词/指定ID/创作者列表会分给多个子进程并行爬取",
+                rich_help_panel="基础配置",
+            ),
+        ] = config.CRAWLER_WORKERS,
     ) -> SimpleNamespace:
         """MediaCrawler 命令行入口"""
 
@@ -225,10 +251,12 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         config.CRAWLER_TYPE = crawler_type.value
         config.START_PAGE = start
         config.KEYWORDS = keywords
+        config.RESUME_CRAWL = resume
         config.ENABLE_GET_COMMENTS = enable_comment
         config.ENABLE_GET_SUB_COMMENTS = enable_sub_comment
         config.SAVE_DATA_OPTION = save_data_option.value
         config.COOKIES = cookies
+        config.CRAWLER_WORKERS = workers
 
         return SimpleNamespace(
             platform=config.PLATFORM,
@@ -236,11 +264,14 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             type=config.CRAWLER_TYPE,
             start=config.START_PAGE,
             keywords=config.KEYWORDS,
+            resume=config.RESUME_CRAWL,
             get_comment=config.ENABLE_GET_COMMENTS,
             get_sub_comment=config.ENABLE_GET_SUB_COMMENTS,
             save_data_option=config.SAVE_DATA_OPTION,
             init_db=init_db_value,
+            export_json=export_json,
             cookies=config.COOKIES,
+            workers=config.CRAWLER_WORKERS,
         )
 
     command = typer.main.get_command(app)
@@ -10,6 +10,19 @@ LLM_BASE_URL = (
 )
 LLM_MODEL = "deepseek-chat"  # 模型名称，如 gpt-4o-mini, gpt-4, gpt-3.5-turbo 等
 
+# LLM 并发与限流配置（按所用服务的额度调整）
+LLM_MAX_CONCURRENCY = 8  # 相关性判断的最大并发请求数
+LLM_REQUESTS_PER_MINUTE = 300  # 每分钟最大请求数，0 表示不限制
+LLM_TOKENS_PER_MINUTE = 300000  # 每分钟最大 token 数（估算值），0 表示不限制
+LLM_MAX_RETRIES = 3  # 遇到 429 限流响应时的最大重试次数
+LLM_BATCH_SIZE = 10  # 相关性判断时每次请求打包的内容条数，1 表示逐条判断
+LLM_BATCH_MAX_CHARS = 6000  # 每次请求打包的内容文本总字符数上限（近似 token 预算）
+
+# 相关性判断结果缓存（SQLite），相同事件描述、平台、内容和模型的判断结果直接复用，不再调用大模型
+LLM_VERDICT_CACHE_PATH = "data/llm_cache/relevance_verdicts.db"  # 为空时不启用缓存
+LLM_VERDICT_CACHE_TTL_DAYS = 30  # 缓存有效期（天），0 表示永不过期
+LLM_VERDICT_CACHE_MAX_ENTRIES = 200000  # 最大缓存条数，超出时淘汰最旧的记录
+
 # 关键词提取配置
 MAX_KEYWORDS_PER_EVENT = 3  # 每个事件最多提取的关键词数量
 
@@ -17,5 +30,10 @@ MAX_KEYWORDS_PER_EVENT = 3  # 每个事件最多提取的关键词数量
 RELEVANCE_SCORE_THRESHOLD = 0.5  # 相关性评分阈值，超过此值认为相关
 ENABLE_RELEVANCE_FILTER = True  # 是否启用相关性过滤
 
+# 数据后处理配置
+POSTPROCESS_COMMENT_INDEX_PATH = "data/postprocess/comment_index.db"  # 评论索引（SQLite），合并评论时只查询相关内容的评论
+POSTPROCESS_INCREMENTAL = True  # 增量后处理：跳过上次处理后没有变化的文件，JSON Lines 文件只处理新追加的记录
+POSTPROCESS_MANIFEST_PATH = "data/postprocess/manifest.db"  # 增量后处理清单（SQLite），记录每个输入文件处理到的位置
+
 # 是否在判断相关性时显示详细信息
 VERBOSE_RELEVANCE_JUDGMENT = True
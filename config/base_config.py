@@ -35,6 +35,19 @@ IP_PROXY_POOL_COUNT = 2
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"  # kuaidaili | wandouhttp
 
+# ==================== HTTP 连接池配置 ====================
+# 每个平台的API客户端复用一个 httpx 连接池（每个代理地址一个），保持长连接，避免每次请求都重新握手
+# 连接池最大连接数
+HTTPX_MAX_CONNECTIONS = 100
+# 连接池最大保持活跃的连接数
+HTTPX_MAX_KEEPALIVE_CONNECTIONS = 20
+# 空闲连接保持时间（秒）
+HTTPX_KEEPALIVE_EXPIRY = 30
+# 是否启用 HTTP/2，需要额外安装 h2 依赖（pip install httpx[http2]），未安装时自动回退到 HTTP/1.1
+HTTPX_ENABLE_HTTP2 = False
+# 每个平台最多保留的代理连接池数量，使用轮换代理时超出后关闭最久未使用的代理的连接池
+HTTPX_MAX_PROXY_CLIENTS = 2
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -71,8 +84,24 @@ BROWSER_LAUNCH_TIMEOUT = 30
 # 设置为False可以保持浏览器运行，便于调试
 AUTO_CLOSE_BROWSER = True
 
-# 数据保存类型选项配置,支持四种类型：csv、db、json、sqlite, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json or sqlite
+# 数据保存类型选项配置,支持五种类型：csv、db、json、jsonl、sqlite, 最好保存到DB，有排重的功能。
+# jsonl 为追加写入的 JSON Lines 格式（data/<platform>/jsonl），每条数据只追加一行，适合大量评论的爬取，
+# 需要旧版 JSON 数组格式时运行 python main.py --export_json 导出到 data/<platform>/json
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl or sqlite
+
+# 文件存储（csv/json/jsonl）的数据根目录，数据保存在 <SAVE_DATA_DIR>/<platform>/<格式> 下
+SAVE_DATA_DIR = "data"
+
+# ==================== 存储写缓冲配置 ====================
+# 每个平台只创建一个存储实例，数据先进入内存队列，由后台任务批量写入文件/数据库，爬虫结束时自动写完剩余数据
+# 队列最大长度，队列满时爬虫会等待写入（背压）
+STORE_QUEUE_MAX_SIZE = 1000
+# 每批最多写入的记录数
+STORE_BATCH_SIZE = 50
+# 凑批的最长等待时间（秒）
+STORE_FLUSH_INTERVAL = 1.0
+# 一批数据写入失败（如数据库断开）后的重试次数，重试间隔指数增长；仍然失败的数据在爬虫结束时再写一次，失败则报错
+STORE_WRITE_MAX_RETRIES = 3
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -89,6 +118,23 @@ MAX_CONCURRENCY_NUM = 3
 # 是否开启爬媒体模式（包含图片或视频资源），默认不开启爬媒体
 ENABLE_GET_MEIDAS = True
 
+# 媒体文件以流的方式分块写入磁盘（先写 .part 临时文件，下载完成后再重命名），每块的大小（字节）
+MEDIA_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# 媒体下载中断时的重试次数，重试时通过 HTTP Range 从已下载的位置继续下载
+MEDIA_DOWNLOAD_MAX_RETRIES = 3
+# 媒体下载在独立的后台 worker 池中进行，不阻塞帖子/评论的爬取，worker 数量
+MEDIA_DOWNLOAD_WORKERS = 8
+# 同一个 CDN 域名的最大并发下载数
+MEDIA_DOWNLOAD_PER_HOST_CONCURRENCY = 4
+# 下载任务队列的最大长度，队列满时爬虫投递任务会等待
+MEDIA_DOWNLOAD_QUEUE_MAX_SIZE = 500
+# 下载失败（如服务端返回错误状态码）后整个任务的重试次数
+MEDIA_DOWNLOAD_JOB_RETRIES = 2
+# 媒体文件按内容哈希去重：相同内容只在 MEDIA_BLOB_STORE_PATH 下保存一份，平台目录中的文件为硬链接，
+# 并记录已下载的 URL，重复爬取时相同 URL 的媒体不再下载
+ENABLE_MEDIA_DEDUP = True
+MEDIA_BLOB_STORE_PATH = "data/media_blobs"
+
 # 是否开启爬评论模式, 默认开启爬评论
 ENABLE_GET_COMMENTS = True
 
@@ -115,5 +161,63 @@ STOP_WORDS_FILE = "./docs/hit_stopwords.txt"
 # 中文字体文件路径
 FONT_PATH = "./docs/STZHONGS.TTF"
 
-# 爬取间隔时间
-CRAWLER_MAX_SLEEP_SEC = 2
+# ==================== 请求限流配置 ====================
+# 每个平台的每个API接口独立限流：请求成功时逐步提速，出现验证码/封禁/429等风控信号时降速并暂停（AIMD），
+# 取代以前每次请求后固定 sleep 的做法
+ENABLE_CRAWLER_RATE_LIMIT = True
+# 每个接口的初始速率（请求/秒）
+CRAWLER_RATE_LIMIT_QPS = 0.5
+# 每个接口的最低/最高速率（请求/秒）
+CRAWLER_RATE_LIMIT_MIN_QPS = 0.1
+CRAWLER_RATE_LIMIT_MAX_QPS = 3
+# 每次请求成功后增加的速率
+CRAWLER_RATE_LIMIT_INCREASE_STEP = 0.05
+# 出现风控信号时速率乘以该系数
+CRAWLER_RATE_LIMIT_DECREASE_FACTOR = 0.5
+# 出现风控信号后该接口暂停的时间（秒）
+CRAWLER_RATE_LIMIT_COOLDOWN_SEC = 10
+# 熔断：疑似被封禁时暂停该平台所有请求的时间（秒），之后刷新一次 cookies 再恢复请求（只暂停该平台，不阻塞事件循环）
+CRAWLER_CIRCUIT_BREAKER_OPEN_SEC = 20
+# 评论翻页被熔断打断后，从中断的翻页游标继续爬取的最大次数
+CRAWLER_CIRCUIT_BREAKER_MAX_RESUMES = 3
+
+# ==================== 断点续爬配置 ====================
+# 爬取过程中记录已完成的搜索页、作品和评论翻页游标，爬虫中断后使用 python main.py --resume 从断点继续，
+# 不加 --resume 时会清空该平台之前的断点从头爬取
+ENABLE_CRAWL_CHECKPOINT = True
+# 断点数据库路径
+CRAWL_CHECKPOINT_PATH = "data/checkpoint/crawl_checkpoint.db"
+# 断点、已爬取索引和媒体去重索引数据库的锁等待时间（秒），多进程分片爬取时多个子进程同时写入同一个数据库
+CRAWL_STATE_DB_TIMEOUT = 30
+# 是否从上次的断点继续爬取（命令行 --resume 会覆盖此配置）
+RESUME_CRAWL = False
+
+# ==================== 已爬取索引配置 ====================
+# 跨多次运行记录已爬取的作品和评论ID：新鲜期内以同一关键词爬取完成（含评论）的作品跳过详情的获取，已保存过的评论不再重复写入
+ENABLE_SEEN_INDEX = False
+# 索引数据库路径
+SEEN_INDEX_PATH = "data/checkpoint/seen_index.db"
+# 新鲜期（小时），超过后重新爬取以更新点赞/评论数等统计数据
+SEEN_INDEX_FRESHNESS_HOURS = 24
+
+# ==================== JS签名配置 ====================
+# 抖音/知乎等平台的签名 js 在常驻的 Node.js 进程中执行（通过管道收发请求），避免 execjs 每次签名都启动一个新进程；
+# 关闭时退回 execjs
+ENABLE_JS_SIGN_WORKER = True
+# Node.js 可执行文件
+JS_SIGN_NODE_PATH = "node"
+# 每个签名 js 启动的常驻进程数量，多个进程可以并行签名
+JS_SIGN_WORKER_POOL_SIZE = 2
+# 单次签名的超时时间（秒），超时后重启该进程
+JS_SIGN_TIMEOUT = 10
+
+# ==================== 多进程分片爬取配置 ====================
+# 关键词/指定ID/创作者较多时，python main.py --workers N 将列表轮流分成 N 份，由 N 个子进程分别爬取，
+# 每个子进程有独立的事件循环、浏览器上下文和IP代理池；主进程把子进程的数据合并写入 SAVE_DATA_OPTION 对应的存储
+CRAWLER_WORKERS = 1
+# 各子进程使用的账号 cookies（需配合 --lt cookie），按子进程序号轮流分配；为空时所有子进程使用 COOKIES
+CRAWLER_WORKER_COOKIES = []
+# 子进程爬取的数据先以 JSON Lines 格式暂存在该目录下，由主进程增量合并，全部合并后删除
+CRAWLER_WORKER_STAGING_DIR = "data/workers"
+# 主进程合并暂存数据并输出进度的间隔（秒）
+CRAWLER_WORKER_MERGE_INTERVAL = 5
@@ -50,3 +50,17 @@ CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES = 100
 
 # 单个视频/帖子最大爬取动态数
 CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES = 50
+
+# WBI 签名密钥（img_key/sub_key）缓存时间（秒），过期或签名校验失败时才重新从浏览器获取
+BILI_WBI_KEYS_TTL = 3600
+
+# ==================== 关键词搜索流水线配置 ====================
+# normal 搜索模式下，搜索 -> 视频详情 -> 视频下载/评论 各阶段通过队列衔接并发执行
+# 各阶段的并发数
+BILI_PIPELINE_DETAIL_CONCURRENCY = 3
+BILI_PIPELINE_MEDIA_CONCURRENCY = 2
+BILI_PIPELINE_COMMENT_CONCURRENCY = 3
+# 各阶段队列的最大长度，队列满时上游阶段等待
+BILI_PIPELINE_QUEUE_SIZE = 100
+# 输出各阶段队列长度、处理数量的时间间隔（秒），0 表示只在结束时输出
+BILI_PIPELINE_METRICS_INTERVAL = 10
@@ -26,3 +26,6 @@ XHS_CREATOR_ID_LIST = [
     "63e36c9a000000002703502b",
     # ........................
 ]
+
+# 用于生成请求签名的页面数量（包括爬虫使用的主页面），多个页面轮流签名，并发请求可以并行签名
+XHS_SIGN_PAGE_POOL_SIZE = 2
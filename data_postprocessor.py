@@ -8,18 +8,90 @@
 import asyncio
 import json
 import os
+import shutil
 import sys
+import time
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 import config
-from ai_agent import LLMAgent
+from ai_agent import LLMAgent, LLMRateLimiter, RelevanceVerdictCache
+from base.crawler_settings import CrawlerSettings
 from media_platform.weibo import WeiboCrawler
 from tools import utils
+from tools.comment_index import CommentIndex
+from tools.data_file_reader import find_data_files, iter_records
+from tools.postprocess_manifest import FileChange, PostprocessManifest, iter_new_records
 from cookies import WB_cookie, BILI_cookie, ZHIHU_cookie
 
+# 日志中各平台内容的名称
+PLATFORM_ITEM_NAMES = {"weibo": "微博", "bilibili": "B站视频", "zhihu": "知乎内容"}
+# 日志中各平台文件的名称
+PLATFORM_FILE_NAMES = {"weibo": "微博", "bilibili": "B站", "zhihu": "知乎"}
+
+# 各平台内容的唯一ID
+CONTENT_ID_GETTERS: Dict[str, Callable[[Dict], Optional[str]]] = {
+    "weibo": lambda item: item.get("note_id"),
+    "bilibili": lambda item: item.get("video_id"),
+    "zhihu": lambda item: item.get("url") or item.get("content_url") or item.get("content_id"),
+}
+# 各平台评论所属内容的ID
+COMMENT_POST_ID_GETTERS: Dict[str, Callable[[Dict], Optional[str]]] = {
+    "weibo": lambda comment: comment.get("note_id"),
+    "bilibili": lambda comment: comment.get("video_id") or comment.get("bvid"),
+    "zhihu": CONTENT_ID_GETTERS["zhihu"],
+}
+
+# 需要统一转换为字符串的ID字段
+ID_FIELDS = ['note_id', 'comment_id', 'user_id', 'video_id', 'content_id', 'url', 'content_url']
+
+
+def _convert_item_ids_to_string(item: Dict):
+    for field in ID_FIELDS:
+        if field in item and item[field] is not None:
+            item[field] = str(item[field])
+
+
+def _stream_contents(platform: str, changes: List[FileChange], contents: Dict[str, Dict],
+                     manifest: PostprocessManifest) -> List[Dict]:
+    """
+    按顺序流式读取一个平台内容文件中需要处理的记录，边读边按内容ID去重（保留第一次出现的记录），
+    并在清单中记录每个文件处理到的位置
+    Args:
+        platform: 平台名称
+        changes: 有变化的内容文件
+        contents: 内容ID -> 内容，读取时写入，已存在的ID会被跳过
+        manifest: 增量后处理清单
+
+    Returns:
+        新加载的内容（去重后），顺序与文件中一致
+    """
+    get_id = CONTENT_ID_GETTERS[platform]
+    unique_data: List[Dict] = []
+    for change in changes:
+        loaded = 0
+        offset = change.offset
+        records = change.records
+        try:
+            for item, offset in iter_new_records(change):
+                records += 1
+                content_id = get_id(item)
+                if content_id and str(content_id) not in contents:
+                    contents[str(content_id)] = item
+                    unique_data.append(item)
+                    loaded += 1
+        except Exception as e:
+            utils.logger.error(f"[DataPostProcessor] 读取文件 {change.file_path} 失败: {e}")
+            continue
+        manifest.mark_processed("search_contents", platform, change, offset, records)
+        utils.logger.info(
+            f"[DataPostProcessor] 从{PLATFORM_FILE_NAMES[platform]}文件 {change.file_path.name} 加载了 {loaded} 条数据"
+            + (f"（从第 {change.records + 1} 条记录继续）" if change.offset else "")
+        )
+    return unique_data
+
 
 class DataPostProcessor:
     """数据后处理器"""
@@ -39,6 +111,16 @@ class DataPostProcessor:
             api_key=config.LLM_API_KEY or None,
             base_url=config.LLM_BASE_URL or None,
             model=config.LLM_MODEL,
+            rate_limiter=LLMRateLimiter(
+                requests_per_minute=config.LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=config.LLM_TOKENS_PER_MINUTE,
+            ),
+            max_retries=config.LLM_MAX_RETRIES,
+            verdict_cache=RelevanceVerdictCache(
+                config.LLM_VERDICT_CACHE_PATH,
+                ttl_seconds=config.LLM_VERDICT_CACHE_TTL_DAYS * 24 * 3600,
+                max_entries=config.LLM_VERDICT_CACHE_MAX_ENTRIES,
+            ) if config.LLM_VERDICT_CACHE_PATH else None,
         )
         # 缓存已加载的数据，避免重复读取
         self._cached_data: Dict[str, Dict[str, Dict]] = {
@@ -51,6 +133,26 @@ class DataPostProcessor:
             "bilibili": [],
             "zhihu": []
         }
+        # 增量后处理清单：没有历史结果文件时（首次运行或结果被删除），之前的处理记录不再有效，完整处理一遍
+        self.manifest = PostprocessManifest(
+            event_description, config.POSTPROCESS_MANIFEST_PATH, enabled=config.POSTPROCESS_INCREMENTAL)
+        if not Path("data/relevant/relevant_data_latest.json").exists():
+            self.manifest.reset()
+        # 相关性判断是否有失败的批次，有失败时不更新清单，下次运行重新判断
+        self._judge_failed = False
+        # 各平台本次新索引的评论数
+        self._new_comment_counts: Dict[str, int] = {
+            "weibo": 0,
+            "bilibili": 0,
+            "zhihu": 0
+        }
+        # 评论索引，以及各平台本次要合并的评论来源文件（文件名去掉扩展名）
+        self._comment_index: Optional[CommentIndex] = None
+        self._comment_sources: Dict[str, List[str]] = {
+            "weibo": [],
+            "bilibili": [],
+            "zhihu": []
+        }
         # 已存在的相关数据（从 data/relevant/relevant_data_latest.json 中加载）
         self._existing_relevant_data: List[Dict] = []
         # 已经判定为“相关”的内容ID，用于跳过重复的大模型调用
@@ -118,31 +220,20 @@ class DataPostProcessor:
                 f"[DataPostProcessor] 加载已有相关数据失败: {e}"
             )
 
-    def _get_files_by_date(self, json_dir: Path, base_pattern: str) -> List[Path]:
+    def close_comment_index(self):
+        if self._comment_index is not None:
+            self._comment_index.close()
+            self._comment_index = None
+
+    def _get_files_by_date(self, platform: str, base_pattern: str) -> List[Path]:
         """
-        按照 self.target_dates 过滤指定目录下的 JSON 文件。
+        按照 self.target_dates 过滤平台的结果文件（data/<platform>/json/*.json 和 data/<platform>/jsonl/*.jsonl）。
         文件命名格式示例：search_contents_2025-12-15.json
         Args:
-            json_dir: JSON 文件所在目录
+            platform: 平台名称，如 weibo / bilibili / zhihu
             base_pattern: 基础前缀，如 "search_contents" / "search_comments"
         """
-        if not json_dir.exists():
-            return []
-
-        files = list(json_dir.glob(f"{base_pattern}_*.json"))
-
-        # 未指定日期时，返回全部匹配文件
-        if not self.target_dates:
-            return sorted(files)
-
-        filtered_files: List[Path] = []
-        for f in files:
-            name = f.name
-            # 只要文件名中包含任一指定日期字符串即可
-            if any(target_date in name for target_date in self.target_dates):
-                filtered_files.append(f)
-
-        return sorted(filtered_files)
+        return find_data_files(Path("data") / platform, base_pattern, self.target_dates)
 
     def convert_ids_to_string(self, data):
         """
@@ -153,19 +244,16 @@ class DataPostProcessor:
                 self.convert_ids_to_string(item)
         elif isinstance(data, dict):
             # 转换各种ID字段
-            id_fields = ['note_id', 'comment_id', 'user_id', 'video_id',
-                         'content_id', 'url', 'content_url']
-            for field in id_fields:
-                if field in data and data[field] is not None:
-                    data[field] = str(data[field])
+            _convert_item_ids_to_string(data)
 
     async def load_all_platform_data(self) -> Dict[str, List[Dict]]:
         """一次性加载所有平台的数据"""
         utils.logger.info("[DataPostProcessor] 开始加载所有平台的数据...")
 
-        weibo_data = await self._load_weibo_data()
-        bilibili_data = await self._load_bilibili_data()
-        zhihu_data = await self._load_zhihu_data()
+        # 三个平台在各自的线程中同时读取
+        weibo_data, bilibili_data, zhihu_data = await asyncio.gather(
+            self._load_weibo_data(), self._load_bilibili_data(), self._load_zhihu_data()
+        )
 
         utils.logger.info(
             f"[DataPostProcessor] 数据加载完成 - 微博: {len(weibo_data)}, "
@@ -179,250 +267,146 @@ class DataPostProcessor:
 
     async def _load_weibo_data(self) -> List[Dict]:
         """加载所有已存储的微博数据"""
-        all_data = []
-        try:
-            json_dir = Path("data/weibo/json")
-            for json_file in self._get_files_by_date(json_dir, "search_contents"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if isinstance(data, list):
-                            all_data.extend(data)
-                    utils.logger.info(
-                        f"[DataPostProcessor] 从微博文件 {json_file.name} 加载了 {len(data) if isinstance(data, list) else 0} 条数据"
-                    )
-                except Exception as e:
-                    utils.logger.error(
-                        f"[DataPostProcessor] 读取JSON文件 {json_file} 失败: {e}")
-
-            # 去重：使用note_id作为唯一标识，并缓存数据
-            seen_ids = set()
-            unique_data = []
-            for item in all_data:
-                note_id = item.get("note_id")
-                if note_id and note_id not in seen_ids:
-                    seen_ids.add(note_id)
-                    unique_data.append(item)
-                    # 缓存数据，以note_id为key
-                    self._cached_data["weibo"][str(note_id)] = item
-
-            utils.logger.info(
-                f"[DataPostProcessor] 加载微博数据: {len(unique_data)} 条（去重后）")
-            return unique_data
-        except Exception as e:
-            utils.logger.error(
-                f"[DataPostProcessor._load_weibo_data] 加载数据失败: {e}")
-            return []
+        return await self._load_platform_data("weibo")
 
     async def _load_bilibili_data(self) -> List[Dict]:
         """加载所有已存储的B站数据"""
-        all_data = []
-        try:
-            json_dir = Path("data/bilibili/json")
-            for json_file in self._get_files_by_date(json_dir, "search_contents"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if isinstance(data, list):
-                            all_data.extend(data)
-                    utils.logger.info(
-                        f"[DataPostProcessor] 从B站文件 {json_file.name} 加载了 {len(data) if isinstance(data, list) else 0} 条数据"
-                    )
-                except Exception as e:
-                    utils.logger.error(
-                        f"[DataPostProcessor] 读取JSON文件 {json_file} 失败: {e}")
-
-            # 去重：使用video_id作为唯一标识，并缓存数据
-            seen_ids = set()
-            unique_data = []
-            for item in all_data:
-                video_id = item.get("video_id")
-                if video_id and video_id not in seen_ids:
-                    seen_ids.add(video_id)
-                    unique_data.append(item)
-                    # 缓存数据，以video_id为key
-                    self._cached_data["bilibili"][str(video_id)] = item
-
-            utils.logger.info(
-                f"[DataPostProcessor] 加载B站数据: {len(unique_data)} 条（去重后）")
-            return unique_data
-        except Exception as e:
-            utils.logger.error(
-                f"[DataPostProcessor._load_bilibili_data] 加载数据失败: {e}")
-            return []
+        return await self._load_platform_data("bilibili")
 
     async def _load_zhihu_data(self) -> List[Dict]:
         """加载所有已存储的知乎数据"""
-        all_data = []
+        return await self._load_platform_data("zhihu")
+
+    async def _load_platform_data(self, platform: str) -> List[Dict]:
+        """
+        加载一个平台的内容文件：流式读取，边读边按内容ID去重，并缓存数据
+        （微博以note_id、B站以video_id、知乎以url/content_url/content_id为唯一标识）。
+        增量模式下跳过上次处理后没有变化的文件，JSON Lines 文件只读取新追加的记录
+        """
         try:
-            json_dir = Path("data/zhihu/json")
-            for json_file in self._get_files_by_date(json_dir, "search_contents"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if isinstance(data, list):
-                            all_data.extend(data)
-                    utils.logger.info(
-                        f"[DataPostProcessor] 从知乎文件 {json_file.name} 加载了 {len(data) if isinstance(data, list) else 0} 条数据"
-                    )
-                except Exception as e:
-                    utils.logger.error(
-                        f"[DataPostProcessor] 读取JSON文件 {json_file} 失败: {e}")
-
-            # 去重：使用url/content_url/content_id作为唯一标识，并缓存数据
-            seen_ids = set()
-            unique_data = []
-            for item in all_data:
-                content_id = item.get("url") or item.get(
-                    "content_url") or item.get("content_id")
-                if content_id and content_id not in seen_ids:
-                    seen_ids.add(content_id)
-                    unique_data.append(item)
-                    # 缓存数据，以content_id为key
-                    self._cached_data["zhihu"][str(content_id)] = item
+            files = self._get_files_by_date(platform, "search_contents")
+            changes = [change for change in (self.manifest.get_change("search_contents", platform, file_path)
+                                             for file_path in files) if change]
+            if len(changes) < len(files):
+                utils.logger.info(
+                    f"[DataPostProcessor] {PLATFORM_FILE_NAMES[platform]}有 {len(files) - len(changes)} 个内容文件"
+                    f"自上次处理后没有变化，跳过")
+            unique_data = await asyncio.to_thread(
+                _stream_contents, platform, changes, self._cached_data[platform], self.manifest)
 
             utils.logger.info(
-                f"[DataPostProcessor] 加载知乎数据: {len(unique_data)} 条（去重后）")
+                f"[DataPostProcessor] 加载{PLATFORM_FILE_NAMES[platform]}数据: {len(unique_data)} 条（去重后）")
             return unique_data
         except Exception as e:
             utils.logger.error(
-                f"[DataPostProcessor._load_zhihu_data] 加载数据失败: {e}")
+                f"[DataPostProcessor._load_platform_data] 加载{platform}数据失败: {e}")
             return []
 
-    async def judge_relevance(self, all_data: Dict[str, List[Dict]]):
-        """对所有数据进行相关性判断"""
-        utils.logger.info("[DataPostProcessor] 开始对所有数据进行相关性判断...")
+    def _build_relevance_job(self, platform: str, item: Dict) -> Optional[Tuple[str, Dict]]:
+        """
+        生成单条数据的相关性判断任务
+        Returns:
+            (内容ID, 传给大模型的内容)，没有ID或已在历史数据中判定为相关时返回None
+        """
+        if platform == "weibo":
+            item_id = item.get("note_id")
+            payload = {"content": item.get("content", ""), "note_id": item_id}
+        elif platform == "bilibili":
+            item_id = item.get("video_id")
+            payload = {"title": item.get("title", ""), "desc": item.get("desc", ""), "video_id": item_id}
+        else:
+            item_id = item.get("url") or item.get("content_url") or item.get("content_id")
+            payload = {"url": item_id, "title": item.get("title", ""), "content": item.get("content", "")}
+        if not item_id:
+            return None
+
+        item_id_str = str(item_id)
+        # 如果该内容已在历史 relevant_data_latest.json 中被判定为相关，则跳过大模型调用
+        if item_id_str in self._existing_relevant_ids[platform]:
+            utils.logger.debug(
+                f"[DataPostProcessor] {PLATFORM_ITEM_NAMES[platform]} {item_id_str} 已在历史数据中判定为相关，跳过重复判断"
+            )
+            return None
+        return item_id_str, payload
 
-        # 对微博数据进行相关性判断
-        utils.logger.info("[DataPostProcessor] 开始对微博数据进行相关性判断...")
-        relevant_weibo_ids = []
-        for item in all_data["weibo"]:
+    async def _judge_batch(self, semaphore: asyncio.Semaphore, platform: str, batch: Dict[str, Dict]) -> Dict[str, bool]:
+        """在并发限制内对一批数据进行相关性判断，一批数据只占用一个并发名额"""
+        item_name = PLATFORM_ITEM_NAMES[platform]
+        async with semaphore:
             try:
-                note_id = item.get("note_id")
-                if not note_id:
-                    continue
-
-                note_id_str = str(note_id)
-                # 如果该微博已在历史 relevant_data_latest.json 中被判定为相关，则跳过大模型调用
-                if note_id_str in self._existing_relevant_ids["weibo"]:
-                    utils.logger.debug(
-                        f"[DataPostProcessor] 微博 {note_id_str} 已在历史数据中判定为相关，跳过重复判断"
-                    )
-                    continue
-
-                content = item.get("content", "")
-                relevance = await self.llm_agent.judge_relevance(
-                    {"content": content, "note_id": note_id},
+                verdicts = await self.llm_agent.judge_relevance_batch(
+                    batch,
                     self.event_description,
-                    platform="weibo"
+                    platform=platform
                 )
-
-                if relevance["is_relevant"] or not config.ENABLE_RELEVANCE_FILTER:
-                    relevant_weibo_ids.append(str(note_id))
-                    utils.logger.info(
-                        f"[DataPostProcessor] 微博 {note_id} 相关 "
-                        f"(评分: {relevance['score']:.2f}, 理由: {relevance['reason']})"
-                    )
-                else:
-                    utils.logger.debug(
-                        f"[DataPostProcessor] 微博 {note_id} 不相关 "
-                        f"(评分: {relevance['score']:.2f})"
-                    )
-                await asyncio.sleep(0.3)  # 短暂延迟，避免API调用过快
             except Exception as e:
-                utils.logger.error(f"[DataPostProcessor] 处理微博数据时出错: {e}")
-                continue
-
-        # 对B站数据进行相关性判断
-        utils.logger.info("[DataPostProcessor] 开始对B站数据进行相关性判断...")
-        relevant_bilibili_ids = []
-        for item in all_data["bilibili"]:
-            try:
-                video_id = item.get("video_id")
-                if not video_id:
-                    continue
+                utils.logger.error(f"[DataPostProcessor] 处理{item_name}数据时出错: {e}")
+                self._judge_failed = True
+                return {}
 
-                video_id_str = str(video_id)
-                if video_id_str in self._existing_relevant_ids["bilibili"]:
-                    utils.logger.debug(
-                        f"[DataPostProcessor] B站视频 {video_id_str} 已在历史数据中判定为相关，跳过重复判断"
-                    )
-                    continue
-
-                title = item.get("title", "")
-                desc = item.get("desc", "")
-                relevance = await self.llm_agent.judge_relevance(
-                    {"title": title, "desc": desc, "video_id": video_id},
-                    self.event_description,
-                    platform="bilibili"
+        results: Dict[str, bool] = {}
+        for item_id, relevance in verdicts.items():
+            if relevance["is_relevant"] or not config.ENABLE_RELEVANCE_FILTER:
+                utils.logger.info(
+                    f"[DataPostProcessor] {item_name} {item_id} 相关 "
+                    f"(评分: {relevance['score']:.2f}, 理由: {relevance['reason']})"
                 )
-
-                if relevance["is_relevant"] or not config.ENABLE_RELEVANCE_FILTER:
-                    relevant_bilibili_ids.append(str(video_id))
-                    utils.logger.info(
-                        f"[DataPostProcessor] B站视频 {video_id} 相关 "
-                        f"(评分: {relevance['score']:.2f}, 理由: {relevance['reason']})"
-                    )
-                else:
-                    utils.logger.debug(
-                        f"[DataPostProcessor] B站视频 {video_id} 不相关 "
-                        f"(评分: {relevance['score']:.2f})"
-                    )
-                await asyncio.sleep(0.3)
-            except Exception as e:
-                utils.logger.error(f"[DataPostProcessor] 处理B站数据时出错: {e}")
-                continue
-
-        # 对知乎数据进行相关性判断
-        utils.logger.info("[DataPostProcessor] 开始对知乎数据进行相关性判断...")
-        relevant_zhihu_ids = []
-        for item in all_data["zhihu"]:
-            try:
-                content_id = item.get("url") or item.get(
-                    "content_url") or item.get("content_id")
-                if not content_id:
-                    continue
-
-                content_id_str = str(content_id)
-                if content_id_str in self._existing_relevant_ids["zhihu"]:
-                    utils.logger.debug(
-                        f"[DataPostProcessor] 知乎内容 {content_id_str} 已在历史数据中判定为相关，跳过重复判断"
-                    )
-                    continue
-
-                title = item.get("title", "")
-                content = item.get("content", "")
-                relevance = await self.llm_agent.judge_relevance(
-                    {"url": content_id, "title": title, "content": content},
-                    self.event_description,
-                    platform="zhihu"
+                results[item_id] = True
+            else:
+                utils.logger.debug(
+                    f"[DataPostProcessor] {item_name} {item_id} 不相关 "
+                    f"(评分: {relevance['score']:.2f})"
                 )
+                results[item_id] = False
+        return results
 
-                if relevance["is_relevant"] or not config.ENABLE_RELEVANCE_FILTER:
-                    relevant_zhihu_ids.append(str(content_id))
-                    utils.logger.info(
-                        f"[DataPostProcessor] 知乎内容 {content_id} 相关 "
-                        f"(评分: {relevance['score']:.2f}, 理由: {relevance['reason']})"
-                    )
-                else:
-                    utils.logger.debug(
-                        f"[DataPostProcessor] 知乎内容 {content_id} 不相关 "
-                        f"(评分: {relevance['score']:.2f})"
-                    )
-                await asyncio.sleep(0.3)
-            except Exception as e:
-                utils.logger.error(f"[DataPostProcessor] 处理知乎数据时出错: {e}")
-                continue
+    async def judge_relevance(self, all_data: Dict[str, List[Dict]]):
+        """
+        对所有数据进行相关性判断：每个平台的数据按 LLM_BATCH_SIZE / LLM_BATCH_MAX_CHARS 打包成批，
+        三个平台的批次一起并发判断，并发数由 LLM_MAX_CONCURRENCY 控制，请求速率由 LLMAgent 的限流器控制
+        """
+        utils.logger.info("[DataPostProcessor] 开始对所有数据进行相关性判断...")
+
+        platform_jobs: Dict[str, Dict[str, Dict]] = {}
+        for platform in ("weibo", "bilibili", "zhihu"):
+            platform_jobs[platform] = {}
+            for item in all_data[platform]:
+                job = self._build_relevance_job(platform, item)
+                if job:
+                    platform_jobs[platform].setdefault(job[0], job[1])
+
+        batches: List[Tuple[str, Dict[str, Dict]]] = []
+        for platform, jobs in platform_jobs.items():
+            for batch in self.llm_agent.split_relevance_batches(
+                jobs, platform, max(1, config.LLM_BATCH_SIZE), config.LLM_BATCH_MAX_CHARS
+            ):
+                batches.append((platform, batch))
+
+        semaphore = asyncio.Semaphore(max(1, config.LLM_MAX_CONCURRENCY))
+        start_time = time.monotonic()
+        results = await asyncio.gather(
+            *[self._judge_batch(semaphore, platform, batch) for platform, batch in batches]
+        )
+        elapsed = time.monotonic() - start_time
 
-        # 保存相关性判断结果
-        self.relevant_ids["weibo"] = relevant_weibo_ids
-        self.relevant_ids["bilibili"] = relevant_bilibili_ids
-        self.relevant_ids["zhihu"] = relevant_zhihu_ids
+        # 保存相关性判断结果，保持原始数据顺序
+        relevant: Dict[str, Set[str]] = defaultdict(set)
+        for (platform, _), batch_result in zip(batches, results):
+            relevant[platform].update(item_id for item_id, is_relevant in batch_result.items() if is_relevant)
+        for platform, jobs in platform_jobs.items():
+            self.relevant_ids[platform] = [item_id for item_id in jobs if item_id in relevant[platform]]
 
         utils.logger.info(
-            f"[DataPostProcessor] 相关性判断完成 - 微博: {len(relevant_weibo_ids)}/{len(all_data['weibo'])}, "
-            f"B站: {len(relevant_bilibili_ids)}/{len(all_data['bilibili'])}, "
-            f"知乎: {len(relevant_zhihu_ids)}/{len(all_data['zhihu'])}")
+            f"[DataPostProcessor] 相关性判断完成 - 微博: {len(self.relevant_ids['weibo'])}/{len(all_data['weibo'])}, "
+            f"B站: {len(self.relevant_ids['bilibili'])}/{len(all_data['bilibili'])}, "
+            f"知乎: {len(self.relevant_ids['zhihu'])}/{len(all_data['zhihu'])}")
+        total_jobs = sum(len(jobs) for jobs in platform_jobs.values())
+        if total_jobs:
+            utils.logger.info(
+                f"[DataPostProcessor] 共判断 {total_jobs} 条（{len(batches)} 批），耗时 {elapsed:.1f} 秒，"
+                f"吞吐 {total_jobs / max(elapsed, 1e-6):.2f} 条/秒")
+        if self.llm_agent.verdict_cache:
+            self.llm_agent.verdict_cache.log_stats()
 
     async def get_weibo_detail_content(self):
         """
@@ -435,41 +419,27 @@ class DataPostProcessor:
         utils.logger.info(
             f"[DataPostProcessor] 开始对 {len(self.relevant_ids['weibo'])} 个相关微博使用detail模式获取完整内容...")
 
-        # 保存原始配置
-        original_platform = config.PLATFORM
-        original_cookies = config.COOKIES
-        original_crawler_type = config.CRAWLER_TYPE
-        original_headless = config.HEADLESS
-        original_enable_comments = config.ENABLE_GET_COMMENTS
-        original_weibo_specified_id_list = config.WEIBO_SPECIFIED_ID_LIST
+        # detail 模式的运行参数只作用于这个爬虫实例，不修改全局配置
+        settings = CrawlerSettings.from_config(
+            "wb",
+            cookies=WB_cookie,
+            crawler_type="detail",
+            specified_id_list=self.relevant_ids["weibo"],
+            headless=True,
+            enable_get_comments=True,
+        )
 
+        # 使用detail模式再次爬取
+        weibo_crawler_detail = WeiboCrawler(settings)
         try:
-            # 设置微博配置为detail模式
-            config.PLATFORM = "wb"
-            config.COOKIES = WB_cookie
-            config.CRAWLER_TYPE = "detail"
-            config.WEIBO_SPECIFIED_ID_LIST = self.relevant_ids["weibo"]
-            config.HEADLESS = True
-            config.ENABLE_GET_COMMENTS = True
-
-            # 使用detail模式再次爬取
-            weibo_crawler_detail = WeiboCrawler()
             await weibo_crawler_detail.start()
-            utils.logger.info("[DataPostProcessor] 微博detail模式爬取完成，已获取完整内容"
-                              )
-
-            # 从detail模式的结果中读取完整内容，更新缓存数据
-            await self._update_weibo_content_from_detail()
-
         finally:
-            # 恢复原始配置
-            config.PLATFORM = original_platform
-            config.COOKIES = original_cookies
-            config.CRAWLER_TYPE = original_crawler_type
-            config.HEADLESS = original_headless
-            config.ENABLE_GET_COMMENTS = original_enable_comments
-            if hasattr(config, 'WEIBO_SPECIFIED_ID_LIST'):
-                config.WEIBO_SPECIFIED_ID_LIST = original_weibo_specified_id_list
+            await weibo_crawler_detail.close()
+        utils.logger.info("[DataPostProcessor] 微博detail模式爬取完成，已获取完整内容"
+                          )
+
+        # 从detail模式的结果中读取完整内容，更新缓存数据
+        await self._update_weibo_content_from_detail()
 
     async def _update_weibo_content_from_detail(self):
         """
@@ -478,14 +448,8 @@ class DataPostProcessor:
         utils.logger.info("[DataPostProcessor] 开始更新微博完整内容...")
 
         updated_count = 0
-        json_dir = Path("data/weibo/json")
-
-        if not json_dir.exists():
-            utils.logger.warning("[DataPostProcessor] 微博JSON目录不存在，跳过内容更新")
-            return
-
-        # 查找detail模式生成的文件
-        detail_files = list(json_dir.glob("detail_contents_*.json"))
+        # 查找detail模式生成的文件（json 或 jsonl）
+        detail_files = find_data_files(Path("data/weibo"), "detail_contents")
 
         if not detail_files:
             utils.logger.warning("[DataPostProcessor] 未找到detail模式生成的文件，跳过内容更新")
@@ -493,35 +457,21 @@ class DataPostProcessor:
 
         for detail_file in detail_files:
             try:
-                with open(detail_file, 'r', encoding='utf-8') as f:
-                    detail_data = json.load(f)
-
-                # 统一ID为字符串
-                # self.convert_ids_to_string(detail_data)
-
-                # 处理可能是dict格式的数据
-                if isinstance(detail_data, dict):
-                    for key, value in detail_data.items():
-                        if isinstance(value, list) and value:
-                            detail_data = value
-                            break
-
-                if isinstance(detail_data, list):
-                    for detail_item in detail_data:
-                        note_id = detail_item.get("note_id")
-                        content = detail_item.get("content", "")
-
-                        if note_id and content:
-                            note_id_str = str(note_id)
-                            # 更新缓存数据中的content
-                            if note_id_str in self._cached_data["weibo"]:
-                                original_content = self._cached_data["weibo"][note_id_str].get(
-                                    "content", "")
-                                if content != original_content:
-                                    self._cached_data["weibo"][note_id_str]["content"] = content
-                                    updated_count += 1
-                                    utils.logger.debug(
-                                        f"[DataPostProcessor] 已更新微博 {note_id_str} 的完整内容")
+                for detail_item in iter_records(detail_file):
+                    note_id = detail_item.get("note_id")
+                    content = detail_item.get("content", "")
+
+                    if note_id and content:
+                        note_id_str = str(note_id)
+                        # 更新缓存数据中的content
+                        if note_id_str in self._cached_data["weibo"]:
+                            original_content = self._cached_data["weibo"][note_id_str].get(
+                                "content", "")
+                            if content != original_content:
+                                self._cached_data["weibo"][note_id_str]["content"] = content
+                                updated_count += 1
+                                utils.logger.debug(
+                                    f"[DataPostProcessor] 已更新微博 {note_id_str} 的完整内容")
 
                 utils.logger.info(
                     f"[DataPostProcessor] 从 {detail_file.name} 更新了微博内容")
@@ -534,163 +484,103 @@ class DataPostProcessor:
         utils.logger.info(
             f"[DataPostProcessor] 微博内容更新完成，共更新 {updated_count} 条微博的完整内容")
 
-    def load_comments(self) -> Dict[str, Dict[str, List[Dict]]]:
+    def index_comments(self):
         """
-        加载所有评论文件
-        返回格式: {platform: {item_id: [comments]}}
+        为评论文件建立索引：增量模式下只读取上次处理后新增或变化的部分，
+        同时记录本次要合并的评论来源文件（按 target_dates 过滤）
         """
-        utils.logger.info("[DataPostProcessor] 开始加载评论文件...")
-        comments_data = {
-            "weibo": defaultdict(list),
-            "bilibili": defaultdict(list),
-            "zhihu": defaultdict(list)
-        }
-
-        # 加载微博评论
-        weibo_comments_dir = Path("data/weibo/json")
-        if weibo_comments_dir.exists():
-            for comments_file in self._get_files_by_date(weibo_comments_dir, "search_comments"):
-                try:
-                    with open(comments_file, 'r', encoding='utf-8') as f:
-                        comments = json.load(f)
-
-                    # 统一ID为字符串
-                    self.convert_ids_to_string(comments)
-
-                    # 处理可能是dict格式的数据
-                    if isinstance(comments, dict):
-                        for key, value in comments.items():
-                            if isinstance(value, list) and value:
-                                comments = value
-                                break
-
-                    if isinstance(comments, list):
-                        for comment in comments:
-                            note_id = comment.get("note_id")
-                            if note_id:
-                                comments_data["weibo"][str(
-                                    note_id)].append(comment)
-
-                    utils.logger.info(
-                        f"[DataPostProcessor] 从 {comments_file.name} 加载了评论")
-                except Exception as e:
-                    utils.logger.error(
-                        f"[DataPostProcessor] 读取评论文件 {comments_file} 失败: {e}")
-
-        # 加载B站评论（如果有）
-        bilibili_comments_dir = Path("data/bilibili/json")
-        if bilibili_comments_dir.exists():
-            for comments_file in self._get_files_by_date(bilibili_comments_dir, "search_comments"):
-                try:
-                    with open(comments_file, 'r', encoding='utf-8') as f:
-                        comments = json.load(f)
-
-                    self.convert_ids_to_string(comments)
-
-                    if isinstance(comments, dict):
-                        for key, value in comments.items():
-                            if isinstance(value, list) and value:
-                                comments = value
-                                break
-
-                    if isinstance(comments, list):
-                        for comment in comments:
-                            video_id = comment.get(
-                                "video_id") or comment.get("bvid")
-                            if video_id:
-                                comments_data["bilibili"][str(
-                                    video_id)].append(comment)
-
-                    utils.logger.info(
-                        f"[DataPostProcessor] 从 {comments_file.name} 加载了评论")
-                except Exception as e:
-                    utils.logger.error(
-                        f"[DataPostProcessor] 读取评论文件 {comments_file} 失败: {e}")
-
-        # 加载知乎评论（如果有）
-        zhihu_comments_dir = Path("data/zhihu/json")
-        if zhihu_comments_dir.exists():
-            for comments_file in self._get_files_by_date(zhihu_comments_dir, "search_comments"):
+        utils.logger.info("[DataPostProcessor] 开始为评论文件建立索引...")
+        if self._comment_index is None:
+            self._comment_index = CommentIndex(config.POSTPROCESS_COMMENT_INDEX_PATH)
+
+        total_comments = 0
+        for platform in self._comment_sources:
+            files = self._get_files_by_date(platform, "search_comments")
+            self._comment_sources[platform] = [file_path.stem for file_path in files]
+            for file_path in files:
+                change = self.manifest.get_change("search_comments", platform, file_path)
+                if change is None:
+                    continue
                 try:
-                    with open(comments_file, 'r', encoding='utf-8') as f:
-                        comments = json.load(f)
-
-                    self.convert_ids_to_string(comments)
-
-                    if isinstance(comments, dict):
-                        for key, value in comments.items():
-                            if isinstance(value, list) and value:
-                                comments = value
-                                break
-
-                    if isinstance(comments, list):
-                        for comment in comments:
-                            content_id = comment.get("url") or comment.get(
-                                "content_url") or comment.get("content_id")
-                            if content_id:
-                                comments_data["zhihu"][str(
-                                    content_id)].append(comment)
-
-                    utils.logger.info(
-                        f"[DataPostProcessor] 从 {comments_file.name} 加载了评论")
+                    count, offset, records = self._comment_index.index_file(
+                        platform, change, COMMENT_POST_ID_GETTERS[platform])
                 except Exception as e:
-                    utils.logger.error(
-                        f"[DataPostProcessor] 读取评论文件 {comments_file} 失败: {e}")
+                    utils.logger.error(f"[DataPostProcessor] 读取评论文件 {file_path} 失败: {e}")
+                    continue
+                self.manifest.mark_processed("search_comments", platform, change, offset, records)
+                if count:
+                    utils.logger.info(f"[DataPostProcessor] 从 {file_path.name} 索引了 {count} 条评论")
+                self._new_comment_counts[platform] += count
+                total_comments += count
 
-        total_comments = sum(len(comments) for platform_comments in comments_data.values()
-                             for comments in platform_comments.values())
         utils.logger.info(
-            f"[DataPostProcessor] 评论加载完成，共加载 {total_comments} 条评论")
+            f"[DataPostProcessor] 评论索引完成，本次新索引 {total_comments} 条评论")
 
-        return comments_data
-
-    def merge_comments_to_data(self, all_data: Dict[str, List[Dict]],
-                               comments_data: Dict[str, Dict[str, List[Dict]]]):
+    def merge_comments_to_data(self, all_data: Dict[str, List[Dict]]) -> int:
         """
-        将评论集成到原始数据中
+        将评论集成到相关的内容中：只从评论索引中查询相关内容的评论，不相关的内容不会被保存，也不需要评论。
+        本次有新索引的评论时，历史相关数据也会补充新的评论
+        Returns:
+            为历史相关数据补充的评论数
         """
-        utils.logger.info("[DataPostProcessor] 开始集成评论到原始数据...")
-
-        # 为微博数据添加评论
-        for item in all_data["weibo"]:
-            note_id = str(item.get("note_id", ""))
-            if note_id in comments_data["weibo"]:
-                item["comments"] = comments_data["weibo"][note_id]
-            else:
-                item["comments"] = []
-
-        # 为B站数据添加评论
-        for item in all_data["bilibili"]:
-            video_id = str(item.get("video_id", ""))
-            if video_id in comments_data["bilibili"]:
-                item["comments"] = comments_data["bilibili"][video_id]
-            else:
-                item["comments"] = []
-
-        # 为知乎数据添加评论
-        for item in all_data["zhihu"]:
-            content_id = str(item.get("url") or item.get(
-                "content_url") or item.get("content_id", ""))
-            if content_id in comments_data["zhihu"]:
-                item["comments"] = comments_data["zhihu"][content_id]
-            else:
-                item["comments"] = []
+        utils.logger.info("[DataPostProcessor] 开始集成评论到相关数据...")
+
+        with_comments: Dict[str, int] = {}
+        for platform, items in all_data.items():
+            relevant_ids = set(self.relevant_ids[platform])
+            comments_data = self._comment_index.get_comments(
+                platform, relevant_ids, self._comment_sources[platform])
+            get_id = CONTENT_ID_GETTERS[platform]
+            with_comments[platform] = 0
+            for item in items:
+                item_id = str(get_id(item) or "")
+                if item_id not in relevant_ids:
+                    continue
+                comments = comments_data.get(item_id, [])
+                for comment in comments:
+                    _convert_item_ids_to_string(comment)
+                item["comments"] = comments
+                if comments:
+                    with_comments[platform] += 1
 
-        weibo_with_comments = sum(
-            1 for item in all_data["weibo"] if item.get("comments"))
-        bilibili_with_comments = sum(
-            1 for item in all_data["bilibili"] if item.get("comments"))
-        zhihu_with_comments = sum(
-            1 for item in all_data["zhihu"] if item.get("comments"))
+        added = self._merge_new_comments_to_existing()
 
         utils.logger.info(
-            f"[DataPostProcessor] 评论集成完成 - 微博: {weibo_with_comments}, "
-            f"B站: {bilibili_with_comments}, 知乎: {zhihu_with_comments}")
-
-    async def save_relevant_data(self, all_data: Dict[str, List[Dict]]):
+            f"[DataPostProcessor] 评论集成完成 - 微博: {with_comments.get('weibo', 0)}, "
+            f"B站: {with_comments.get('bilibili', 0)}, 知乎: {with_comments.get('zhihu', 0)}")
+        return added
+
+    def _merge_new_comments_to_existing(self) -> int:
+        """为历史相关数据补充评论索引中还没有合并过的评论（按评论ID判断）"""
+        existing_items: Dict[str, List[Dict]] = defaultdict(list)
+        for item in self._existing_relevant_data:
+            platform = item.get("platform")
+            if self._new_comment_counts.get(platform) and item.get("relevance_id"):
+                existing_items[platform].append(item)
+
+        added = 0
+        for platform, items in existing_items.items():
+            comments_data = self._comment_index.get_comments(
+                platform, (item["relevance_id"] for item in items), self._comment_sources[platform])
+            for item in items:
+                comments = item.setdefault("comments", [])
+                merged_ids = {str(comment.get("comment_id")) for comment in comments}
+                for comment in comments_data.get(str(item["relevance_id"]), []):
+                    _convert_item_ids_to_string(comment)
+                    # 没有评论ID的评论无法判断是否已经合并过，不补充
+                    if comment.get("comment_id") is not None and comment["comment_id"] not in merged_ids:
+                        comments.append(comment)
+                        added += 1
+        if added:
+            utils.logger.info(f"[DataPostProcessor] 为历史相关数据补充了 {added} 条新评论")
+        return added
+
+    async def save_relevant_data(self, all_data: Dict[str, List[Dict]]) -> bool:
         """
         将所有平台的相关数据收集并存储到一个JSON文件中，支持去重
         同时会合并历史 relevant_data_latest.json 中已有的数据，实现增量更新。
+        Returns:
+            是否成功（没有相关数据而跳过保存也视为成功）
         """
         utils.logger.info("[DataPostProcessor] 开始收集并存储所有平台的相关数据...")
 
@@ -767,41 +657,64 @@ class DataPostProcessor:
                 utils.logger.info(
                     f"[DataPostProcessor] 已保存 {len(all_relevant_data)} 条相关数据到 {output_file}")
 
-                # 同时保存一个latest文件，方便查看最新数据
+                # 同时保存一个latest文件，方便查看最新数据：直接复制上面的文件，不再重新序列化；
+                # 先写临时文件再替换，下次运行读取 latest 时不会读到写了一半的文件
                 latest_file = output_dir / "relevant_data_latest.json"
-                with open(latest_file, 'w', encoding='utf-8') as f:
-                    json.dump(all_relevant_data, f,
-                              ensure_ascii=False, indent=2)
+                tmp_file = output_dir / "relevant_data_latest.json.tmp"
+                shutil.copyfile(output_file, tmp_file)
+                os.replace(tmp_file, latest_file)
                 utils.logger.info(
                     f"[DataPostProcessor] 已更新最新数据文件: {latest_file}")
             else:
                 utils.logger.warning("[DataPostProcessor] 没有找到相关数据，跳过保存")
+            return True
 
         except Exception as e:
             utils.logger.error(
                 f"[DataPostProcessor.save_relevant_data] 保存相关数据失败: {e}")
+            return False
 
     async def process(self):
         """执行完整的数据后处理流程"""
         utils.logger.info("[DataPostProcessor] 开始数据后处理流程...")
 
-        # 第一步：加载所有平台的数据
-        all_data = await self.load_all_platform_data()
+        try:
+            # 第一步：加载所有平台的数据（增量模式下只加载上次处理后新增的数据）
+            all_data = await self.load_all_platform_data()
 
-        # 第二步：相关性判断
-        await self.judge_relevance(all_data)
+            # 第二步：相关性判断
+            try:
+                await self.judge_relevance(all_data)
+            finally:
+                if self.llm_agent.verdict_cache:
+                    self.llm_agent.verdict_cache.close()
 
-        # 第三步：对相关的微博使用detail模式获取完整内容
-        await self.get_weibo_detail_content()
+            # 第三步：对相关的微博使用detail模式获取完整内容
+            await self.get_weibo_detail_content()
 
-        # 第四步：加载评论数据
-        comments_data = self.load_comments()
+            try:
+                # 第四步：为评论文件建立索引
+                self.index_comments()
 
-        # 第五步：将评论集成到原始数据中
-        self.merge_comments_to_data(all_data, comments_data)
+                # 第五步：将评论集成到相关数据中
+                existing_comments_added = self.merge_comments_to_data(all_data)
+            finally:
+                self.close_comment_index()
 
-        # 第六步：保存相关数据（只保存相关的数据）
-        await self.save_relevant_data(all_data)
+            # 第六步：保存相关数据（只保存相关的数据）；没有新的相关内容、也没有补充评论时不需要重新保存
+            if any(self.relevant_ids.values()) or existing_comments_added:
+                saved = await self.save_relevant_data(all_data)
+            else:
+                utils.logger.info("[DataPostProcessor] 自上次处理后没有新的相关数据，跳过保存")
+                saved = True
+
+            # 第七步：全部成功后更新增量处理清单，失败的部分下次运行时重新处理
+            if saved and not self._judge_failed:
+                self.manifest.commit()
+            else:
+                utils.logger.warning("[DataPostProcessor] 本次处理有失败的步骤，不更新增量处理清单，下次运行时重新处理")
+        finally:
+            self.manifest.close()
 
         utils.logger.info("[DataPostProcessor] 数据后处理流程完成")
         utils.logger.info(
@@ -0,0 +1,93 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 批量写入工具：一次事务内完成一页数据的插入/更新，替代逐条 SELECT + INSERT/UPDATE + COMMIT
+
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# 单条 IN 查询携带的最大参数个数，避免超过 SQLite 的绑定参数上限
+BATCH_SELECT_CHUNK_SIZE = 500
+
+
+async def batch_upsert(
+    session: AsyncSession,
+    model: Type,
+    items: List[Dict],
+    key_column: str,
+    insert_defaults: Optional[Dict[str, Any]] = None,
+    update_columns: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    按 key_column 批量写入数据：已存在的记录按主键批量 UPDATE，不存在的记录批量 INSERT。
+    评论表的 comment_id 只有普通索引，没有唯一约束，无法直接使用 INSERT ... ON CONFLICT /
+    ON DUPLICATE KEY UPDATE，所以这里用一次 IN 查询确定已存在的记录，整批只需要 2~3 次数据库往返。
+    调用方负责提交事务（get_session 退出时会自动 commit）。
+    Args:
+        session: 数据库会话
+        model: ORM 模型
+        items: 待写入的数据，key 为模型字段名
+        key_column: 业务唯一键字段，如 comment_id
+        insert_defaults: 仅在插入新记录时补充的字段，如 add_ts
+        update_columns: 更新已存在记录时允许更新的字段，None 表示更新 item 中的所有字段
+
+    Returns:
+
+    """
+    if not items:
+        return
+
+    columns = set(model.__table__.columns.keys())
+    key_attr = getattr(model, key_column)
+
+    # 同一批次内按 key 去重，后出现的数据覆盖先出现的数据
+    rows: Dict[str, Dict] = {}
+    for item in items:
+        key = item.get(key_column)
+        if key is None or key == "":
+            continue
+        rows[str(key)] = {k: v for k, v in item.items() if k in columns}
+    if not rows:
+        return
+
+    existing_ids: Dict[str, Any] = {}
+    keys = [row[key_column] for row in rows.values()]
+    for i in range(0, len(keys), BATCH_SELECT_CHUNK_SIZE):
+        result = await session.execute(
+            select(model.id, key_attr).where(key_attr.in_(keys[i:i + BATCH_SELECT_CHUNK_SIZE]))
+        )
+        for row_id, row_key in result.all():
+            existing_ids[str(row_key)] = row_id
+
+    allowed_update_columns = set(update_columns) if update_columns is not None else None
+    insert_rows: List[Dict] = []
+    update_rows: List[Dict] = []
+    for key, row in rows.items():
+        if key in existing_ids:
+            update_row = {
+                k: v for k, v in row.items()
+                if k != "id" and (allowed_update_columns is None or k in allowed_update_columns)
+            }
+            update_row["id"] = existing_ids[key]
+            update_rows.append(update_row)
+        else:
+            insert_row = dict(insert_defaults or {})
+            insert_row.update(row)
+            insert_rows.append(insert_row)
+
+    if insert_rows:
+        await session.execute(insert(model), insert_rows)
+    if update_rows:
+        # ORM bulk UPDATE by primary key，按 executemany 方式一次发送
+        await session.execute(update(model), update_rows)
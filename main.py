@@ -10,41 +10,47 @@
 
 
 import asyncio
+import importlib
 import sys
 from typing import Optional
 
 import cmd_arg
 import config
-from database import db
 from base.base_crawler import AbstractCrawler
-from media_platform.bilibili import BilibiliCrawler
-from media_platform.douyin import DouYinCrawler
-from media_platform.kuaishou import KuaishouCrawler
-from media_platform.tieba import TieBaCrawler
-from media_platform.weibo import WeiboCrawler
-from media_platform.xhs import XiaoHongShuCrawler
-from media_platform.zhihu import ZhihuCrawler
+from base.crawler_settings import CrawlerSettings
+from tools.async_file_writer import export_jsonl_to_json
+from tools.crawl_checkpoint import close_crawl_checkpoints
+from tools.js_worker import close_js_worker_pools
+from tools.seen_index import close_seen_indexes
+from tools.sharded_executor import ShardedCrawlExecutor
 
 
 class CrawlerFactory:
+    # 平台 -> 爬虫类的导入路径，创建时才导入对应平台的模块，只爬取一个平台时不必加载其他平台的依赖
     CRAWLERS = {
-        "xhs": XiaoHongShuCrawler,
-        "dy": DouYinCrawler,
-        "ks": KuaishouCrawler,
-        "bili": BilibiliCrawler,
-        "wb": WeiboCrawler,
-        "tieba": TieBaCrawler,
-        "zhihu": ZhihuCrawler,
+        "xhs": "media_platform.xhs:XiaoHongShuCrawler",
+        "dy": "media_platform.douyin:DouYinCrawler",
+        "ks": "media_platform.kuaishou:KuaishouCrawler",
+        "bili": "media_platform.bilibili:BilibiliCrawler",
+        "wb": "media_platform.weibo:WeiboCrawler",
+        "tieba": "media_platform.tieba:TieBaCrawler",
+        "zhihu": "media_platform.zhihu:ZhihuCrawler",
     }
 
     @staticmethod
-    def create_crawler(platform: str) -> AbstractCrawler:
-        crawler_class = CrawlerFactory.CRAWLERS.get(platform)
-        if not crawler_class:
+    def get_crawler_path(platform: str) -> str:
+        crawler_path = CrawlerFactory.CRAWLERS.get(platform)
+        if not crawler_path:
             raise ValueError(
                 "Invalid Media Platform Currently only supported xhs or dy or ks or bili ..."
             )
-        return crawler_class()
+        return crawler_path
+
+    @staticmethod
+    def create_crawler(platform: str, settings: Optional[CrawlerSettings] = None) -> AbstractCrawler:
+        module_name, class_name = CrawlerFactory.get_crawler_path(platform).split(":")
+        crawler_class = getattr(importlib.import_module(module_name), class_name)
+        return crawler_class(settings)
 
 
 crawler: Optional[AbstractCrawler] = None
@@ -63,14 +69,36 @@ async def main():
 
     # init db
     if args.init_db:
+        from database import db
         await db.init_db(args.init_db)
         print(f"Database {args.init_db} initialized successfully.")
         return  # Exit the main function cleanly
 
-
+    # export jsonl to legacy json array files
+    if args.export_json:
+        exported_files = export_jsonl_to_json()
+        print(f"Exported {len(exported_files)} jsonl files to json.")
+        return
+
+    # 多进程分片爬取：子进程各自创建爬虫，主进程只负责合并数据
+    if config.CRAWLER_WORKERS > 1:
+        executor = ShardedCrawlExecutor(
+            CrawlerSettings.from_config(config.PLATFORM),
+            CrawlerFactory.get_crawler_path(config.PLATFORM),
+            workers=config.CRAWLER_WORKERS,
+        )
+        await executor.run()
+        return
 
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+    try:
+        await crawler.start()
+    finally:
+        # 关闭API客户端的连接池及浏览器
+        await crawler.close()
+        close_crawl_checkpoints()
+        close_seen_indexes()
+        await close_js_worker_pools()
 
 
 def cleanup():
@@ -78,6 +106,7 @@ def cleanup():
         # asyncio.run(crawler.close())
         pass
     if config.SAVE_DATA_OPTION in ["db", "sqlite"]:
+        from database import db
         asyncio.run(db.close())
     
     # 取消所有待处理的任务以避免 asyncio 错误
@@ -15,6 +15,7 @@
 import asyncio
 import json
 import random
+import time
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
@@ -24,11 +25,20 @@ from playwright.async_api import BrowserContext, Page
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.http_client_pool import HttpClientPool
+from tools.media_downloader import stream_download
+from tools.rate_limiter import get_rate_limiter
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
 from .help import BilibiliSign
 
+# WBI 签名校验失败（风控）的错误码，遇到时丢弃缓存的签名密钥
+WBI_SIGN_ERROR_CODES = (-352,)
+# 请求被拦截/过于频繁等风控信号，遇到时降低该接口的请求速率
+THROTTLE_STATUS_CODES = (412, 429)
+THROTTLE_ERROR_CODES = (-352, -412, -509, -799)
+
 
 class BilibiliClient(AbstractApiClient):
 
@@ -43,19 +53,40 @@ class BilibiliClient(AbstractApiClient):
     ):
         self.proxy = proxy
         self.timeout = timeout
+        self.http_pool = HttpClientPool()
+        self.rate_limiter = get_rate_limiter("bili")
         self.headers = headers
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # 缓存的 WBI 签名器（包含 img_key/sub_key 和 mixin salt）及其过期时间
+        self._wbi_signer: Optional[BilibiliSign] = None
+        self._wbi_signer_expire_at = 0.0
+        self._wbi_signer_fetched_at = 0.0
+        # 过期或签名失败后只让一个请求重新获取密钥，其余请求等待并复用结果
+        self._wbi_lock = asyncio.Lock()
+
+    async def close(self):
+        """关闭 httpx 连接池"""
+        await self.http_pool.aclose()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        endpoint = self.rate_limiter.endpoint_of(url)
+        await self.rate_limiter.acquire(endpoint)
+        client = self.http_pool.get_client(self.proxy)
+        requested_at = time.monotonic()
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
         try:
             data: Dict = response.json()
         except json.JSONDecodeError:
+            self.rate_limiter.record(endpoint, throttled=response.status_code in THROTTLE_STATUS_CODES)
             utils.logger.error(f"[BilibiliClient.request] Failed to decode JSON from response. status_code: {response.status_code}, response_text: {response.text}")
             raise DataFetchError(f"Failed to decode JSON, content: {response.text}")
+        self.rate_limiter.record(
+            endpoint, throttled=response.status_code in THROTTLE_STATUS_CODES or data.get("code") in THROTTLE_ERROR_CODES
+        )
+        if data.get("code") in WBI_SIGN_ERROR_CODES:
+            self.invalidate_wbi_keys(requested_at)
         if data.get("code") != 0:
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
@@ -71,8 +102,43 @@ class BilibiliClient(AbstractApiClient):
         """
         if not req_data:
             return {}
-        img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        return (await self.get_wbi_signer()).sign(req_data)
+
+    async def get_wbi_signer(self) -> BilibiliSign:
+        """
+        获取 WBI 签名器，img_key/sub_key 在 BILI_WBI_KEYS_TTL 内复用，只有过期或签名失败后才重新获取
+        :return:
+        """
+        signer = self._valid_wbi_signer()
+        if signer is not None:
+            return signer
+        async with self._wbi_lock:
+            # 等锁期间其它请求可能已经获取了新的密钥
+            signer = self._valid_wbi_signer()
+            if signer is None:
+                img_key, sub_key = await self.get_wbi_keys()
+                signer = BilibiliSign(img_key, sub_key)
+                self._wbi_signer = signer
+                self._wbi_signer_fetched_at = time.monotonic()
+                self._wbi_signer_expire_at = self._wbi_signer_fetched_at + config.BILI_WBI_KEYS_TTL
+            return signer
+
+    def _valid_wbi_signer(self) -> Optional[BilibiliSign]:
+        if self._wbi_signer is None or time.monotonic() >= self._wbi_signer_expire_at:
+            return None
+        return self._wbi_signer
+
+    def invalidate_wbi_keys(self, requested_at: Optional[float] = None):
+        """
+        丢弃缓存的签名密钥，下次签名时重新获取
+        :param requested_at: 签名失败的请求的发出时间，密钥在这之后已经刷新过时不再丢弃
+        :return:
+        """
+        if requested_at is not None and self._wbi_signer_fetched_at > requested_at:
+            return
+        if self._wbi_signer is not None:
+            utils.logger.info("[BilibiliClient.invalidate_wbi_keys] wbi sign check failed, refresh wbi keys on next request")
+        self._wbi_signer = None
 
     async def get_wbi_keys(self) -> Tuple[str, str]:
         """
@@ -203,19 +269,32 @@ class BilibiliClient(AbstractApiClient):
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
         # Follow CDN 302 redirects and treat any 2xx as success (some endpoints return 206)
-        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=True) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-                response.raise_for_status()
-                if 200 <= response.status_code < 300:
-                    return response.content
-                utils.logger.error(
-                    f"[BilibiliClient.get_video_media] Unexpected status {response.status_code} for {url}"
-                )
-                return None
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
-                return None
+        client = self.http_pool.get_client(self.proxy)
+        try:
+            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers, follow_redirects=True)
+            response.raise_for_status()
+            if 200 <= response.status_code < 300:
+                return response.content
+            utils.logger.error(
+                f"[BilibiliClient.get_video_media] Unexpected status {response.status_code} for {url}"
+            )
+            return None
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+            return None
+
+    async def download_video_media(self, url: str, save_path: str) -> bool:
+        """
+        流式下载视频到 save_path，不在内存中缓存整个视频
+        Args:
+            url: 视频地址
+            save_path: 保存路径
+
+        Returns:
+            是否下载成功
+        """
+        client = self.http_pool.get_client(self.proxy)
+        return await stream_download(client, url, save_path, headers=self.headers, timeout=self.timeout)
 
     async def get_video_comments(
         self,
@@ -236,10 +315,12 @@ class BilibiliClient(AbstractApiClient):
     async def get_video_all_comments(
         self,
         video_id: str,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         is_fetch_sub_comments=False,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: Optional[Dict] = None,
+        cursor_callback: Optional[Callable[[Dict], None]] = None,
     ):
         """
         get video all comments include sub comments
@@ -248,12 +329,17 @@ class BilibiliClient(AbstractApiClient):
         :param is_fetch_sub_comments:
         :param callback:
         max_count: 一次笔记爬取的最大评论数量
+        cursor: 断点续爬时上次保存的翻页游标
+        cursor_callback: 每页评论交给 callback 之后调用，参数为下一页的翻页游标
 
         :return:
         """
         result = []
         is_end = False
         next_page = 0
+        if cursor:
+            next_page = cursor.get("next", 0)
+            max_count -= cursor.get("count", 0)
         max_retries = 3
         while not is_end and len(result) < max_count:
             comments_res = None
@@ -300,10 +386,11 @@ class BilibiliClient(AbstractApiClient):
                 comment_list = comment_list[:max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
                 result.extend(comment_list)
-                continue
+            if cursor_callback:
+                cursor_callback({"next": next_page, "count": (cursor or {}).get("count", 0) + len(result)})
+            await asyncio.sleep(crawl_interval)
         return result
 
     async def get_video_all_level_two_comments(
@@ -312,7 +399,7 @@ class BilibiliClient(AbstractApiClient):
         level_one_comment_id: int,
         order_mode: CommentOrderType,
         ps: int = 10,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> Dict:
         """
@@ -457,7 +544,7 @@ class BilibiliClient(AbstractApiClient):
     async def get_creator_all_fans(
         self,
         creator_info: Dict,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
         max_count: int = 100,
     ) -> List:
@@ -491,7 +578,7 @@ class BilibiliClient(AbstractApiClient):
     async def get_creator_all_followings(
         self,
         creator_info: Dict,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
         max_count: int = 100,
     ) -> List:
@@ -525,7 +612,7 @@ class BilibiliClient(AbstractApiClient):
     async def get_creator_all_dynamics(
         self,
         creator_info: Dict,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
         max_count: int = 20,
     ) -> List:
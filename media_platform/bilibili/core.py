@@ -14,8 +14,8 @@
 # @Desc    : B站爬虫
 
 import asyncio
+import functools
 import os
-# import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
@@ -32,10 +32,16 @@ from playwright._impl._errors import TargetClosedError
 
 import config
 from base.base_crawler import AbstractCrawler
+from base.crawler_settings import CrawlerSettings
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
+from store.write_behind import close_write_behind_stores
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.media_download_manager import close_media_download_manager, get_media_download_manager
+from tools.seen_index import get_seen_index
+from tools.crawler_pipeline import CrawlerPipeline
 from var import crawler_type_var, source_keyword_var
 
 from .client import BilibiliClient
@@ -50,10 +56,15 @@ class BilibiliCrawler(AbstractCrawler):
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
 
-    def __init__(self):
+    def __init__(self, settings: Optional[CrawlerSettings] = None):
+        self.settings = settings or CrawlerSettings.from_config("bili")
         self.index_url = "https://www.bilibili.com"
         self.user_agent = utils.get_user_agent()
         self.cdp_manager = None
+        self.checkpoint = get_crawl_checkpoint("bili")
+        self.seen_index = get_seen_index("bili")
+        # aid -> bvid，评论爬完后两个ID一起记入已爬取索引
+        self._video_bvids: Dict[str, str] = {}
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -76,7 +87,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info("[BilibiliCrawler] 使用标准模式启动浏览器")
                 # Launch a browser context.
                 chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(chromium, None, self.user_agent, headless=config.HEADLESS)
+                self.browser_context = await self.launch_browser(chromium, None, self.user_agent, headless=self.settings.headless)
             # stealth.min.js is a js script to prevent the website from detecting the crawler.
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
             self.context_page = await self.browser_context.new_page()
@@ -86,27 +97,27 @@ class BilibiliCrawler(AbstractCrawler):
             self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
             if not await self.bili_client.pong():
                 login_obj = BilibiliLogin(
-                    login_type=config.LOGIN_TYPE,
+                    login_type=self.settings.login_type,
                     login_phone="",  # your phone number
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES,
+                    cookie_str=self.settings.cookies,
                 )
                 await login_obj.begin()
                 await self.bili_client.update_cookies(browser_context=self.browser_context)
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
+            crawler_type_var.set(self.settings.crawler_type)
+            if self.settings.crawler_type == "search":
                 await self.search()
-            elif config.CRAWLER_TYPE == "detail":
+            elif self.settings.crawler_type == "detail":
                 # Get the information and comments of the specified post
-                await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
-            elif config.CRAWLER_TYPE == "creator":
+                await self.get_specified_videos(self.settings.specified_id_list)
+            elif self.settings.crawler_type == "creator":
                 if config.CREATOR_MODE:
-                    for creator_id in config.BILI_CREATOR_ID_LIST:
+                    for creator_id in self.settings.creator_id_list:
                         await self.get_creator_videos(int(creator_id))
                 else:
-                    await self.get_all_creator_details(config.BILI_CREATOR_ID_LIST)
+                    await self.get_all_creator_details(self.settings.creator_id_list)
             else:
                 pass
             utils.logger.info("[BilibiliCrawler.start] Bilibili Crawler finished ...")
@@ -161,59 +172,93 @@ class BilibiliCrawler(AbstractCrawler):
     async def search_by_keywords(self):
         """
         search bilibili video with keywords in normal mode
+        搜索、详情、媒体下载、评论四个阶段组成流水线，下一页搜索、详情获取和评论翻页可以同时进行
         :return:
         """
         utils.logger.info("[BilibiliCrawler.search_by_keywords] Begin search bilibli keywords")
         bili_limit_count = 20  # bilibili limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
+        if self.settings.max_notes_count < bili_limit_count:
+            self.settings = self.settings._replace(max_notes_count=bili_limit_count)
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
+
+        pipeline = CrawlerPipeline("bilibili_search", metrics_interval=config.BILI_PIPELINE_METRICS_INTERVAL)
+        detail_semaphore = asyncio.Semaphore(config.BILI_PIPELINE_DETAIL_CONCURRENCY)
+        media_semaphore = asyncio.Semaphore(config.BILI_PIPELINE_MEDIA_CONCURRENCY)
+        comment_semaphore = asyncio.Semaphore(config.BILI_PIPELINE_COMMENT_CONCURRENCY)
+
+        async def handle_detail(job: Tuple[str, int]):
+            keyword, aid = job
             source_keyword_var.set(keyword)
-            utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Skip page: {page}")
-                    page += 1
-                    continue
-
-                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] search bilibili keyword: {keyword}, page: {page}")
-                video_id_list: List[str] = []
-                videos_res = await self.bili_client.search_video_by_keyword(
-                    keyword=keyword,
-                    page=page,
-                    page_size=bili_limit_count,
-                    order=SearchOrderType.DEFAULT,
-                    pubtime_begin_s=0,  # 作品发布日期起始时间戳
-                    pubtime_end_s=0,  # 作品发布日期结束日期时间戳
-                )
-                video_list: List[Dict] = videos_res.get("result")
+            if self.checkpoint.is_item_done(aid):
+                # 断点续爬：详情已保存，只需补上未爬完的评论
+                if self.settings.enable_get_comments:
+                    await comment_stage.put((keyword, aid))
+                else:
+                    self.mark_video_seen(aid)
+                return
+            video_item = await self.get_video_info_task(aid=aid, bvid="", semaphore=detail_semaphore)
+            if not video_item:
+                return
+            await bilibili_store.update_bilibili_video(video_item)
+            await bilibili_store.update_up_info(video_item)
+            self.checkpoint.mark_item_done(aid)
+            if config.ENABLE_GET_MEIDAS:
+                await media_stage.put(video_item)
+            if self.settings.enable_get_comments:
+                await comment_stage.put((keyword, video_item.get("View").get("aid")))
+            else:
+                self.mark_video_seen(aid)
 
-                if not video_list:
-                    utils.logger.info(f"[BilibiliCrawler.search_by_keywords] No more videos for '{keyword}', moving to next keyword.")
-                    break
+        async def handle_media(video_item: Dict):
+            await self.get_bilibili_video(video_item, media_semaphore)
+
+        async def handle_comments(job: Tuple[str, int]):
+            keyword, video_id = job
+            source_keyword_var.set(keyword)
+            await self.get_comments(video_id, comment_semaphore)
+
+        detail_stage = pipeline.add_stage(
+            "detail", handle_detail, config.BILI_PIPELINE_DETAIL_CONCURRENCY, config.BILI_PIPELINE_QUEUE_SIZE
+        )
+        media_stage = pipeline.add_stage(
+            "media", handle_media, config.BILI_PIPELINE_MEDIA_CONCURRENCY, config.BILI_PIPELINE_QUEUE_SIZE
+        )
+        comment_stage = pipeline.add_stage(
+            "comments", handle_comments, config.BILI_PIPELINE_COMMENT_CONCURRENCY, config.BILI_PIPELINE_QUEUE_SIZE
+        )
+
+        async def produce_search_results():
+            for keyword in self.settings.keywords.split(","):
+                source_keyword_var.set(keyword)
+                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
+                page = 1
+                while (page - start_page + 1) * bili_limit_count <= self.settings.max_notes_count:
+                    if page < start_page:
+                        utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Skip page: {page}")
+                        page += 1
+                        continue
+
+                    utils.logger.info(f"[BilibiliCrawler.search_by_keywords] search bilibili keyword: {keyword}, page: {page}")
+                    videos_res = await self.bili_client.search_video_by_keyword(
+                        keyword=keyword,
+                        page=page,
+                        page_size=bili_limit_count,
+                        order=SearchOrderType.DEFAULT,
+                        pubtime_begin_s=0,  # 作品发布日期起始时间戳
+                        pubtime_end_s=0,  # 作品发布日期结束日期时间戳
+                    )
+                    video_list: List[Dict] = videos_res.get("result")
+
+                    if not video_list:
+                        utils.logger.info(f"[BilibiliCrawler.search_by_keywords] No more videos for '{keyword}', moving to next keyword.")
+                        break
+
+                    for video_item in video_list:
+                        if video_item.get("aid"):
+                            await detail_stage.put((keyword, video_item.get("aid")))
+                    page += 1
 
-                semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                task_list = []
-                try:
-                    task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                except Exception as e:
-                    utils.logger.warning(f"[BilibiliCrawler.search_by_keywords] error in the task list. The video for this page will not be included. {e}")
-                video_items = await asyncio.gather(*task_list)
-                for video_item in video_items:
-                    if video_item:
-                        video_id_list.append(video_item.get("View").get("aid"))
-                        await bilibili_store.update_bilibili_video(video_item)
-                        await bilibili_store.update_up_info(video_item)
-                        await self.get_bilibili_video(video_item, semaphore)
-                page += 1
-                
-                # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-                
-                await self.batch_get_video_comments(video_id_list)
+        await pipeline.run(produce_search_results())
 
     async def search_by_keywords_in_time_range(self, daily_limit: bool):
         """
@@ -224,17 +269,17 @@ class BilibiliCrawler(AbstractCrawler):
         bili_limit_count = 20
         start_page = config.START_PAGE
 
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in self.settings.keywords.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Current search keyword: {keyword}")
             total_notes_crawled_for_keyword = 0
 
             for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq="D"):
-                if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                if (daily_limit and total_notes_crawled_for_keyword >= self.settings.max_notes_count):
                     utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
                     break
 
-                if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                if (not daily_limit and total_notes_crawled_for_keyword >= self.settings.max_notes_count):
                     utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
                     break
 
@@ -246,10 +291,10 @@ class BilibiliCrawler(AbstractCrawler):
                     if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
                         utils.logger.info(f"[BilibiliCrawler.search] Reached MAX_NOTES_PER_DAY limit for {day.ctime()}.")
                         break
-                    if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                    if (daily_limit and total_notes_crawled_for_keyword >= self.settings.max_notes_count):
                         utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}'.")
                         break
-                    if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                    if (not daily_limit and total_notes_crawled_for_keyword >= self.settings.max_notes_count):
                         break
 
                     try:
@@ -275,9 +320,9 @@ class BilibiliCrawler(AbstractCrawler):
 
                         for video_item in video_items:
                             if video_item:
-                                if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                                if (daily_limit and total_notes_crawled_for_keyword >= self.settings.max_notes_count):
                                     break
-                                if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                                if (not daily_limit and total_notes_crawled_for_keyword >= self.settings.max_notes_count):
                                     break
                                 if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
                                     break
@@ -290,10 +335,6 @@ class BilibiliCrawler(AbstractCrawler):
 
                         page += 1
                         
-                        # Sleep after page navigation
-                        await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                        utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-                        
                         await self.batch_get_video_comments(video_id_list)
 
                     except Exception as e:
@@ -306,8 +347,10 @@ class BilibiliCrawler(AbstractCrawler):
         :param video_id_list:
         :return:
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not self.settings.enable_get_comments:
             utils.logger.info(f"[BilibiliCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
+            for video_id in video_id_list:
+                self.mark_video_seen(video_id)
             return
 
         utils.logger.info(f"[BilibiliCrawler.batch_get_video_comments] video ids:{video_id_list}")
@@ -325,18 +368,23 @@ class BilibiliCrawler(AbstractCrawler):
         :param semaphore:
         :return:
         """
+        if self.checkpoint.is_comments_done(video_id):
+            utils.logger.info(f"[BilibiliCrawler.get_comments] video_id: {video_id} comments already crawled, skip")
+            self.mark_video_seen(video_id)
+            return
         async with semaphore:
             try:
                 utils.logger.info(f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching comments for video {video_id}")
                 await self.bili_client.get_video_all_comments(
                     video_id=video_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
                     callback=bilibili_store.batch_update_bilibili_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                    cursor=self.checkpoint.get_comment_cursor(video_id),
+                    cursor_callback=functools.partial(self.checkpoint.save_comment_cursor, video_id),
                 )
+                self.checkpoint.mark_comments_done(video_id)
+                self.mark_video_seen(video_id)
 
             except DataFetchError as ex:
                 utils.logger.error(f"[BilibiliCrawler.get_comments] get video_id: {video_id} comment error: {ex}")
@@ -345,6 +393,10 @@ class BilibiliCrawler(AbstractCrawler):
                 # Propagate the exception to be caught by the main loop
                 raise
 
+    def mark_video_seen(self, aid):
+        """视频的详情和评论都处理完后记入已爬取索引，aid 和 bvid 一起记录"""
+        self.seen_index.mark_content_seen(aid, self._video_bvids.pop(str(aid), ""), source=source_keyword_var.get())
+
     async def get_creator_videos(self, creator_id: int):
         """
         get videos for a creator
@@ -358,8 +410,6 @@ class BilibiliCrawler(AbstractCrawler):
             await self.get_specified_videos(video_bvids_list)
             if int(result["page"]["count"]) <= pn * ps:
                 break
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[BilibiliCrawler.get_creator_videos] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {pn}")
             pn += 1
 
     async def get_specified_videos(self, bvids_list: List[str]):
@@ -390,14 +440,15 @@ class BilibiliCrawler(AbstractCrawler):
         :param semaphore:
         :return:
         """
+        if self.seen_index.is_content_fresh(aid or bvid, source_keyword_var.get(), self.checkpoint.is_comments_pending(aid or bvid)):
+            utils.logger.info(f"[BilibiliCrawler.get_video_info_task] video {aid or bvid} crawled recently, skip")
+            return None
         async with semaphore:
             try:
                 result = await self.bili_client.get_video_info(aid=aid, bvid=bvid)
-                
-                # Sleep after fetching video details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.get_video_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {bvid or aid}")
-                
+                video_view: Dict = result.get("View") or {}
+                if video_view.get("aid"):
+                    self._video_bvids[str(video_view.get("aid"))] = video_view.get("bvid", "")
                 return result
             except DataFetchError as ex:
                 utils.logger.error(f"[BilibiliCrawler.get_video_info_task] Get video detail error: {ex}")
@@ -466,7 +517,7 @@ class BilibiliCrawler(AbstractCrawler):
         if config.SAVE_LOGIN_STATE:
             # feat issue #14
             # we will save login state to avoid login every time
-            user_data_dir = os.path.join(os.getcwd(), "browser_data", config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+            user_data_dir = os.path.join(os.getcwd(), "browser_data", config.USER_DATA_DIR % self.settings.platform)  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -496,7 +547,7 @@ class BilibiliCrawler(AbstractCrawler):
         使用CDP模式启动浏览器
         """
         try:
-            self.cdp_manager = CDPBrowserManager()
+            self.cdp_manager = CDPBrowserManager(self.settings.platform)
             browser_context = await self.cdp_manager.launch_and_connect(
                 playwright=playwright,
                 playwright_proxy=playwright_proxy,
@@ -517,13 +568,19 @@ class BilibiliCrawler(AbstractCrawler):
             return await self.launch_browser(chromium, playwright_proxy, user_agent, headless)
 
     async def close(self):
-        """Close browser context"""
+        """Flush stores, close api client and browser context"""
+        # 等待后台媒体下载完成，下载使用 API 客户端的连接池，需要在客户端关闭之前完成
+        await close_media_download_manager("bili")
+        # 写完存储队列中剩余的数据
+        await close_write_behind_stores(self.settings.platform)
+        if getattr(self, "bili_client", None):
+            await self.bili_client.close()
         try:
             # 如果使用CDP模式，需要特殊处理
             if self.cdp_manager:
                 await self.cdp_manager.cleanup()
                 self.cdp_manager = None
-            elif self.browser_context:
+            elif getattr(self, "browser_context", None):
                 await self.browser_context.close()
             utils.logger.info("[BilibiliCrawler.close] Browser context closed ...")
         except TargetClosedError:
@@ -560,13 +617,11 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video url failed")
             return
 
-        content = await self.bili_client.get_video_media(video_url)
-        await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-        utils.logger.info(f"[BilibiliCrawler.get_bilibili_video] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video {aid}")
-        if content is None:
-            return
         extension_file_name = f"video.mp4"
-        await bilibili_store.store_video(aid, content, extension_file_name)
+        save_path = bilibili_store.get_video_save_path(aid, extension_file_name)
+        await get_media_download_manager("bili").submit(
+            video_url, save_path, functools.partial(self.bili_client.download_video_media, video_url)
+        )
 
     async def get_all_creator_details(self, creator_id_list: List[int]):
         """
@@ -618,7 +673,6 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.get_fans] begin get creator_id: {creator_id} fans ...")
                 await self.bili_client.get_creator_all_fans(
                     creator_info=creator_info,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
                     callback=bilibili_store.batch_update_bilibili_creator_fans,
                     max_count=config.CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES,
                 )
@@ -641,7 +695,6 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.get_followings] begin get creator_id: {creator_id} followings ...")
                 await self.bili_client.get_creator_all_followings(
                     creator_info=creator_info,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
                     callback=bilibili_store.batch_update_bilibili_creator_followings,
                     max_count=config.CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES,
                 )
@@ -664,7 +717,6 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.get_dynamics] begin get creator_id: {creator_id} dynamics ...")
                 await self.bili_client.get_creator_all_dynamics(
                     creator_info=creator_info,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
                     callback=bilibili_store.batch_update_bilibili_creator_dynamics,
                     max_count=config.CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES,
                 )
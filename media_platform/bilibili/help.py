@@ -31,17 +31,21 @@ class BilibiliSign:
             61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
             36, 20, 34, 44, 52
         ]
+        self._salt = ""
 
     def get_salt(self) -> str:
         """
-        获取加盐的 key
+        获取加盐的 key，img_key / sub_key 不变时结果固定，计算一次后缓存
         :return:
         """
+        if self._salt:
+            return self._salt
         salt = ""
         mixin_key = self.img_key + self.sub_key
         for mt in self.map_table:
             salt += mixin_key[mt]
-        return salt[:32]
+        self._salt = salt[:32]
+        return self._salt
 
     def sign(self, req_data: Dict) -> Dict:
         """
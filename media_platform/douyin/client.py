@@ -19,6 +19,9 @@ from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.http_client_pool import HttpClientPool
+from tools.media_downloader import stream_download
+from tools.rate_limiter import get_rate_limiter
 from var import request_keyword_var
 
 from .exception import *
@@ -39,6 +42,8 @@ class DouYinClient(AbstractApiClient):
     ):
         self.proxy = proxy
         self.timeout = timeout
+        self.http_pool = HttpClientPool()
+        self.rate_limiter = get_rate_limiter("dy")
         self.headers = headers
         self._host = "https://www.douyin.com"
         self.playwright_page = playwright_page
@@ -94,9 +99,16 @@ class DouYinClient(AbstractApiClient):
         a_bogus = await get_a_bogus(uri, query_string, post_data, headers["User-Agent"], self.playwright_page)
         params["a_bogus"] = a_bogus
 
+    async def close(self):
+        """关闭 httpx 连接池"""
+        await self.http_pool.aclose()
+
     async def request(self, method, url, **kwargs):
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        endpoint = self.rate_limiter.endpoint_of(url)
+        await self.rate_limiter.acquire(endpoint)
+        client = self.http_pool.get_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        self.rate_limiter.record(endpoint, throttled=response.status_code == 429 or response.text in ("", "blocked"))
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
@@ -218,7 +230,7 @@ class DouYinClient(AbstractApiClient):
     async def get_aweme_all_comments(
         self,
         aweme_id: str,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         is_fetch_sub_comments=False,
         callback: Optional[Callable] = None,
         max_count: int = 10,
@@ -312,15 +324,28 @@ class DouYinClient(AbstractApiClient):
         return result
 
     async def get_aweme_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, follow_redirects=True)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[DouYinClient.get_aweme_media] request {url} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+        client = self.http_pool.get_client(self.proxy)
+        try:
+            response = await client.request("GET", url, timeout=self.timeout, follow_redirects=True)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
+                utils.logger.error(f"[DouYinClient.get_aweme_media] request {url} err, res:{response.text}")
                 return None
+            else:
+                return response.content
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+            return None
+
+    async def download_aweme_media(self, url: str, save_path: str) -> bool:
+        """
+        流式下载作品图片/视频到 save_path
+        Args:
+            url: 媒体地址
+            save_path: 保存路径
+
+        Returns:
+            是否下载成功
+        """
+        client = self.http_pool.get_client(self.proxy)
+        return await stream_download(client, url, save_path, timeout=self.timeout)
@@ -20,7 +20,13 @@ import random
 import execjs
 from playwright.async_api import Page
 
-douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
+import config
+from tools.js_worker import get_js_worker_pool
+
+DOUYIN_SIGN_JS_PATH = "libs/douyin.js"
+# 签名 js 在第一次使用时才编译，避免只爬取其他平台时也要付出编译开销
+DOUYIN_SIGN_JS = None
+
 
 def get_web_id():
     """
@@ -48,11 +54,21 @@ async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, p
     """
     获取 a_bogus 参数, 目前不支持post请求类型的签名
     """
+    if config.ENABLE_JS_SIGN_WORKER:
+        return await get_js_worker_pool(DOUYIN_SIGN_JS_PATH).call(get_sign_js_name(url), params, user_agent)
     return get_a_bogus_from_js(url, params, user_agent)
 
+
+def get_sign_js_name(url: str) -> str:
+    """评论接口和其他接口使用不同的签名参数"""
+    if "/reply" in url:
+        return "sign_reply"
+    return "sign_datail"
+
+
 def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     """
-    通过js获取 a_bogus 参数
+    通过js获取 a_bogus 参数（execjs，每次调用都会启动一个 Node.js 进程）
     Args:
         url:
         params:
@@ -61,10 +77,11 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     Returns:
 
     """
-    sign_js_name = "sign_datail"
-    if "/reply" in url:
-        sign_js_name = "sign_reply"
-    return douyin_sign_obj.call(sign_js_name, params, user_agent)
+    global DOUYIN_SIGN_JS
+    if not DOUYIN_SIGN_JS:
+        with open(DOUYIN_SIGN_JS_PATH, mode="r", encoding="utf-8-sig") as f:
+            DOUYIN_SIGN_JS = execjs.compile(f.read())
+    return DOUYIN_SIGN_JS.call(get_sign_js_name(url), params, user_agent)
 
 
 
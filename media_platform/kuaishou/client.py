@@ -21,6 +21,9 @@ from playwright.async_api import BrowserContext, Page
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.http_client_pool import HttpClientPool
+from tools.circuit_breaker import CircuitBreaker
+from tools.rate_limiter import get_rate_limiter
 
 from .exception import DataFetchError
 from .graphql import KuaiShouGraphQL
@@ -38,15 +41,27 @@ class KuaiShouClient(AbstractApiClient):
     ):
         self.proxy = proxy
         self.timeout = timeout
+        self.http_pool = HttpClientPool()
+        self.rate_limiter = get_rate_limiter("ks")
         self.headers = headers
         self._host = "https://www.kuaishou.com/graphql"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
         self.graphql = KuaiShouGraphQL()
+        # 疑似被封禁时暂停快手的所有请求，冷却后刷新一次 cookies
+        self.circuit_breaker = CircuitBreaker("ks", on_recover=self.refresh_cookies)
+
+    async def close(self):
+        """关闭 httpx 连接池"""
+        await self.http_pool.aclose()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        await self.circuit_breaker.wait_closed()
+        endpoint = self.rate_limiter.endpoint_of(url)
+        await self.rate_limiter.acquire(endpoint)
+        client = self.http_pool.get_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        self.rate_limiter.record(endpoint, throttled=response.status_code == 429)
         data: Dict = response.json()
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
@@ -94,6 +109,11 @@ class KuaiShouClient(AbstractApiClient):
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
 
+    async def refresh_cookies(self):
+        """重新打开首页并更新 cookies，熔断恢复时调用"""
+        await self.playwright_page.goto("https://www.kuaishou.com?isHome=1")
+        await self.update_cookies(browser_context=self.playwright_page.context)
+
     async def search_info_by_keyword(
         self, keyword: str, pcursor: str, search_session_id: str = ""
     ):
@@ -180,9 +200,11 @@ class KuaiShouClient(AbstractApiClient):
     async def get_video_all_comments(
         self,
         photo_id: str,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: Optional[Dict] = None,
+        cursor_callback: Optional[Callable[[Dict], None]] = None,
     ):
         """
         get video all comments include sub comments
@@ -190,11 +212,16 @@ class KuaiShouClient(AbstractApiClient):
         :param crawl_interval:
         :param callback:
         :param max_count:
+        :param cursor: 上次中断时保存的翻页游标，从该位置继续爬取
+        :param cursor_callback: 每页评论（含子评论）交给 callback 之后调用，参数为下一页的翻页游标
         :return:
         """
 
         result = []
         pcursor = ""
+        if cursor:
+            pcursor = cursor.get("pcursor", "")
+            max_count -= cursor.get("count", 0)
 
         while pcursor != "no_more" and len(result) < max_count:
             comments_res = await self.get_video_comments(photo_id, pcursor)
@@ -211,13 +238,15 @@ class KuaiShouClient(AbstractApiClient):
                 comments, photo_id, crawl_interval, callback
             )
             result.extend(sub_comments)
+            if cursor_callback:
+                cursor_callback({"pcursor": pcursor, "count": (cursor or {}).get("count", 0) + len(result)})
         return result
 
     async def get_comments_all_sub_comments(
         self,
         comments: List[Dict],
         photo_id,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
@@ -275,7 +304,7 @@ class KuaiShouClient(AbstractApiClient):
     async def get_all_videos_by_creator(
         self,
         user_id: str,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
@@ -11,8 +11,6 @@
 
 import asyncio
 import os
-# import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
-import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -23,13 +21,18 @@ from playwright.async_api import (
     Playwright,
     async_playwright,
 )
+from playwright._impl._errors import TargetClosedError
 
 import config
 from base.base_crawler import AbstractCrawler
+from base.crawler_settings import CrawlerSettings
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
+from store.write_behind import close_write_behind_stores
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.seen_index import get_seen_index
 from var import comment_tasks_var, crawler_type_var, source_keyword_var
 
 from .client import KuaiShouClient
@@ -43,10 +46,13 @@ class KuaishouCrawler(AbstractCrawler):
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
 
-    def __init__(self):
+    def __init__(self, settings: Optional[CrawlerSettings] = None):
+        self.settings = settings or CrawlerSettings.from_config("ks")
         self.index_url = "https://www.kuaishou.com"
         self.user_agent = utils.get_user_agent()
         self.cdp_manager = None
+        self.checkpoint = get_crawl_checkpoint("ks")
+        self.seen_index = get_seen_index("ks")
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -74,7 +80,7 @@ class KuaishouCrawler(AbstractCrawler):
                 # Launch a browser context.
                 chromium = playwright.chromium
                 self.browser_context = await self.launch_browser(
-                    chromium, None, self.user_agent, headless=config.HEADLESS
+                    chromium, None, self.user_agent, headless=self.settings.headless
                 )
             # stealth.min.js is a js script to prevent the website from detecting the crawler.
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
@@ -85,25 +91,25 @@ class KuaishouCrawler(AbstractCrawler):
             self.ks_client = await self.create_ks_client(httpx_proxy_format)
             if not await self.ks_client.pong():
                 login_obj = KuaishouLogin(
-                    login_type=config.LOGIN_TYPE,
+                    login_type=self.settings.login_type,
                     login_phone=httpx_proxy_format,
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES,
+                    cookie_str=self.settings.cookies,
                 )
                 await login_obj.begin()
                 await self.ks_client.update_cookies(
                     browser_context=self.browser_context
                 )
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
+            crawler_type_var.set(self.settings.crawler_type)
+            if self.settings.crawler_type == "search":
                 # Search for videos and retrieve their comment information.
                 await self.search()
-            elif config.CRAWLER_TYPE == "detail":
+            elif self.settings.crawler_type == "detail":
                 # Get the information and comments of the specified post
                 await self.get_specified_videos()
-            elif config.CRAWLER_TYPE == "creator":
+            elif self.settings.crawler_type == "creator":
                 # Get creator's information and their videos and comments
                 await self.get_creators_and_videos()
             else:
@@ -114,10 +120,10 @@ class KuaishouCrawler(AbstractCrawler):
     async def search(self):
         utils.logger.info("[KuaishouCrawler.search] Begin search kuaishou keywords")
         ks_limit_count = 20  # kuaishou limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
+        if self.settings.max_notes_count < ks_limit_count:
+            self.settings = self.settings._replace(max_notes_count=ks_limit_count)
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in self.settings.keywords.split(","):
             search_session_id = ""
             source_keyword_var.set(keyword)
             utils.logger.info(
@@ -126,11 +132,15 @@ class KuaishouCrawler(AbstractCrawler):
             page = 1
             while (
                 page - start_page + 1
-            ) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            ) * ks_limit_count <= self.settings.max_notes_count:
                 if page < start_page:
                     utils.logger.info(f"[KuaishouCrawler.search] Skip page: {page}")
                     page += 1
                     continue
+                if self.checkpoint.is_page_done(keyword, page):
+                    utils.logger.info(f"[KuaishouCrawler.search] Skip crawled page: {page}")
+                    page += 1
+                    continue
                 utils.logger.info(
                     f"[KuaishouCrawler.search] search kuaishou keyword: {keyword}, page: {page}"
                 )
@@ -158,39 +168,33 @@ class KuaishouCrawler(AbstractCrawler):
                     await kuaishou_store.update_kuaishou_video(video_item=video_detail)
 
                 # batch fetch video comments
-                page += 1
-                
-                # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-                
                 await self.batch_get_video_comments(video_id_list)
+                self.checkpoint.mark_page_done(keyword, page)
+                page += 1
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_video_info_task(video_id=video_id, semaphore=semaphore)
-            for video_id in config.KS_SPECIFIED_ID_LIST
+            for video_id in self.settings.specified_id_list
         ]
         video_details = await asyncio.gather(*task_list)
         for video_detail in video_details:
             if video_detail is not None:
                 await kuaishou_store.update_kuaishou_video(video_detail)
-        await self.batch_get_video_comments(config.KS_SPECIFIED_ID_LIST)
+        await self.batch_get_video_comments(self.settings.specified_id_list)
 
     async def get_video_info_task(
         self, video_id: str, semaphore: asyncio.Semaphore
     ) -> Optional[Dict]:
         """Get video detail task"""
+        if self.seen_index.is_content_fresh(video_id, source_keyword_var.get(), self.checkpoint.is_comments_pending(video_id)):
+            utils.logger.info(f"[KuaishouCrawler.get_video_info_task] video_id: {video_id} crawled recently, skip")
+            return None
         async with semaphore:
             try:
                 result = await self.ks_client.get_video_info(video_id)
-                
-                # Sleep after fetching video details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.get_video_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {video_id}")
-                
                 utils.logger.info(
                     f"[KuaishouCrawler.get_video_info_task] Get video_id:{video_id} info result: {result} ..."
                 )
@@ -212,10 +216,12 @@ class KuaishouCrawler(AbstractCrawler):
         :param video_id_list:
         :return:
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not self.settings.enable_get_comments:
             utils.logger.info(
                 f"[KuaishouCrawler.batch_get_video_comments] Crawling comment mode is not enabled"
             )
+            for video_id in video_id_list:
+                self.seen_index.mark_content_seen(video_id, source=source_keyword_var.get())
             return
 
         utils.logger.info(
@@ -239,40 +245,48 @@ class KuaishouCrawler(AbstractCrawler):
         :param semaphore:
         :return:
         """
+        if self.checkpoint.is_comments_done(video_id):
+            utils.logger.info(f"[KuaishouCrawler.get_comments] video_id: {video_id} comments already crawled, skip")
+            self.seen_index.mark_content_seen(video_id, source=source_keyword_var.get())
+            return
         async with semaphore:
-            try:
-                utils.logger.info(
-                    f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
-                )
-                
-                # Sleep before fetching comments
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for video {video_id}")
-                
-                await self.ks_client.get_video_all_comments(
-                    photo_id=video_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
-                    callback=kuaishou_store.batch_update_ks_video_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}"
-                )
-            except Exception as e:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}"
-                )
-                # use time.sleeep block main coroutine instead of asyncio.sleep and cacel running comment task
-                # maybe kuaishou block our request, we will take a nap and update the cookie again
-                current_running_tasks = comment_tasks_var.get()
-                for task in current_running_tasks:
-                    task.cancel()
-                time.sleep(20)
-                await self.context_page.goto(f"{self.index_url}?isHome=1")
-                await self.ks_client.update_cookies(
-                    browser_context=self.browser_context
-                )
+            cursor = self.checkpoint.get_comment_cursor(video_id)
+
+            def save_cursor(next_cursor: Dict):
+                nonlocal cursor
+                cursor = next_cursor
+                self.checkpoint.save_comment_cursor(video_id, next_cursor)
+
+            for _ in range(config.CRAWLER_CIRCUIT_BREAKER_MAX_RESUMES + 1):
+                try:
+                    utils.logger.info(
+                        f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
+                    )
+                    await self.ks_client.get_video_all_comments(
+                        photo_id=video_id,
+                        callback=kuaishou_store.batch_update_ks_video_comments,
+                        max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                        cursor=cursor,
+                        cursor_callback=save_cursor,
+                    )
+                    self.checkpoint.mark_comments_done(video_id)
+                    self.seen_index.mark_content_seen(video_id, source=source_keyword_var.get())
+                    return
+                except DataFetchError as ex:
+                    utils.logger.error(
+                        f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}"
+                    )
+                    return
+                except Exception as e:
+                    utils.logger.error(
+                        f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}"
+                    )
+                    # 熔断只暂停快手的请求（其他评论任务也会在发请求前等待），恢复后从中断的翻页游标继续
+                    await self.ks_client.circuit_breaker.trip(str(e))
+            utils.logger.error(
+                f"[KuaishouCrawler.get_comments] video_id: {video_id} still blocked after "
+                f"{config.CRAWLER_CIRCUIT_BREAKER_MAX_RESUMES} resumes, skip"
+            )
 
     async def create_ks_client(self, httpx_proxy: Optional[str]) -> KuaiShouClient:
         """Create ks client"""
@@ -309,7 +323,7 @@ class KuaishouCrawler(AbstractCrawler):
         )
         if config.SAVE_LOGIN_STATE:
             user_data_dir = os.path.join(
-                os.getcwd(), "browser_data", config.USER_DATA_DIR % config.PLATFORM
+                os.getcwd(), "browser_data", config.USER_DATA_DIR % self.settings.platform
             )  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
@@ -338,7 +352,7 @@ class KuaishouCrawler(AbstractCrawler):
         使用CDP模式启动浏览器
         """
         try:
-            self.cdp_manager = CDPBrowserManager()
+            self.cdp_manager = CDPBrowserManager(self.settings.platform)
             browser_context = await self.cdp_manager.launch_and_connect(
                 playwright=playwright,
                 playwright_proxy=playwright_proxy,
@@ -367,7 +381,7 @@ class KuaishouCrawler(AbstractCrawler):
         utils.logger.info(
             "[KuaiShouCrawler.get_creators_and_videos] Begin get kuaishou creators"
         )
-        for user_id in config.KS_CREATOR_ID_LIST:
+        for user_id in self.settings.creator_id_list:
             # get creator detail info from web html content
             createor_info: Dict = await self.ks_client.get_creator_info(user_id=user_id)
             if createor_info:
@@ -376,7 +390,6 @@ class KuaishouCrawler(AbstractCrawler):
             # Get all video information of the creator
             all_video_list = await self.ks_client.get_all_videos_by_creator(
                 user_id=user_id,
-                crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
                 callback=self.fetch_creator_video_detail,
             )
 
@@ -401,11 +414,20 @@ class KuaishouCrawler(AbstractCrawler):
                 await kuaishou_store.update_kuaishou_video(video_detail)
 
     async def close(self):
-        """Close browser context"""
-        # 如果使用CDP模式，需要特殊处理
-        if self.cdp_manager:
-            await self.cdp_manager.cleanup()
-            self.cdp_manager = None
-        else:
-            await self.browser_context.close()
-        utils.logger.info("[KuaishouCrawler.close] Browser context closed ...")
+        """Flush stores, close api client and browser context"""
+        # 写完存储队列中剩余的数据
+        await close_write_behind_stores(self.settings.platform)
+        if getattr(self, "ks_client", None):
+            await self.ks_client.close()
+        try:
+            # 如果使用CDP模式，需要特殊处理
+            if self.cdp_manager:
+                await self.cdp_manager.cleanup()
+                self.cdp_manager = None
+            elif getattr(self, "browser_context", None):
+                await self.browser_context.close()
+            utils.logger.info("[KuaishouCrawler.close] Browser context closed ...")
+        except TargetClosedError:
+            utils.logger.warning("[KuaishouCrawler.close] Browser context was already closed.")
+        except Exception as e:
+            utils.logger.error(f"[KuaishouCrawler.close] An error occurred during close: {e}")
@@ -22,6 +22,8 @@ from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
 from tools import utils
+from tools.http_client_pool import HttpClientPool
+from tools.rate_limiter import get_rate_limiter
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
@@ -37,6 +39,8 @@ class BaiduTieBaClient(AbstractApiClient):
     ):
         self.ip_pool: Optional[ProxyIpPool] = ip_pool
         self.timeout = timeout
+        self.http_pool = HttpClientPool()
+        self.rate_limiter = get_rate_limiter("tieba")
         self.headers = {
             "User-Agent": utils.get_user_agent(),
             "Cookies": "",
@@ -45,6 +49,10 @@ class BaiduTieBaClient(AbstractApiClient):
         self._page_extractor = TieBaExtractor()
         self.default_ip_proxy = default_ip_proxy
 
+    async def close(self):
+        """关闭 httpx 连接池"""
+        await self.http_pool.aclose()
+
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, return_ori_content=False, proxy=None, **kwargs) -> Union[str, Any]:
         """
@@ -60,8 +68,13 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         actual_proxy = proxy if proxy else self.default_ip_proxy
-        async with httpx.AsyncClient(proxy=actual_proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, headers=self.headers, **kwargs)
+        endpoint = self.rate_limiter.endpoint_of(url)
+        await self.rate_limiter.acquire(endpoint)
+        client = self.http_pool.get_client(actual_proxy)
+        response = await client.request(method, url, timeout=self.timeout, headers=self.headers, **kwargs)
+        self.rate_limiter.record(
+            endpoint, throttled=response.status_code in (403, 429) or response.text in ("", "blocked")
+        )
 
         if response.status_code != 200:
             utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
@@ -198,7 +211,7 @@ class BaiduTieBaClient(AbstractApiClient):
     async def get_note_all_comments(
         self,
         note_detail: TiebaNote,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
     ) -> List[TiebaComment]:
@@ -237,7 +250,7 @@ class BaiduTieBaClient(AbstractApiClient):
     async def get_comments_all_sub_comments(
         self,
         comments: List[TiebaComment],
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[TiebaComment]:
         """
@@ -332,7 +345,7 @@ class BaiduTieBaClient(AbstractApiClient):
     async def get_all_notes_by_creator_user_name(
         self,
         user_name: str,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
         max_note_count: int = 0,
         creator_page_html_content: str = None,
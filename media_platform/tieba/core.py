@@ -11,7 +11,6 @@
 
 import asyncio
 import os
-# import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -22,14 +21,18 @@ from playwright.async_api import (
     Playwright,
     async_playwright,
 )
+from playwright._impl._errors import TargetClosedError
 
 import config
 from base.base_crawler import AbstractCrawler
+from base.crawler_settings import CrawlerSettings
 from model.m_baidu_tieba import TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import tieba as tieba_store
+from store.write_behind import close_write_behind_stores
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_checkpoint import get_crawl_checkpoint
 from var import crawler_type_var, source_keyword_var
 
 from .client import BaiduTieBaClient
@@ -44,11 +47,13 @@ class TieBaCrawler(AbstractCrawler):
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
 
-    def __init__(self) -> None:
+    def __init__(self, settings: Optional[CrawlerSettings] = None) -> None:
+        self.settings = settings or CrawlerSettings.from_config("tieba")
         self.index_url = "https://tieba.baidu.com"
         self.user_agent = utils.get_user_agent()
         self._page_extractor = TieBaExtractor()
         self.cdp_manager = None
+        self.checkpoint = get_crawl_checkpoint("tieba")
 
     async def start(self) -> None:
         """
@@ -75,15 +80,15 @@ class TieBaCrawler(AbstractCrawler):
             ip_pool=ip_proxy_pool,
             default_ip_proxy=httpx_proxy_format,
         )
-        crawler_type_var.set(config.CRAWLER_TYPE)
-        if config.CRAWLER_TYPE == "search":
+        crawler_type_var.set(self.settings.crawler_type)
+        if self.settings.crawler_type == "search":
             # Search for notes and retrieve their comment information.
             await self.search()
             await self.get_specified_tieba_notes()
-        elif config.CRAWLER_TYPE == "detail":
+        elif self.settings.crawler_type == "detail":
             # Get the information and comments of the specified post
             await self.get_specified_notes()
-        elif config.CRAWLER_TYPE == "creator":
+        elif self.settings.crawler_type == "creator":
             # Get creator's information and their notes and comments
             await self.get_creators_and_notes()
         else:
@@ -101,10 +106,10 @@ class TieBaCrawler(AbstractCrawler):
             "[BaiduTieBaCrawler.search] Begin search baidu tieba keywords"
         )
         tieba_limit_count = 10  # tieba limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
+        if self.settings.max_notes_count < tieba_limit_count:
+            self.settings = self.settings._replace(max_notes_count=tieba_limit_count)
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in self.settings.keywords.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(
                 f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}"
@@ -112,11 +117,15 @@ class TieBaCrawler(AbstractCrawler):
             page = 1
             while (
                 page - start_page + 1
-            ) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            ) * tieba_limit_count <= self.settings.max_notes_count:
                 if page < start_page:
                     utils.logger.info(f"[BaiduTieBaCrawler.search] Skip page {page}")
                     page += 1
                     continue
+                if self.checkpoint.is_page_done(keyword, page):
+                    utils.logger.info(f"[BaiduTieBaCrawler.search] Skip crawled page: {page}")
+                    page += 1
+                    continue
                 try:
                     utils.logger.info(
                         f"[BaiduTieBaCrawler.search] search tieba keyword: {keyword}, page: {page}"
@@ -141,11 +150,7 @@ class TieBaCrawler(AbstractCrawler):
                     await self.get_specified_notes(
                         note_id_list=[note_detail.note_id for note_detail in notes_list]
                     )
-                    
-                    # Sleep after page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[TieBaCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page}")
-                    
+                    self.checkpoint.mark_page_done(keyword, page)
                     page += 1
                 except Exception as ex:
                     utils.logger.error(
@@ -160,14 +165,14 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         tieba_limit_count = 50
-        if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
+        if self.settings.max_notes_count < tieba_limit_count:
+            self.settings = self.settings._replace(max_notes_count=tieba_limit_count)
         for tieba_name in config.TIEBA_NAME_LIST:
             utils.logger.info(
                 f"[BaiduTieBaCrawler.get_specified_tieba_notes] Begin get tieba name: {tieba_name}"
             )
             page_number = 0
-            while page_number <= config.CRAWLER_MAX_NOTES_COUNT:
+            while page_number <= self.settings.max_notes_count:
                 note_list: List[TiebaNote] = (
                     await self.tieba_client.get_notes_by_tieba_name(
                         tieba_name=tieba_name, page_num=page_number
@@ -184,23 +189,21 @@ class TieBaCrawler(AbstractCrawler):
                 )
                 await self.get_specified_notes([note.note_id for note in note_list])
                 
-                # Sleep after processing notes
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[TieBaCrawler.get_specified_tieba_notes] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after processing notes from page {page_number}")
-                
                 page_number += tieba_limit_count
 
     async def get_specified_notes(
-        self, note_id_list: List[str] = config.TIEBA_SPECIFIED_ID_LIST
+        self, note_id_list: Optional[List[str]] = None
     ):
         """
         Get the information and comments of the specified post
         Args:
-            note_id_list:
+            note_id_list: 默认为运行参数中的 specified_id_list
 
         Returns:
 
         """
+        if note_id_list is None:
+            note_id_list = self.settings.specified_id_list
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
         task_list = [
             self.get_note_detail_async_task(note_id=note_id, semaphore=semaphore)
@@ -233,10 +236,6 @@ class TieBaCrawler(AbstractCrawler):
                 )
                 note_detail: TiebaNote = await self.tieba_client.get_note_by_id(note_id)
                 
-                # Sleep after fetching note details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[TieBaCrawler.get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note details {note_id}")
-                
                 if not note_detail:
                     utils.logger.error(
                         f"[BaiduTieBaCrawler.get_note_detail] Get note detail error, note_id: {note_id}"
@@ -263,7 +262,7 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not self.settings.enable_get_comments:
             return
 
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
@@ -288,21 +287,22 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
+        if self.checkpoint.is_comments_done(note_detail.note_id):
+            utils.logger.info(
+                f"[BaiduTieBaCrawler.get_comments] note id {note_detail.note_id} comments already crawled, skip"
+            )
+            return
         async with semaphore:
             utils.logger.info(
                 f"[BaiduTieBaCrawler.get_comments] Begin get note id comments {note_detail.note_id}"
             )
             
-            # Sleep before fetching comments
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[TieBaCrawler.get_comments_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for note {note_detail.note_id}")
-            
             await self.tieba_client.get_note_all_comments(
                 note_detail=note_detail,
-                crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
                 callback=tieba_store.batch_update_tieba_note_comments,
                 max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
             )
+            self.checkpoint.mark_comments_done(note_detail.note_id)
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -313,7 +313,7 @@ class TieBaCrawler(AbstractCrawler):
         utils.logger.info(
             "[WeiboCrawler.get_creators_and_notes] Begin get weibo creators"
         )
-        for creator_url in config.TIEBA_CREATOR_URL_LIST:
+        for creator_url in self.settings.creator_id_list:
             creator_page_html_content = await self.tieba_client.get_creator_info_by_url(
                 creator_url=creator_url
             )
@@ -335,7 +335,7 @@ class TieBaCrawler(AbstractCrawler):
                         user_name=creator_info.user_name,
                         crawl_interval=0,
                         callback=tieba_store.batch_update_tieba_notes,
-                        max_note_count=config.CRAWLER_MAX_NOTES_COUNT,
+                        max_note_count=self.settings.max_notes_count,
                         creator_page_html_content=creator_page_html_content,
                     )
                 )
@@ -372,7 +372,7 @@ class TieBaCrawler(AbstractCrawler):
             # feat issue #14
             # we will save login state to avoid login every time
             user_data_dir = os.path.join(
-                os.getcwd(), "browser_data", config.USER_DATA_DIR % config.PLATFORM
+                os.getcwd(), "browser_data", config.USER_DATA_DIR % self.settings.platform
             )  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
@@ -401,7 +401,7 @@ class TieBaCrawler(AbstractCrawler):
         使用CDP模式启动浏览器
         """
         try:
-            self.cdp_manager = CDPBrowserManager()
+            self.cdp_manager = CDPBrowserManager(self.settings.platform)
             browser_context = await self.cdp_manager.launch_and_connect(
                 playwright=playwright,
                 playwright_proxy=playwright_proxy,
@@ -424,15 +424,20 @@ class TieBaCrawler(AbstractCrawler):
             )
 
     async def close(self):
-        """
-        Close browser context
-        Returns:
-
-        """
-        # 如果使用CDP模式，需要特殊处理
-        if self.cdp_manager:
-            await self.cdp_manager.cleanup()
-            self.cdp_manager = None
-        else:
-            await self.browser_context.close()
-        utils.logger.info("[BaiduTieBaCrawler.close] Browser context closed ...")
+        """Flush stores, close api client and browser context"""
+        # 写完存储队列中剩余的数据
+        await close_write_behind_stores(self.settings.platform)
+        if getattr(self, "tieba_client", None):
+            await self.tieba_client.close()
+        try:
+            # 如果使用CDP模式，需要特殊处理
+            if self.cdp_manager:
+                await self.cdp_manager.cleanup()
+                self.cdp_manager = None
+            elif getattr(self, "browser_context", None):
+                await self.browser_context.close()
+            utils.logger.info("[BaiduTieBaCrawler.close] Browser context closed ...")
+        except TargetClosedError:
+            utils.logger.warning("[BaiduTieBaCrawler.close] Browser context was already closed.")
+        except Exception as e:
+            utils.logger.error(f"[BaiduTieBaCrawler.close] An error occurred during close: {e}")
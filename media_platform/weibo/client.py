@@ -26,6 +26,9 @@ from playwright.async_api import BrowserContext, Page
 
 import config
 from tools import utils
+from tools.http_client_pool import HttpClientPool
+from tools.media_downloader import stream_download
+from tools.rate_limiter import get_rate_limiter
 
 from .exception import DataFetchError
 from .field import SearchType
@@ -44,16 +47,26 @@ class WeiboClient:
     ):
         self.proxy = proxy
         self.timeout = timeout
+        self.http_pool = HttpClientPool()
+        self.rate_limiter = get_rate_limiter("wb")
         self.headers = headers
         self._host = "https://m.weibo.cn"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
         self._image_agent_host = "https://i1.wp.com/"
 
+    async def close(self):
+        """关闭 httpx 连接池"""
+        await self.http_pool.aclose()
+
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        endpoint = self.rate_limiter.endpoint_of(url)
+        await self.rate_limiter.acquire(endpoint)
+        client = self.http_pool.get_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        # 微博请求过于频繁时返回 418
+        self.rate_limiter.record(endpoint, throttled=response.status_code in (403, 418, 429))
 
         if enable_return_response:
             return response
@@ -150,9 +163,11 @@ class WeiboClient:
     async def get_note_all_comments(
         self,
         note_id: str,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: Optional[Dict] = None,
+        cursor_callback: Optional[Callable[[Dict], None]] = None,
     ):
         """
         get note all comments include sub comments
@@ -160,12 +175,18 @@ class WeiboClient:
         :param crawl_interval:
         :param callback:
         :param max_count:
+        :param cursor: 断点续爬时上次保存的翻页游标
+        :param cursor_callback: 每页评论保存之后调用，参数为下一页的翻页游标
         :return:
         """
         result = []
         is_end = False
         max_id = -1
         max_id_type = 0
+        if cursor:
+            max_id = cursor.get("max_id", -1)
+            max_id_type = cursor.get("max_id_type", 0)
+            max_count -= cursor.get("count", 0)
         while not is_end and len(result) < max_count:
             comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
             max_id: int = comments_res.get("max_id")
@@ -180,6 +201,8 @@ class WeiboClient:
             result.extend(comment_list)
             sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
             result.extend(sub_comment_result)
+            if cursor_callback:
+                cursor_callback({"max_id": max_id, "max_id_type": max_id_type, "count": (cursor or {}).get("count", 0) + len(result)})
         return result
 
     @staticmethod
@@ -217,22 +240,21 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {"mblog": note_detail}
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
-
-    async def get_note_image(self, image_url: str) -> bytes:
+        response = await self.request("GET", url, headers=self.headers, return_response=True)
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {"mblog": note_detail}
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+            return dict()
+
+    def _make_large_image_url(self, image_url: str) -> str:
         image_url = image_url[8:]  # 去掉 https://
         sub_url = image_url.split("/")
         image_url = ""
@@ -245,20 +267,39 @@ class WeiboClient:
                 image_url += sub_url[i] + "/"
         # 微博图床对外存在防盗链，所以需要代理访问
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
-        final_uri = (f"{self._image_agent_host}"
-                     f"{image_url}")
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", final_uri, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")    # 保留原始异常类型名称，以便开发者调试
+        return (f"{self._image_agent_host}"
+                f"{image_url}")
+
+    async def get_note_image(self, image_url: str) -> bytes:
+        final_uri = self._make_large_image_url(image_url)
+        await self.rate_limiter.acquire(self.rate_limiter.endpoint_of(final_uri))
+        client = self.http_pool.get_client(self.proxy)
+        try:
+            response = await client.request("GET", final_uri, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
+                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
                 return None
+            else:
+                return response.content
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")    # 保留原始异常类型名称，以便开发者调试
+            return None
+
+    async def download_note_image(self, image_url: str, save_path: str) -> bool:
+        """
+        流式下载微博高清图片到 save_path
+        Args:
+            image_url: 图片地址
+            save_path: 保存路径
+
+        Returns:
+            是否下载成功
+        """
+        final_uri = self._make_large_image_url(image_url)
+        await self.rate_limiter.acquire(self.rate_limiter.endpoint_of(final_uri))
+        client = self.http_pool.get_client(self.proxy)
+        return await stream_download(client, final_uri, save_path, timeout=self.timeout)
 
     async def get_creator_container_info(self, creator_id: str) -> Dict:
         """
@@ -341,7 +382,7 @@ class WeiboClient:
         self,
         creator_id: str,
         container_id: str,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
@@ -14,8 +14,8 @@
 # @Desc    : 微博爬虫主流程代码
 
 import asyncio
+import functools
 import os
-# import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -26,13 +26,19 @@ from playwright.async_api import (
     Playwright,
     async_playwright,
 )
+from playwright._impl._errors import TargetClosedError
 
 import config
 from base.base_crawler import AbstractCrawler
+from base.crawler_settings import CrawlerSettings
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
+from store.write_behind import close_write_behind_stores
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_checkpoint import get_crawl_checkpoint
+from tools.media_download_manager import close_media_download_manager, get_media_download_manager
+from tools.seen_index import get_seen_index
 from var import crawler_type_var, source_keyword_var
 
 from .client import WeiboClient
@@ -48,12 +54,15 @@ class WeiboCrawler(AbstractCrawler):
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
 
-    def __init__(self):
+    def __init__(self, settings: Optional[CrawlerSettings] = None):
+        self.settings = settings or CrawlerSettings.from_config("wb")
         self.index_url = "https://www.weibo.com"
         self.mobile_index_url = "https://m.weibo.cn"
         self.user_agent = utils.get_user_agent()
         self.mobile_user_agent = utils.get_mobile_user_agent()
         self.cdp_manager = None
+        self.checkpoint = get_crawl_checkpoint("wb")
+        self.seen_index = get_seen_index("wb")
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -76,7 +85,7 @@ class WeiboCrawler(AbstractCrawler):
                 utils.logger.info("[WeiboCrawler] 使用标准模式启动浏览器")
                 # Launch a browser context.
                 chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(chromium, None, self.mobile_user_agent, headless=config.HEADLESS)
+                self.browser_context = await self.launch_browser(chromium, None, self.mobile_user_agent, headless=self.settings.headless)
             # stealth.min.js is a js script to prevent the website from detecting the crawler.
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
             self.context_page = await self.browser_context.new_page()
@@ -86,11 +95,11 @@ class WeiboCrawler(AbstractCrawler):
             self.wb_client = await self.create_weibo_client(httpx_proxy_format)
             if not await self.wb_client.pong():
                 login_obj = WeiboLogin(
-                    login_type=config.LOGIN_TYPE,
+                    login_type=self.settings.login_type,
                     login_phone="",  # your phone number
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES,
+                    cookie_str=self.settings.cookies,
                 )
                 await login_obj.begin()
 
@@ -100,14 +109,14 @@ class WeiboCrawler(AbstractCrawler):
                 await asyncio.sleep(2)
                 await self.wb_client.update_cookies(browser_context=self.browser_context)
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
+            crawler_type_var.set(self.settings.crawler_type)
+            if self.settings.crawler_type == "search":
                 # Search for video and retrieve their comment information.
                 await self.search()
-            elif config.CRAWLER_TYPE == "detail":
+            elif self.settings.crawler_type == "detail":
                 # Get the information and comments of the specified post
                 await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
+            elif self.settings.crawler_type == "creator":
                 # Get creator's information and their notes and comments
                 await self.get_creators_and_notes()
             else:
@@ -121,8 +130,8 @@ class WeiboCrawler(AbstractCrawler):
         """
         utils.logger.info("[WeiboCrawler.search] Begin search weibo keywords")
         weibo_limit_count = 10  # weibo limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < weibo_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = weibo_limit_count
+        if self.settings.max_notes_count < weibo_limit_count:
+            self.settings = self.settings._replace(max_notes_count=weibo_limit_count)
         start_page = config.START_PAGE
 
         # Set the search type based on the configuration for weibo
@@ -138,15 +147,19 @@ class WeiboCrawler(AbstractCrawler):
             utils.logger.error(f"[WeiboCrawler.search] Invalid WEIBO_SEARCH_TYPE: {config.WEIBO_SEARCH_TYPE}")
             return
 
-        for keyword in config.KEYWORDS.split(","):
+        for keyword in self.settings.keywords.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
             page = 1
-            while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+            while (page - start_page + 1) * weibo_limit_count <= self.settings.max_notes_count:
                 if page < start_page:
                     utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
                     page += 1
                     continue
+                if self.checkpoint.is_page_done(keyword, page):
+                    utils.logger.info(f"[WeiboCrawler.search] Skip crawled page: {page}")
+                    page += 1
+                    continue
                 utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
                 search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
                 note_id_list: List[str] = []
@@ -159,13 +172,9 @@ class WeiboCrawler(AbstractCrawler):
                             await weibo_store.update_weibo_note(note_item)
                             await self.get_note_images(mblog)
 
-                page += 1
-                
-                # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-                
                 await self.batch_get_notes_comments(note_id_list)
+                self.checkpoint.mark_page_done(keyword, page)
+                page += 1
 
     async def get_specified_notes(self):
         """
@@ -173,12 +182,12 @@ class WeiboCrawler(AbstractCrawler):
         :return:
         """
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-        task_list = [self.get_note_info_task(note_id=note_id, semaphore=semaphore) for note_id in config.WEIBO_SPECIFIED_ID_LIST]
+        task_list = [self.get_note_info_task(note_id=note_id, semaphore=semaphore) for note_id in self.settings.specified_id_list]
         video_details = await asyncio.gather(*task_list)
         for note_item in video_details:
             if note_item:
                 await weibo_store.update_weibo_note(note_item)
-        await self.batch_get_notes_comments(config.WEIBO_SPECIFIED_ID_LIST)
+        await self.batch_get_notes_comments(self.settings.specified_id_list)
 
     async def get_note_info_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
         """
@@ -187,14 +196,12 @@ class WeiboCrawler(AbstractCrawler):
         :param semaphore:
         :return:
         """
+        if self.seen_index.is_content_fresh(note_id, source_keyword_var.get(), self.checkpoint.is_comments_pending(note_id)):
+            utils.logger.info(f"[WeiboCrawler.get_note_info_task] note_id: {note_id} crawled recently, skip")
+            return None
         async with semaphore:
             try:
                 result = await self.wb_client.get_note_info_by_id(note_id)
-                
-                # Sleep after fetching note details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note details {note_id}")
-                
                 return result
             except DataFetchError as ex:
                 utils.logger.error(f"[WeiboCrawler.get_note_info_task] Get note detail error: {ex}")
@@ -209,8 +216,10 @@ class WeiboCrawler(AbstractCrawler):
         :param note_id_list:
         :return:
         """
-        if not config.ENABLE_GET_COMMENTS:
+        if not self.settings.enable_get_comments:
             utils.logger.info(f"[WeiboCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
+            for note_id in note_id_list:
+                self.seen_index.mark_content_seen(note_id, source=source_keyword_var.get())
             return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
@@ -228,20 +237,23 @@ class WeiboCrawler(AbstractCrawler):
         :param semaphore:
         :return:
         """
+        if self.checkpoint.is_comments_done(note_id):
+            utils.logger.info(f"[WeiboCrawler.get_note_comments] note_id: {note_id} comments already crawled, skip")
+            self.seen_index.mark_content_seen(note_id, source=source_keyword_var.get())
+            return
         async with semaphore:
             try:
                 utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
                 
-                # Sleep before fetching comments
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for note {note_id}")
-                
                 await self.wb_client.get_note_all_comments(
                     note_id=note_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,  # Use fixed interval instead of random
                     callback=weibo_store.batch_update_weibo_note_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                    cursor=self.checkpoint.get_comment_cursor(note_id),
+                    cursor_callback=functools.partial(self.checkpoint.save_comment_cursor, note_id),
                 )
+                self.checkpoint.mark_comments_done(note_id)
+                self.seen_index.mark_content_seen(note_id, source=source_keyword_var.get())
             except DataFetchError as ex:
                 utils.logger.error(f"[WeiboCrawler.get_note_comments] get note_id: {note_id} comment error: {ex}")
             except Exception as e:
@@ -265,12 +277,9 @@ class WeiboCrawler(AbstractCrawler):
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.wb_client.get_note_image(url)
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[WeiboCrawler.get_note_images] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching image")
-            if content != None:
-                extension_file_name = url.split(".")[-1]
-                await weibo_store.update_weibo_note_image(note_id, pic["pid"], content, extension_file_name)
+            extension_file_name = url.split(".")[-1]
+            save_path = weibo_store.get_weibo_note_image_save_path(note_id, pic["pid"], extension_file_name)
+            await get_media_download_manager("wb").submit(url, save_path, functools.partial(self.wb_client.download_note_image, url))
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -279,7 +288,7 @@ class WeiboCrawler(AbstractCrawler):
 
         """
         utils.logger.info("[WeiboCrawler.get_creators_and_notes] Begin get weibo creators")
-        for user_id in config.WEIBO_CREATOR_ID_LIST:
+        for user_id in self.settings.creator_id_list:
             createor_info_res: Dict = await self.wb_client.get_creator_info_by_id(creator_id=user_id)
             if createor_info_res:
                 createor_info: Dict = createor_info_res.get("userInfo", {})
@@ -330,7 +339,7 @@ class WeiboCrawler(AbstractCrawler):
         """Launch browser and create browser context"""
         utils.logger.info("[WeiboCrawler.launch_browser] Begin create browser context ...")
         if config.SAVE_LOGIN_STATE:
-            user_data_dir = os.path.join(os.getcwd(), "browser_data", config.USER_DATA_DIR % config.PLATFORM)  # type: ignore
+            user_data_dir = os.path.join(os.getcwd(), "browser_data", config.USER_DATA_DIR % self.settings.platform)  # type: ignore
             browser_context = await chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
                 accept_downloads=True,
@@ -359,7 +368,7 @@ class WeiboCrawler(AbstractCrawler):
         使用CDP模式启动浏览器
         """
         try:
-            self.cdp_manager = CDPBrowserManager()
+            self.cdp_manager = CDPBrowserManager(self.settings.platform)
             browser_context = await self.cdp_manager.launch_and_connect(
                 playwright=playwright,
                 playwright_proxy=playwright_proxy,
@@ -380,11 +389,22 @@ class WeiboCrawler(AbstractCrawler):
             return await self.launch_browser(chromium, playwright_proxy, user_agent, headless)
 
     async def close(self):
-        """Close browser context"""
-        # 如果使用CDP模式，需要特殊处理
-        if self.cdp_manager:
-            await self.cdp_manager.cleanup()
-            self.cdp_manager = None
-        else:
-            await self.browser_context.close()
-        utils.logger.info("[WeiboCrawler.close] Browser context closed ...")
+        """Flush stores, close api client and browser context"""
+        # 等待后台媒体下载完成，下载使用 API 客户端的连接池，需要在客户端关闭之前完成
+        await close_media_download_manager("wb")
+        # 写完存储队列中剩余的数据
+        await close_write_behind_stores(self.settings.platform)
+        if getattr(self, "wb_client", None):
+            await self.wb_client.close()
+        try:
+            # 如果使用CDP模式，需要特殊处理
+            if self.cdp_manager:
+                await self.cdp_manager.cleanup()
+                self.cdp_manager = None
+            elif getattr(self, "browser_context", None):
+                await self.browser_context.close()
+            utils.logger.info("[WeiboCrawler.close] Browser context closed ...")
+        except TargetClosedError:
+            utils.logger.warning("[WeiboCrawler.close] Browser context was already closed.")
+        except Exception as e:
+            utils.logger.error(f"[WeiboCrawler.close] An error occurred during close: {e}")
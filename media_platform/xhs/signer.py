@@ -0,0 +1,155 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 小红书请求签名：签名提供者抽象 + 基于 Playwright 页面池的实现。
+#            b1 只在首次签名（以及 cookies 更新）时从 localStorage 读取，每次签名只需一次 page.evaluate，
+#            多个页面轮流签名，并发请求不再排队等待同一个页面
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from playwright.async_api import Page
+
+import config
+from tools import utils
+
+from .help import sign
+
+
+class AbstractXhsSigner(ABC):
+    """签名提供者：根据请求的 uri 和请求体生成 X-S/X-T 等签名请求头"""
+
+    def __init__(self):
+        self.sign_count = 0
+        self.sign_seconds = 0.0
+        self.max_sign_seconds = 0.0
+
+    @abstractmethod
+    async def _sign(self, url: str, data: Optional[Dict] = None) -> Dict[str, str]:
+        raise NotImplementedError
+
+    async def sign(self, url: str, data: Optional[Dict] = None) -> Dict[str, str]:
+        """
+        生成签名请求头，同时统计签名耗时
+        Args:
+            url: 请求的 uri（GET 请求包含查询参数）
+            data: POST 请求体
+
+        Returns:
+            签名请求头
+        """
+        start = time.perf_counter()
+        headers = await self._sign(url, data)
+        elapsed = time.perf_counter() - start
+        self.sign_count += 1
+        self.sign_seconds += elapsed
+        self.max_sign_seconds = max(self.max_sign_seconds, elapsed)
+        return headers
+
+    def update_cookies(self, cookie_dict: Dict[str, str]):
+        """登录后 cookies 变化时调用"""
+
+    def log_stats(self):
+        if not self.sign_count:
+            return
+        utils.logger.info(
+            f"[{self.__class__.__name__}] signed {self.sign_count} requests, "
+            f"avg {self.sign_seconds / self.sign_count * 1000:.1f}ms, max {self.max_sign_seconds * 1000:.1f}ms"
+        )
+
+    async def close(self):
+        self.log_stats()
+
+
+class PlaywrightXhsSigner(AbstractXhsSigner):
+    """
+    通过页面中的 window._webmsxyw 生成 X-s，除了传入的主页面，第一次签名时再打开 pool_size - 1 个小红书页面，
+    签名请求轮流使用空闲的页面
+    """
+
+    def __init__(
+        self,
+        page: Page,
+        cookie_dict: Dict[str, str],
+        pool_size: int = config.XHS_SIGN_PAGE_POOL_SIZE,
+        index_url: str = "https://www.xiaohongshu.com",
+    ):
+        super().__init__()
+        self.page = page
+        self.cookie_dict = cookie_dict
+        self.pool_size = max(1, pool_size)
+        self.index_url = index_url
+        self._b1: Optional[str] = None
+        self._extra_pages: List[Page] = []
+        self._idle_pages: Optional[asyncio.Queue] = None
+        self._init_lock = asyncio.Lock()
+
+    async def _ensure_pages(self):
+        async with self._init_lock:
+            if self._idle_pages is not None:
+                return
+            idle_pages = asyncio.Queue()
+            idle_pages.put_nowait(self.page)
+            for _ in range(self.pool_size - 1):
+                try:
+                    extra_page = await self.page.context.new_page()
+                    await extra_page.goto(self.index_url)
+                except Exception as e:
+                    # 额外页面只用于提高并发，打开失败时继续使用已有的页面
+                    utils.logger.warning(f"[PlaywrightXhsSigner._ensure_pages] open sign page failed: {e}")
+                    break
+                self._extra_pages.append(extra_page)
+                idle_pages.put_nowait(extra_page)
+            self._idle_pages = idle_pages
+
+    async def _get_b1(self, page: Page) -> str:
+        if self._b1 is None:
+            self._b1 = await page.evaluate("() => window.localStorage.getItem('b1')") or ""
+        return self._b1
+
+    async def _sign(self, url: str, data: Optional[Dict] = None) -> Dict[str, str]:
+        if self._idle_pages is None:
+            await self._ensure_pages()
+        page: Page = await self._idle_pages.get()
+        try:
+            b1 = await self._get_b1(page)
+            encrypt_params = await page.evaluate("([url, data]) => window._webmsxyw(url,data)", [url, data])
+        finally:
+            self._idle_pages.put_nowait(page)
+        signs = sign(
+            a1=self.cookie_dict.get("a1", ""),
+            b1=b1,
+            x_s=encrypt_params.get("X-s", ""),
+            x_t=str(encrypt_params.get("X-t", "")),
+        )
+        return {
+            "X-S": signs["x-s"],
+            "X-T": signs["x-t"],
+            "x-S-Common": signs["x-s-common"],
+            "X-B3-Traceid": signs["x-b3-traceid"],
+        }
+
+    def update_cookies(self, cookie_dict: Dict[str, str]):
+        self.cookie_dict = cookie_dict
+        # 登录后 localStorage 中的 b1 可能变化，下次签名时重新读取
+        self._b1 = None
+
+    async def close(self):
+        await super().close()
+        for extra_page in self._extra_pages:
+            try:
+                await extra_page.close()
+            except Exception:
+                pass
+        self._extra_pages = []
+        self._idle_pages = None
@@ -24,10 +24,12 @@ from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
+from tools.http_client_pool import HttpClientPool
+from tools.rate_limiter import get_rate_limiter
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
-from .help import ZhihuExtractor, sign
+from .help import ZhihuExtractor, async_sign
 
 
 class ZhiHuClient(AbstractApiClient):
@@ -43,6 +45,8 @@ class ZhiHuClient(AbstractApiClient):
     ):
         self.proxy = proxy
         self.timeout = timeout
+        self.http_pool = HttpClientPool()
+        self.rate_limiter = get_rate_limiter("zhihu")
         self.default_headers = headers
         self.cookie_dict = cookie_dict
         self._extractor = ZhihuExtractor()
@@ -58,12 +62,16 @@ class ZhiHuClient(AbstractApiClient):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await async_sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
         return headers
 
+    async def close(self):
+        """关闭 httpx 连接池"""
+        await self.http_pool.aclose()
+
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
@@ -79,8 +87,11 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        endpoint = self.rate_limiter.endpoint_of(url)
+        await self.rate_limiter.acquire(endpoint)
+        client = self.http_pool.get_client(self.proxy)
+        response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        self.rate_limiter.record(endpoint, throttled=response.status_code in (403, 429))
 
         if response.status_code != 200:
             utils.logger.error(
@@ -271,7 +282,7 @@ class ZhiHuClient(AbstractApiClient):
     async def get_note_all_comments(
         self,
         content: ZhihuContent,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[ZhihuComment]:
         """
@@ -313,7 +324,7 @@ class ZhiHuClient(AbstractApiClient):
         self,
         content: ZhihuContent,
         comments: List[ZhihuComment],
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[ZhihuComment]:
         """
@@ -434,7 +445,7 @@ class ZhiHuClient(AbstractApiClient):
         }
         return await self.get(uri, params)
 
-    async def get_all_anwser_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0, callback: Optional[Callable] = None) -> List[ZhihuContent]:
+    async def get_all_anwser_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 0, callback: Optional[Callable] = None) -> List[ZhihuContent]:
         """
         获取创作者的所有回答
         Args:
@@ -469,7 +480,7 @@ class ZhiHuClient(AbstractApiClient):
     async def get_all_articles_by_creator(
         self,
         creator: ZhihuCreator,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[ZhihuContent]:
         """
@@ -504,7 +515,7 @@ class ZhiHuClient(AbstractApiClient):
     async def get_all_videos_by_creator(
         self,
         creator: ZhihuCreator,
-        crawl_interval: float = 1.0,
+        crawl_interval: float = 0,
         callback: Optional[Callable] = None,
     ) -> List[ZhihuContent]:
         """
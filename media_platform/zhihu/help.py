@@ -10,6 +10,7 @@
 
 
 # -*- coding: utf-8 -*-
+import asyncio
 import json
 from typing import Dict, List, Optional
 from urllib.parse import parse_qs, urlparse
@@ -17,11 +18,14 @@ from urllib.parse import parse_qs, urlparse
 import execjs
 from parsel import Selector
 
+import config
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
 from tools.crawler_util import extract_text_from_html
+from tools.js_worker import get_js_worker_pool
 
+ZHIHU_SIGN_JS_PATH = "libs/zhihu.js"
 ZHIHU_SGIN_JS = None
 
 
@@ -37,12 +41,28 @@ def sign(url: str, cookies: str) -> Dict:
     """
     global ZHIHU_SGIN_JS
     if not ZHIHU_SGIN_JS:
-        with open("libs/zhihu.js", mode="r", encoding="utf-8-sig") as f:
+        with open(ZHIHU_SIGN_JS_PATH, mode="r", encoding="utf-8-sig") as f:
             ZHIHU_SGIN_JS = execjs.compile(f.read())
 
     return ZHIHU_SGIN_JS.call("get_sign", url, cookies)
 
 
+async def async_sign(url: str, cookies: str) -> Dict:
+    """
+    zhihu sign algorithm, 不阻塞事件循环：在常驻的 Node.js 进程池中签名，并发请求可以并行签名；
+    关闭 ENABLE_JS_SIGN_WORKER 时在线程中调用 execjs
+    Args:
+        url: request url with query string
+        cookies: request cookies with d_c0 key
+
+    Returns:
+
+    """
+    if config.ENABLE_JS_SIGN_WORKER:
+        return await get_js_worker_pool(ZHIHU_SIGN_JS_PATH).call("get_sign", url, cookies)
+    return await asyncio.to_thread(sign, url, cookies)
+
+
 class ZhihuExtractor:
     def __init__(self):
         pass
@@ -13,9 +13,10 @@
 # @Time    : 2024/1/14 19:34
 # @Desc    :
 
-from typing import List
+from typing import List, Optional
 
 import config
+from store.write_behind import get_write_behind_store
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -27,6 +28,7 @@ class BiliStoreFactory:
         "csv": BiliCsvStoreImplement,
         "db": BiliDbStoreImplement,
         "json": BiliJsonStoreImplement,
+        "jsonl": BiliJsonStoreImplement,
         "sqlite": BiliSqliteStoreImplement,
     }
 
@@ -34,8 +36,8 @@ class BiliStoreFactory:
     def create_store() -> AbstractStore:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+            raise ValueError("[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite ...")
+        return get_write_behind_store("bili", store_class)
 
 
 async def update_bilibili_video(video_item: Dict):
@@ -91,11 +93,15 @@ async def update_up_info(video_item: Dict):
 async def batch_update_bilibili_video_comments(video_id: str, comments: List[Dict]):
     if not comments:
         return
+    save_comment_items = []
     for comment_item in comments:
-        await update_bilibili_video_comment(video_id, comment_item)
+        save_comment_item = _build_bilibili_video_comment_item(video_id, comment_item)
+        if save_comment_item:
+            save_comment_items.append(save_comment_item)
+    await BiliStoreFactory.create_store().store_comments_batch(save_comment_items)
 
 
-async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
+def _build_bilibili_video_comment_item(video_id: str, comment_item: Dict) -> Optional[Dict]:
     comment_id = str(comment_item.get("rpid"))
     parent_comment_id = str(comment_item.get("parent", 0))
     content: Dict = comment_item.get("content")
@@ -117,7 +123,13 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
+
+
+async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _build_bilibili_video_comment_item(video_id, comment_item)
+    if save_comment_item:
+        await BiliStoreFactory.create_store().store_comment(save_comment_item)
 
 
 async def store_video(aid, video_content, extension_file_name):
@@ -135,6 +147,16 @@ async def store_video(aid, video_content, extension_file_name):
     })
 
 
+def get_video_save_path(aid, extension_file_name) -> str:
+    """
+    视频的本地保存路径（会创建目录），用于流式下载
+    Args:
+        aid:
+        extension_file_name:
+    """
+    return BilibiliVideo().prepare_save_file_name(str(aid), extension_file_name)
+
+
 async def batch_update_bilibili_creator_fans(creator_info: Dict, fans_list: List[Dict]):
     if not fans_list:
         return
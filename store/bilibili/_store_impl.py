@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -26,6 +26,7 @@ from sqlalchemy.orm import sessionmaker
 
 import config
 from base.base_crawler import AbstractStore
+from database.db_batch import batch_upsert
 from database.db_session import get_session
 from database.models import BilibiliVideoComment, BilibiliVideo, BilibiliUpInfo, BilibiliUpDynamic, BilibiliContactInfo
 from tools.async_file_writer import AsyncFileWriter
@@ -152,6 +153,21 @@ class BiliDbStoreImplement(AbstractStore):
                     setattr(comment_detail, key, value)
             await session.commit()
 
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        Bilibili comments DB batch storage implementation, one transaction per page of comments
+        Args:
+            comment_items: comment item dict list
+        """
+        async with get_session() as session:
+            await batch_upsert(
+                session,
+                BilibiliVideoComment,
+                comment_items,
+                key_column="comment_id",
+                insert_defaults={"add_ts": utils.get_current_timestamp()},
+            )
+
     async def store_creator(self, creator: Dict):
         """
         Bilibili creator DB storage implementation
@@ -220,7 +236,8 @@ class BiliJsonStoreImplement(AbstractStore):
     def __init__(self):
         self.file_writer = AsyncFileWriter(
             crawler_type=crawler_type_var.get(),
-            platform="bilibili"
+            platform="bilibili",
+            json_lines=config.SAVE_DATA_OPTION == "jsonl"
         )
 
     async def store_content(self, content_item: Dict):
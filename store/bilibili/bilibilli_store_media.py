@@ -15,9 +15,9 @@
 import pathlib
 from typing import Dict
 
-import aiofiles
-
+import config
 from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
+from store.media_blob_store import get_media_blob_store, write_media_file
 from tools import utils
 
 
@@ -49,6 +49,20 @@ class BilibiliVideo(AbstractStoreVideo):
         """
         return f"{self.video_store_path}/{aid}/{extension_file_name}"
 
+    def prepare_save_file_name(self, aid: str, extension_file_name: str) -> str:
+        """
+        create the save directory and return the save file name, used by streaming downloads
+
+        Args:
+            aid: aid
+            extension_file_name: video filename with extension
+
+        Returns:
+
+        """
+        pathlib.Path(self.video_store_path + "/" + str(aid)).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(str(aid), extension_file_name)
+
     async def save_video(self, aid: int, video_content: str, extension_file_name="mp4"):
         """
         save video to local
@@ -61,8 +75,9 @@ class BilibiliVideo(AbstractStoreVideo):
         Returns:
 
         """
-        pathlib.Path(self.video_store_path + "/" + str(aid)).mkdir(parents=True, exist_ok=True)
-        save_file_name = self.make_save_file_name(str(aid), extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(video_content)
-            utils.logger.info(f"[BilibiliVideoImplement.save_video] save save_video {save_file_name} success ...")
+        save_file_name = self.prepare_save_file_name(str(aid), extension_file_name)
+        if config.ENABLE_MEDIA_DEDUP:
+            await get_media_blob_store().save_bytes(video_content, save_file_name)
+        else:
+            await write_media_file(save_file_name, video_content)
+        utils.logger.info(f"[BilibiliVideoImplement.save_video] save save_video {save_file_name} success ...")
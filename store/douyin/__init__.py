@@ -12,9 +12,10 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 18:46
 # @Desc    :
-from typing import List
+from typing import List, Optional
 
 import config
+from store.write_behind import get_write_behind_store
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -26,6 +27,7 @@ class DouyinStoreFactory:
         "csv": DouyinCsvStoreImplement,
         "db": DouyinDbStoreImplement,
         "json": DouyinJsonStoreImplement,
+        "jsonl": DouyinJsonStoreImplement,
         "sqlite": DouyinSqliteStoreImplement,
     }
 
@@ -33,8 +35,8 @@ class DouyinStoreFactory:
     def create_store() -> AbstractStore:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite ...")
+        return get_write_behind_store("dy", store_class)
 
 
 def _extract_note_image_list(aweme_detail: Dict) -> List[str]:
@@ -178,15 +180,19 @@ async def update_douyin_aweme(aweme_item: Dict):
 async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
     if not comments:
         return
+    save_comment_items = []
     for comment_item in comments:
-        await update_dy_aweme_comment(aweme_id, comment_item)
+        save_comment_item = _build_dy_aweme_comment_item(aweme_id, comment_item)
+        if save_comment_item:
+            save_comment_items.append(save_comment_item)
+    await DouyinStoreFactory.create_store().store_comments_batch(save_comment_items)
 
 
-async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+def _build_dy_aweme_comment_item(aweme_id: str, comment_item: Dict) -> Optional[Dict]:
     comment_aweme_id = comment_item.get("aweme_id")
     if aweme_id != comment_aweme_id:
         utils.logger.error(f"[store.douyin.update_dy_aweme_comment] comment_aweme_id: {comment_aweme_id} != aweme_id: {aweme_id}")
-        return
+        return None
     user_info = comment_item.get("user", {})
     comment_id = comment_item.get("cid")
     parent_comment_id = comment_item.get("reply_id", "0")
@@ -211,8 +217,13 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
         "pictures": ",".join(_extract_comment_image_list(comment_item)),
     }
     utils.logger.info(f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}")
+    return save_comment_item
+
 
-    await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+    save_comment_item = _build_dy_aweme_comment_item(aweme_id, comment_item)
+    if save_comment_item:
+        await DouyinStoreFactory.create_store().store_comment(save_comment_item)
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -264,3 +275,29 @@ async def update_dy_aweme_video(aweme_id, video_content, extension_file_name):
     """
 
     await DouYinVideo().store_video({"aweme_id": aweme_id, "video_content": video_content, "extension_file_name": extension_file_name})
+
+
+def get_dy_aweme_image_save_path(aweme_id, extension_file_name) -> str:
+    """
+    抖音笔记图片的本地保存路径（会创建目录），用于流式下载
+    Args:
+        aweme_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return DouYinImage().prepare_save_file_name(aweme_id, extension_file_name)
+
+
+def get_dy_aweme_video_save_path(aweme_id, extension_file_name) -> str:
+    """
+    抖音短视频的本地保存路径（会创建目录），用于流式下载
+    Args:
+        aweme_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return DouYinVideo().prepare_save_file_name(aweme_id, extension_file_name)
@@ -17,12 +17,13 @@ import asyncio
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
+from database.db_batch import batch_upsert
 from database.db_session import get_session
 from database.models import DouyinAweme, DouyinAwemeComment, DyCreator
 from tools import utils, words
@@ -122,6 +123,21 @@ class DouyinDbStoreImplement(AbstractStore):
                     setattr(comment_detail, key, value)
             await session.commit()
 
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        Douyin comments DB batch storage implementation, one transaction per page of comments
+        Args:
+            comment_items: comment item dict list
+        """
+        async with get_session() as session:
+            await batch_upsert(
+                session,
+                DouyinAwemeComment,
+                comment_items,
+                key_column="comment_id",
+                insert_defaults={"add_ts": utils.get_current_timestamp()},
+            )
+
     async def store_creator(self, creator: Dict):
         """
         Douyin creator DB storage implementation
@@ -147,7 +163,8 @@ class DouyinJsonStoreImplement(AbstractStore):
     def __init__(self):
         self.file_writer = AsyncFileWriter(
             crawler_type=crawler_type_var.get(),
-            platform="douyin"
+            platform="douyin",
+            json_lines=config.SAVE_DATA_OPTION == "jsonl"
         )
 
     async def store_content(self, content_item: Dict):
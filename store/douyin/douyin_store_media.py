@@ -11,9 +11,9 @@
 import pathlib
 from typing import Dict
 
-import aiofiles
-
+import config
 from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
+from store.media_blob_store import get_media_blob_store, write_media_file
 from tools import utils
 
 
@@ -45,6 +45,20 @@ class DouYinImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{aweme_id}/{extension_file_name}"
 
+    def prepare_save_file_name(self, aweme_id: str, extension_file_name: str) -> str:
+        """
+        create the save directory and return the save file name, used by streaming downloads
+
+        Args:
+            aweme_id: aweme id
+            extension_file_name: image filename with extension
+
+        Returns:
+
+        """
+        pathlib.Path(self.image_store_path + "/" + str(aweme_id)).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(str(aweme_id), extension_file_name)
+
     async def save_image(self, aweme_id: str, pic_content: str, extension_file_name):
         """
         save image to local
@@ -57,11 +71,12 @@ class DouYinImage(AbstractStoreImage):
         Returns:
 
         """
-        pathlib.Path(self.image_store_path + "/" + aweme_id).mkdir(parents=True, exist_ok=True)
-        save_file_name = self.make_save_file_name(aweme_id, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(pic_content)
-            utils.logger.info(f"[DouYinImageStoreImplement.save_image] save image {save_file_name} success ...")
+        save_file_name = self.prepare_save_file_name(aweme_id, extension_file_name)
+        if config.ENABLE_MEDIA_DEDUP:
+            await get_media_blob_store().save_bytes(pic_content, save_file_name)
+        else:
+            await write_media_file(save_file_name, pic_content)
+        utils.logger.info(f"[DouYinImageStoreImplement.save_image] save image {save_file_name} success ...")
 
 
 class DouYinVideo(AbstractStoreVideo):
@@ -92,6 +107,20 @@ class DouYinVideo(AbstractStoreVideo):
         """
         return f"{self.video_store_path}/{aweme_id}/{extension_file_name}"
 
+    def prepare_save_file_name(self, aweme_id: str, extension_file_name: str) -> str:
+        """
+        create the save directory and return the save file name, used by streaming downloads
+
+        Args:
+            aweme_id: aweme id
+            extension_file_name: video filename with extension
+
+        Returns:
+
+        """
+        pathlib.Path(self.video_store_path + "/" + str(aweme_id)).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(str(aweme_id), extension_file_name)
+
     async def save_video(self, aweme_id: str, video_content: str, extension_file_name):
         """
         save video to local
@@ -104,8 +133,9 @@ class DouYinVideo(AbstractStoreVideo):
         Returns:
 
         """
-        pathlib.Path(self.video_store_path + "/" + aweme_id).mkdir(parents=True, exist_ok=True)
-        save_file_name = self.make_save_file_name(aweme_id, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(video_content)
-            utils.logger.info(f"[DouYinVideoStoreImplement.save_video] save video {save_file_name} success ...")
+        save_file_name = self.prepare_save_file_name(aweme_id, extension_file_name)
+        if config.ENABLE_MEDIA_DEDUP:
+            await get_media_blob_store().save_bytes(video_content, save_file_name)
+        else:
+            await write_media_file(save_file_name, video_content)
+        utils.logger.info(f"[DouYinVideoStoreImplement.save_video] save video {save_file_name} success ...")
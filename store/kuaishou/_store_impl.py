@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 from tools.async_file_writer import AsyncFileWriter
 
 import aiofiles
@@ -26,6 +26,7 @@ from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
+from database.db_batch import batch_upsert
 from database.db_session import get_session
 from database.models import KuaishouVideo, KuaishouVideoComment
 from tools import utils, words
@@ -124,10 +125,25 @@ class KuaishouDbStoreImplement(AbstractStore):
             await session.commit()
 
 
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        Kuaishou comments DB batch storage implementation, one transaction per page of comments
+        Args:
+            comment_items: comment item dict list
+        """
+        async with get_session() as session:
+            await batch_upsert(
+                session,
+                KuaishouVideoComment,
+                comment_items,
+                key_column="comment_id",
+                insert_defaults={"add_ts": utils.get_current_timestamp()},
+            )
+
 class KuaishouJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="kuaishou", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter(platform="kuaishou", crawler_type=crawler_type_var.get(), json_lines=config.SAVE_DATA_OPTION == "jsonl")
 
     async def store_content(self, content_item: Dict):
         """
@@ -0,0 +1,185 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 媒体文件内容寻址存储：文件按 sha256 只保存一份，data/<platform>/images|videos/<id>/ 下的文件是指向它的硬链接，
+#            同时记录 URL -> 内容哈希，重复爬取时相同 URL 的媒体不再下载
+
+import asyncio
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+
+import config
+from tools import utils
+
+
+async def write_media_file(save_path: str, content: bytes):
+    """
+    不经过内容寻址存储直接保存媒体文件。save_path 可能是指向 blob 的硬链接，
+    先写临时文件再原子替换，不能原地覆盖，否则会改写共享同一个 blob 的所有文件
+    """
+    tmp_path = save_path + ".tmp"
+    async with aiofiles.open(tmp_path, "wb") as f:
+        await f.write(content)
+    os.replace(tmp_path, save_path)
+
+
+def _file_sha256(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class MediaBlobStore:
+    """
+    blob 保存在 <root>/<sha256 前两位>/<sha256>，平台目录下的文件通过硬链接指向 blob，
+    文件系统不支持硬链接时退化为复制（仍然可以按 URL 跳过下载）
+    """
+
+    def __init__(self, root: str = config.MEDIA_BLOB_STORE_PATH):
+        self.root = root
+        self.dedup_hits = 0
+        self.url_hits = 0
+        self.saved_bytes = 0
+        Path(root).mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.db"), timeout=config.CRAWL_STATE_DB_TIMEOUT)
+        # 多进程分片爬取时各子进程共用该数据库，WAL 模式下读写互不阻塞，写入冲突时等待而不是报 database is locked
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS media_url (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    @staticmethod
+    def _link(blob_path: str, save_path: str):
+        """让 save_path 指向 blob，已存在的 save_path 会被原子替换"""
+        tmp_path = save_path + ".link"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(blob_path, tmp_path)
+        except OSError:
+            shutil.copyfile(blob_path, tmp_path)
+        os.replace(tmp_path, save_path)
+
+    def _record_url(self, url: Optional[str], sha256: str, size: int):
+        if not url:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO media_url (url, sha256, size, created_at) VALUES (?, ?, ?, ?)",
+            (url, sha256, size, int(time.time())),
+        )
+        self._conn.commit()
+
+    def link_existing(self, url: str, save_path: str) -> bool:
+        """
+        URL 之前下载过且 blob 仍然存在时，直接链接到 save_path
+        Returns:
+            是否可以跳过下载
+        """
+        row = self._conn.execute("SELECT sha256, size FROM media_url WHERE url = ?", (url,)).fetchone()
+        if row is None or not os.path.exists(self.blob_path(row[0])):
+            return False
+        self._link(self.blob_path(row[0]), save_path)
+        self.url_hits += 1
+        self.saved_bytes += row[1]
+        return True
+
+    async def ingest_file(self, save_path: str, url: Optional[str] = None):
+        """
+        将已下载完成的文件纳入 blob 存储：内容已存在时 save_path 改为指向已有 blob，否则以 save_path 作为新 blob
+        Args:
+            save_path: 已下载完成的文件
+            url: 媒体地址，用于下次按 URL 跳过下载
+        """
+        sha256 = await asyncio.to_thread(_file_sha256, save_path)
+        size = os.path.getsize(save_path)
+        blob_path = self.blob_path(sha256)
+        if os.path.exists(blob_path):
+            self._link(blob_path, save_path)
+            self.dedup_hits += 1
+            self.saved_bytes += size
+        else:
+            Path(blob_path).parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(save_path, blob_path)
+            except OSError:
+                shutil.copyfile(save_path, blob_path)
+        self._record_url(url, sha256, size)
+
+    async def save_bytes(self, content: bytes, save_path: str, url: Optional[str] = None):
+        """
+        保存内存中的媒体内容，内容已存在时只创建链接
+        Args:
+            content: 媒体内容
+            save_path: 保存路径，目录需已存在
+            url: 媒体地址
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+        blob_path = self.blob_path(sha256)
+        if os.path.exists(blob_path):
+            self.dedup_hits += 1
+            self.saved_bytes += len(content)
+        else:
+            Path(blob_path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = blob_path + ".part"
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(content)
+            os.replace(tmp_path, blob_path)
+        self._link(blob_path, save_path)
+        self._record_url(url, sha256, len(content))
+
+    def log_stats(self):
+        utils.logger.info(
+            f"[MediaBlobStore] skipped {self.url_hits} downloads by url, deduplicated {self.dedup_hits} files, "
+            f"saved {self.saved_bytes / 1024 / 1024:.1f}MB"
+        )
+
+    def close(self):
+        self._conn.close()
+
+
+_blob_store: Optional[MediaBlobStore] = None
+
+
+def get_media_blob_store() -> MediaBlobStore:
+    """获取内容寻址存储（单例），所有平台共用"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = MediaBlobStore()
+    return _blob_store
+
+
+def close_media_blob_store():
+    global _blob_store
+    blob_store, _blob_store = _blob_store, None
+    if blob_store is not None:
+        blob_store.log_stats()
+        blob_store.close()
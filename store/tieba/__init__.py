@@ -10,9 +10,10 @@
 
 
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import List, Optional
 
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from store.write_behind import get_write_behind_store
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -23,6 +24,7 @@ class TieBaStoreFactory:
         "csv": TieBaCsvStoreImplement,
         "db": TieBaDbStoreImplement,
         "json": TieBaJsonStoreImplement,
+        "jsonl": TieBaJsonStoreImplement,
         "sqlite": TieBaSqliteStoreImplement
     }
 
@@ -31,8 +33,8 @@ class TieBaStoreFactory:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
-        return store_class()
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl ...")
+        return get_write_behind_store("tieba", store_class)
 
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
@@ -79,11 +81,15 @@ async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaCom
     """
     if not comments:
         return
+    save_comment_items = []
     for comment_item in comments:
-        await update_tieba_note_comment(note_id, comment_item)
+        save_comment_item = _build_tieba_note_comment_item(note_id, comment_item)
+        if save_comment_item:
+            save_comment_items.append(save_comment_item)
+    await TieBaStoreFactory.create_store().store_comments_batch(save_comment_items)
 
 
-async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
+def _build_tieba_note_comment_item(note_id: str, comment_item: TiebaComment) -> Optional[Dict]:
     """
     Update tieba note comment
     Args:
@@ -96,7 +102,13 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
     save_comment_item = comment_item.model_dump()
     save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
-    await TieBaStoreFactory.create_store().store_comment(save_comment_item)
+    return save_comment_item
+
+
+async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
+    save_comment_item = _build_tieba_note_comment_item(note_id, comment_item)
+    if save_comment_item:
+        await TieBaStoreFactory.create_store().store_comment(save_comment_item)
 
 
 async def save_creator(user_info: TiebaCreator):
@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -28,6 +28,7 @@ import config
 from base.base_crawler import AbstractStore
 from database.models import TiebaNote, TiebaComment, TiebaCreator
 from tools import utils, words
+from database.db_batch import batch_upsert
 from database.db_session import get_session
 from var import crawler_type_var
 from tools.async_file_writer import AsyncFileWriter
@@ -126,6 +127,15 @@ class TieBaDbStoreImplement(AbstractStore):
                 session.add(db_comment)
             await session.commit()
 
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        tieba comments DB batch storage implementation, one transaction per page of comments
+        Args:
+            comment_items: comment item dict list
+        """
+        async with get_session() as session:
+            await batch_upsert(session, TiebaComment, comment_items, key_column="comment_id")
+
     async def store_creator(self, creator: Dict):
         """
         tieba content DB storage implementation
@@ -149,7 +159,7 @@ class TieBaDbStoreImplement(AbstractStore):
 class TieBaJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="tieba", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter(platform="tieba", crawler_type=crawler_type_var.get(), json_lines=config.SAVE_DATA_OPTION == "jsonl")
 
     async def store_content(self, content_item: Dict):
         """
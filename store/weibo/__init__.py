@@ -14,8 +14,9 @@
 # @Desc    :
 
 import re
-from typing import List
+from typing import List, Optional
 
+from store.write_behind import get_write_behind_store
 from var import source_keyword_var
 
 from .weibo_store_media import *
@@ -27,6 +28,7 @@ class WeibostoreFactory:
         "csv": WeiboCsvStoreImplement,
         "db": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "jsonl": WeiboJsonStoreImplement,
         "sqlite": WeiboSqliteStoreImplement,
     }
 
@@ -34,8 +36,8 @@ class WeibostoreFactory:
     def create_store() -> AbstractStore:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite ...")
+        return get_write_behind_store("wb", store_class)
 
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
@@ -107,11 +109,15 @@ async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
+    save_comment_items = []
     for comment_item in comments:
-        await update_weibo_note_comment(note_id, comment_item)
+        save_comment_item = _build_weibo_note_comment_item(note_id, comment_item)
+        if save_comment_item:
+            save_comment_items.append(save_comment_item)
+    await WeibostoreFactory.create_store().store_comments_batch(save_comment_items)
 
 
-async def update_weibo_note_comment(note_id: str, comment_item: Dict):
+def _build_weibo_note_comment_item(note_id: str, comment_item: Dict) -> Optional[Dict]:
     """
     Update weibo note comment
     Args:
@@ -122,7 +128,7 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
 
     """
     if not comment_item or not note_id:
-        return
+        return None
     comment_id = str(comment_item.get("id"))
     user_info: Dict = comment_item.get("user")
     content_text = comment_item.get("text")
@@ -147,7 +153,13 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
         "avatar": user_info.get("profile_image_url", ""),
     }
     utils.logger.info(f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
-    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
+
+
+async def update_weibo_note_comment(note_id: str, comment_item: Dict):
+    save_comment_item = _build_weibo_note_comment_item(note_id, comment_item)
+    if save_comment_item:
+        await WeibostoreFactory.create_store().store_comment(save_comment_item)
 
 
 async def update_weibo_note_image(note_id, picid: str, pic_content, extension_file_name):
@@ -164,6 +176,20 @@ async def update_weibo_note_image(note_id, picid: str, pic_content, extension_fi
     await WeiboStoreImage().store_image(note_id, {"pic_id": picid, "pic_content": pic_content, "extension_file_name": extension_file_name})
 
 
+def get_weibo_note_image_save_path(note_id, picid: str, extension_file_name) -> str:
+    """
+    Local path of weibo note image (directory is created), used by streaming downloads
+    Args:
+        note_id:
+        picid:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return WeiboStoreImage().prepare_save_file_name(note_id, picid, extension_file_name)
+
+
 async def save_creator(user_id: str, user_info: Dict):
     """
     Save creator information to local
@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -29,6 +29,7 @@ from base.base_crawler import AbstractStore
 from database.models import WeiboCreator, WeiboNote, WeiboNoteComment
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
+from database.db_batch import batch_upsert
 from database.db_session import get_session
 from var import crawler_type_var
 
@@ -141,6 +142,21 @@ class WeiboDbStoreImplement(AbstractStore):
                 session.add(db_comment)
             await session.commit()
 
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        Weibo comments DB batch storage implementation, one transaction per page of comments
+        Args:
+            comment_items: comment item dict list
+        """
+        async with get_session() as session:
+            await batch_upsert(
+                session,
+                WeiboNoteComment,
+                comment_items,
+                key_column="comment_id",
+                insert_defaults={"add_ts": utils.get_current_timestamp()},
+            )
+
     async def store_creator(self, creator: Dict):
         """
         Weibo creator DB storage implementation
@@ -171,7 +187,7 @@ class WeiboDbStoreImplement(AbstractStore):
 class WeiboJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="weibo", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter(platform="weibo", crawler_type=crawler_type_var.get(), json_lines=config.SAVE_DATA_OPTION == "jsonl")
 
     async def store_content(self, content_item: Dict):
         """
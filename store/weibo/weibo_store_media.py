@@ -15,9 +15,9 @@
 import pathlib
 from typing import Dict
 
-import aiofiles
-
+import config
 from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
+from store.media_blob_store import get_media_blob_store, write_media_file
 from tools import utils
 
 
@@ -49,6 +49,22 @@ class WeiboStoreImage(AbstractStoreImage):
         """
         return f"{this_path}/{picid}.{extension_file_name}"
 
+    def prepare_save_file_name(self, note_id: str, picid: str, extension_file_name: str) -> str:
+        """
+        create the save directory and return the save file name, used by streaming downloads
+
+        Args:
+            note_id: note id
+            picid: image id
+            extension_file_name: image file extension
+
+        Returns:
+
+        """
+        this_path = self.image_store_path + "/" + note_id
+        pathlib.Path(this_path).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(this_path, picid, extension_file_name)
+
     async def save_image(self, note_id, picid: str, pic_content: str, extension_file_name="jpg"):
         """
         save image to local
@@ -61,9 +77,9 @@ class WeiboStoreImage(AbstractStoreImage):
         Returns:
 
         """
-        this_path = self.image_store_path + "/"+ note_id
-        pathlib.Path(this_path).mkdir(parents=True, exist_ok=True)
-        save_file_name = self.make_save_file_name(this_path, picid, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(pic_content)
-            utils.logger.info(f"[WeiboImageStoreImplement.save_image] save image {save_file_name} success ...")
+        save_file_name = self.prepare_save_file_name(note_id, picid, extension_file_name)
+        if config.ENABLE_MEDIA_DEDUP:
+            await get_media_blob_store().save_bytes(pic_content, save_file_name)
+        else:
+            await write_media_file(save_file_name, pic_content)
+        utils.logger.info(f"[WeiboImageStoreImplement.save_image] save image {save_file_name} success ...")
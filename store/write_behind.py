@@ -0,0 +1,269 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 存储写缓冲：每个平台一个存储实例，写入先进入 asyncio 队列，由后台任务按批量/时间落盘
+
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from tools.seen_index import SeenIndex, get_seen_index
+
+# 批量写入评论时使用的方法名，连续的评论会合并为一次 store_comments_batch 调用
+_COMMENT_METHODS = ("store_comment", "store_comments_batch")
+
+
+class StoreWriteError(Exception):
+    """重试后仍然没有写入存储的数据，在关闭存储时抛出"""
+
+
+class WriteBehindStore(AbstractStore):
+    """
+    包装具体的存储实现（csv/json/db...），store_* 调用只负责入队，后台任务批量写入。
+    队列满时 store_* 会等待（背压），其余情况下爬虫协程不会被磁盘或数据库的延迟阻塞
+    """
+
+    def __init__(
+        self,
+        store: AbstractStore,
+        max_size: int = config.STORE_QUEUE_MAX_SIZE,
+        batch_size: int = config.STORE_BATCH_SIZE,
+        flush_interval: float = config.STORE_FLUSH_INTERVAL,
+        seen_index: Optional[SeenIndex] = None,
+        max_retries: int = config.STORE_WRITE_MAX_RETRIES,
+        retry_delay: float = 1.0,
+    ):
+        self.store = store
+        self.seen_index = seen_index
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        # 重试后仍然写入失败的数据，关闭时再写一次
+        self._failed: List[Tuple[int, str, Tuple, Dict]] = []
+        # 入队的数据按顺序编号，_written_seq 为已经写入的最大编号
+        self._enqueued_seq = 0
+        self._written_seq = 0
+        # (编号, 回调)：编号及之前的数据全部写入后调用
+        self._callbacks: Deque[Tuple[int, Callable[[], None]]] = deque()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def __getattr__(self, name: str) -> Any:
+        # 平台特有的 store_* 方法（如 B站的 store_contact / store_dynamic）同样走队列，其余属性直接透传
+        store = self.__dict__.get("store")
+        if store is None:
+            raise AttributeError(name)
+        if name.startswith("store_") and callable(getattr(store, name, None)):
+            async def enqueue(*args, **kwargs):
+                await self._put(name, *args, **kwargs)
+            return enqueue
+        return getattr(store, name)
+
+    @property
+    def pending(self) -> int:
+        """队列中尚未写入的记录数"""
+        return self._queue.qsize() if self._queue else 0
+
+    async def store_content(self, content_item: Dict):
+        await self._put("store_content", content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        if self.seen_index and not self.seen_index.filter_new_comments([comment_item]):
+            return
+        await self._put("store_comment", comment_item)
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        # 之前的运行中已经保存过的评论不再重复写入
+        if self.seen_index:
+            comment_items = self.seen_index.filter_new_comments(comment_items)
+        if comment_items:
+            await self._put("store_comments_batch", comment_items)
+
+    async def store_creator(self, creator: Dict):
+        await self._put("store_creator", creator)
+
+    async def _put(self, method: str, *args, **kwargs):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        self._enqueued_seq += 1
+        await self._queue.put((self._enqueued_seq, method, args, kwargs))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write_with_retry(list(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def call_after_written(self, callback: Callable[[], None]):
+        """
+        当前已经入队的数据全部写入存储后调用 callback，没有待写入的数据时立即调用。
+        断点等"已完成"标记通过它记录，爬虫崩溃时不会把还在队列中的数据标记为已保存
+        """
+        if self._stored_seq() >= self._enqueued_seq:
+            callback()
+        else:
+            self._callbacks.append((self._enqueued_seq, callback))
+
+    def _stored_seq(self) -> int:
+        """该编号及之前的数据都已经写入存储"""
+        if self._failed:
+            return self._failed[0][0] - 1
+        return self._written_seq
+
+    def _mark_written(self, seq: int):
+        self._written_seq = max(self._written_seq, seq)
+        stored_seq = self._stored_seq()
+        while self._callbacks and self._callbacks[0][0] <= stored_seq:
+            _, callback = self._callbacks.popleft()
+            try:
+                callback()
+            except Exception as e:
+                utils.logger.error(f"[WriteBehindStore._mark_written] after written callback error: {e}")
+
+    async def _write_with_retry(self, pending: List[Tuple[int, str, Tuple, Dict]]):
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+            try:
+                await self._write_batch(pending)
+                return
+            except Exception as e:
+                utils.logger.error(
+                    f"[WriteBehindStore._write_with_retry] write {len(pending)} items failed (attempt {attempt + 1}): {e}"
+                )
+        self._failed.extend(pending)
+
+    async def _write_batch(self, batch: List[Tuple[int, str, Tuple, Dict]]):
+        """
+        按入队顺序写入，连续的评论合并为一次批量写入。
+        写入成功的记录会从 batch 中移除，出错时 batch 中只剩下尚未写入的记录，重试时不会重复写入
+        """
+        while batch:
+            seq, method, args, kwargs = batch[0]
+            if method not in _COMMENT_METHODS:
+                await getattr(self.store, method)(*args, **kwargs)
+                del batch[0]
+                self._mark_written(seq)
+                continue
+            count = 0
+            comments: List[Dict] = []
+            for entry_seq, method, args, kwargs in batch:
+                if method not in _COMMENT_METHODS:
+                    break
+                item = args[0] if args else next(iter(kwargs.values()))
+                comments.extend(item if method == "store_comments_batch" else [item])
+                seq = entry_seq
+                count += 1
+            await self._write_comments(comments)
+            del batch[:count]
+            self._mark_written(seq)
+
+    async def _write_comments(self, comments: List[Dict]):
+        await self.store.store_comments_batch(comments)
+        if self.seen_index:
+            self.seen_index.mark_comments_seen(comments)
+
+    async def flush(self):
+        """等待队列中已有的数据全部写入"""
+        if self._queue is not None and self._worker is not None and not self._worker.done():
+            await self._queue.join()
+
+    async def close(self):
+        """写完剩余数据后停止后台任务"""
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+        if self._failed:
+            try:
+                await self._write_batch(self._failed)
+            except Exception as e:
+                failed, self._failed = self._failed, []
+                raise StoreWriteError(f"{len(failed)} items were not written to {type(self.store).__name__}: {e}") from e
+
+
+_stores: Dict[Tuple[str, str], WriteBehindStore] = {}
+
+
+def get_write_behind_store(platform: str, store_factory: Callable[[], AbstractStore]) -> WriteBehindStore:
+    """
+    获取平台对应的单例存储，同一次爬取中所有 update_* 共用一个存储实例和写入锁
+    Args:
+        platform: 平台名称
+        store_factory: 创建具体存储实现的函数
+
+    Returns:
+
+    """
+    key = (platform, config.SAVE_DATA_OPTION)
+    store = _stores.get(key)
+    if store is None:
+        store = WriteBehindStore(store_factory(), seen_index=get_seen_index(platform))
+        _stores[key] = store
+    return store
+
+
+async def close_write_behind_stores(platform: Optional[str] = None):
+    """
+    爬虫结束时调用：写完队列中的数据并释放单例，下一次爬取会重新创建存储实例
+    Args:
+        platform: 只关闭该平台的存储，同一进程内其它平台的爬虫仍在运行时不受影响；为空时关闭所有平台
+    """
+    keys = [key for key in _stores if platform is None or key[0] == platform]
+    stores = [_stores.pop(key) for key in keys]
+    errors: List[StoreWriteError] = []
+    for store in stores:
+        try:
+            await store.close()
+        except StoreWriteError as e:
+            errors.append(e)
+    if errors:
+        raise errors[0]
+
+
+def call_after_written(platform: str, callback: Callable[[], None]):
+    """
+    平台的存储把当前已入队的数据全部写入后调用 callback，该平台还没有创建存储时立即调用
+    Args:
+        platform: 平台名称
+        callback: 回调函数
+    """
+    store = _stores.get((platform, config.SAVE_DATA_OPTION))
+    if store is None:
+        callback()
+    else:
+        store.call_after_written(callback)
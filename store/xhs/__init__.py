@@ -12,9 +12,10 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 17:34
 # @Desc    :
-from typing import List
+from typing import List, Optional
 
 import config
+from store.write_behind import get_write_behind_store
 from var import source_keyword_var
 
 from .xhs_store_media import *
@@ -26,6 +27,7 @@ class XhsStoreFactory:
         "csv": XhsCsvStoreImplement,
         "db": XhsDbStoreImplement,
         "json": XhsJsonStoreImplement,
+        "jsonl": XhsJsonStoreImplement,
         "sqlite": XhsSqliteStoreImplement,
     }
 
@@ -33,8 +35,8 @@ class XhsStoreFactory:
     def create_store() -> AbstractStore:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite ...")
+        return get_write_behind_store("xhs", store_class)
 
 
 def get_video_url_arr(note_item: Dict) -> List:
@@ -124,11 +126,15 @@ async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
+    save_comment_items = []
     for comment_item in comments:
-        await update_xhs_note_comment(note_id, comment_item)
+        save_comment_item = _build_xhs_note_comment_item(note_id, comment_item)
+        if save_comment_item:
+            save_comment_items.append(save_comment_item)
+    await XhsStoreFactory.create_store().store_comments_batch(save_comment_items)
 
 
-async def update_xhs_note_comment(note_id: str, comment_item: Dict):
+def _build_xhs_note_comment_item(note_id: str, comment_item: Dict) -> Optional[Dict]:
     """
     更新小红书笔记评论
     Args:
@@ -158,7 +164,13 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
         "like_count": comment_item.get("like_count", 0),
     }
     utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
-    await XhsStoreFactory.create_store().store_comment(local_db_item)
+    return local_db_item
+
+
+async def update_xhs_note_comment(note_id: str, comment_item: Dict):
+    local_db_item = _build_xhs_note_comment_item(note_id, comment_item)
+    if local_db_item:
+        await XhsStoreFactory.create_store().store_comment(local_db_item)
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -238,3 +250,29 @@ async def update_xhs_note_video(note_id, video_content, extension_file_name):
     """
 
     await XiaoHongShuVideo().store_video({"notice_id": note_id, "video_content": video_content, "extension_file_name": extension_file_name})
+
+
+def get_xhs_note_image_save_path(note_id, extension_file_name) -> str:
+    """
+    小红书笔记图片的本地保存路径（会创建目录），用于流式下载
+    Args:
+        note_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return XiaoHongShuImage().prepare_save_file_name(note_id, extension_file_name)
+
+
+def get_xhs_note_video_save_path(note_id, extension_file_name) -> str:
+    """
+    小红书笔记视频的本地保存路径（会创建目录），用于流式下载
+    Args:
+        note_id:
+        extension_file_name:
+
+    Returns:
+
+    """
+    return XiaoHongShuVideo().prepare_save_file_name(note_id, extension_file_name)
@@ -11,7 +11,9 @@ from sqlalchemy import select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+import config
 from base.base_crawler import AbstractStore
+from database.db_batch import batch_upsert
 from database.db_session import get_session
 from database.models import XhsNote, XhsNoteComment, XhsCreator
 
@@ -51,7 +53,7 @@ class XhsCsvStoreImplement(AbstractStore):
 class XhsJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="xhs", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter(platform="xhs", crawler_type=crawler_type_var.get(), json_lines=config.SAVE_DATA_OPTION == "jsonl")
 
     async def store_content(self, content_item: Dict):
         """
@@ -192,6 +194,39 @@ class XhsDbStoreImplement(AbstractStore):
         result = await session.execute(stmt)
         return result.first() is not None
 
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        store a page of comments in one transaction, field mapping is the same as add_comment / update_comment
+        :param comment_items:
+        :return:
+        """
+        rows = []
+        for comment_item in comment_items:
+            rows.append({
+                "user_id": comment_item.get("user_id"),
+                "nickname": comment_item.get("nickname"),
+                "avatar": comment_item.get("avatar"),
+                "ip_location": comment_item.get("ip_location"),
+                "last_modify_ts": int(get_current_timestamp()),
+                "comment_id": comment_item.get("comment_id"),
+                "create_time": comment_item.get("create_time"),
+                "note_id": comment_item.get("note_id"),
+                "content": comment_item.get("content"),
+                "sub_comment_count": comment_item.get("sub_comment_count"),
+                "pictures": json.dumps(comment_item.get("pictures")),
+                "parent_comment_id": comment_item.get("parent_comment_id"),
+                "like_count": str(comment_item.get("like_count")),
+            })
+        async with get_session() as session:
+            await batch_upsert(
+                session,
+                XhsNoteComment,
+                rows,
+                key_column="comment_id",
+                insert_defaults={"add_ts": int(get_current_timestamp())},
+                update_columns=["last_modify_ts", "like_count", "sub_comment_count"],
+            )
+
     async def store_creator(self, creator_item: Dict):
         user_id = creator_item.get("user_id")
         if not user_id:
@@ -15,9 +15,9 @@
 import pathlib
 from typing import Dict
 
-import aiofiles
-
+import config
 from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
+from store.media_blob_store import get_media_blob_store, write_media_file
 from tools import utils
 
 
@@ -49,6 +49,20 @@ class XiaoHongShuImage(AbstractStoreImage):
         """
         return f"{self.image_store_path}/{notice_id}/{extension_file_name}"
 
+    def prepare_save_file_name(self, notice_id: str, extension_file_name: str) -> str:
+        """
+        create the save directory and return the save file name, used by streaming downloads
+
+        Args:
+            notice_id: notice id
+            extension_file_name: image filename with extension
+
+        Returns:
+
+        """
+        pathlib.Path(self.image_store_path + "/" + str(notice_id)).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(str(notice_id), extension_file_name)
+
     async def save_image(self, notice_id: str, pic_content: str, extension_file_name):
         """
         save image to local
@@ -61,11 +75,12 @@ class XiaoHongShuImage(AbstractStoreImage):
         Returns:
 
         """
-        pathlib.Path(self.image_store_path + "/" + notice_id).mkdir(parents=True, exist_ok=True)
-        save_file_name = self.make_save_file_name(notice_id, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(pic_content)
-            utils.logger.info(f"[XiaoHongShuImageStoreImplement.save_image] save image {save_file_name} success ...")
+        save_file_name = self.prepare_save_file_name(notice_id, extension_file_name)
+        if config.ENABLE_MEDIA_DEDUP:
+            await get_media_blob_store().save_bytes(pic_content, save_file_name)
+        else:
+            await write_media_file(save_file_name, pic_content)
+        utils.logger.info(f"[XiaoHongShuImageStoreImplement.save_image] save image {save_file_name} success ...")
 
 
 class XiaoHongShuVideo(AbstractStoreVideo):
@@ -96,6 +111,20 @@ class XiaoHongShuVideo(AbstractStoreVideo):
         """
         return f"{self.video_store_path}/{notice_id}/{extension_file_name}"
 
+    def prepare_save_file_name(self, notice_id: str, extension_file_name: str) -> str:
+        """
+        create the save directory and return the save file name, used by streaming downloads
+
+        Args:
+            notice_id: notice id
+            extension_file_name: video filename with extension
+
+        Returns:
+
+        """
+        pathlib.Path(self.video_store_path + "/" + str(notice_id)).mkdir(parents=True, exist_ok=True)
+        return self.make_save_file_name(str(notice_id), extension_file_name)
+
     async def save_video(self, notice_id: str, video_content: str, extension_file_name):
         """
         save video to local
@@ -108,8 +137,9 @@ class XiaoHongShuVideo(AbstractStoreVideo):
         Returns:
 
         """
-        pathlib.Path(self.video_store_path + "/" + notice_id).mkdir(parents=True, exist_ok=True)
-        save_file_name = self.make_save_file_name(notice_id, extension_file_name)
-        async with aiofiles.open(save_file_name, 'wb') as f:
-            await f.write(video_content)
-            utils.logger.info(f"[XiaoHongShuVideoStoreImplement.save_video] save video {save_file_name} success ...")
+        save_file_name = self.prepare_save_file_name(notice_id, extension_file_name)
+        if config.ENABLE_MEDIA_DEDUP:
+            await get_media_blob_store().save_bytes(video_content, save_file_name)
+        else:
+            await write_media_file(save_file_name, video_content)
+        utils.logger.info(f"[XiaoHongShuVideoStoreImplement.save_video] save video {save_file_name} success ...")
@@ -10,7 +10,7 @@
 
 
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import Dict, List, Optional
 
 import config
 from base.base_crawler import AbstractStore
@@ -20,6 +20,7 @@ from ._store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuJsonStoreImplement,
                                           ZhihuSqliteStoreImplement)
 from tools import utils
+from store.write_behind import get_write_behind_store
 from var import source_keyword_var
 
 
@@ -28,6 +29,7 @@ class ZhihuStoreFactory:
         "csv": ZhihuCsvStoreImplement,
         "db": ZhihuDbStoreImplement,
         "json": ZhihuJsonStoreImplement,
+        "jsonl": ZhihuJsonStoreImplement,
         "sqlite": ZhihuSqliteStoreImplement
     }
 
@@ -35,8 +37,8 @@ class ZhihuStoreFactory:
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
-        return store_class()
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite ...")
+        return get_write_behind_store("zhihu", store_class)
 
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
@@ -82,11 +84,15 @@ async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
     if not comments:
         return
     
+    save_comment_items = []
     for comment_item in comments:
-        await update_zhihu_content_comment(comment_item)
+        save_comment_item = _build_zhihu_content_comment_item(comment_item)
+        if save_comment_item:
+            save_comment_items.append(save_comment_item)
+    await ZhihuStoreFactory.create_store().store_comments_batch(save_comment_items)
 
 
-async def update_zhihu_content_comment(comment_item: ZhihuComment):
+def _build_zhihu_content_comment_item(comment_item: ZhihuComment) -> Optional[Dict]:
     """
     更新知乎内容评论
     Args:
@@ -98,7 +104,13 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
     local_db_item = comment_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
-    await ZhihuStoreFactory.create_store().store_comment(local_db_item)
+    return local_db_item
+
+
+async def update_zhihu_content_comment(comment_item: ZhihuComment):
+    local_db_item = _build_zhihu_content_comment_item(comment_item)
+    if local_db_item:
+        await ZhihuStoreFactory.create_store().store_comment(local_db_item)
 
 
 async def save_creator(creator: ZhihuCreator):
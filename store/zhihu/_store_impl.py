@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -26,6 +26,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from base.base_crawler import AbstractStore
+from database.db_batch import batch_upsert
 from database.db_session import get_session
 from database.models import ZhihuContent, ZhihuComment, ZhihuCreator
 from tools import utils, words
@@ -125,6 +126,15 @@ class ZhihuDbStoreImplement(AbstractStore):
                 session.add(new_comment)
             await session.commit()
 
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        Zhihu comments DB batch storage implementation, one transaction per page of comments
+        Args:
+            comment_items: comment item dict list
+        """
+        async with get_session() as session:
+            await batch_upsert(session, ZhihuComment, comment_items, key_column="comment_id")
+
     async def store_creator(self, creator: Dict):
         """
         Zhihu content DB storage implementation
@@ -148,7 +158,7 @@ class ZhihuDbStoreImplement(AbstractStore):
 class ZhihuJsonStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.writer = AsyncFileWriter(platform="zhihu", crawler_type=crawler_type_var.get())
+        self.writer = AsyncFileWriter(platform="zhihu", crawler_type=crawler_type_var.get(), json_lines=config.SAVE_DATA_OPTION == "jsonl")
 
     async def store_content(self, content_item: Dict):
         """
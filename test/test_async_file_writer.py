@@ -0,0 +1,68 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from tools.async_file_writer import AsyncFileWriter, export_jsonl_to_json
+
+
+class TestAsyncFileWriter(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    async def test_jsonl_export_matches_legacy_json(self):
+        items = [{"note_id": str(i), "content": f"内容{i}", "tags": ["a", {"b": i}]} for i in range(5)]
+
+        legacy_writer = AsyncFileWriter(platform="legacy", crawler_type="search")
+        jsonl_writer = AsyncFileWriter(platform="weibo", crawler_type="search", json_lines=True)
+        for item in items:
+            await legacy_writer.write_single_item_to_json(item, "comments")
+            await jsonl_writer.write_single_item_to_json(item, "comments")
+
+        jsonl_file = next(Path("data/weibo/jsonl").glob("search_comments_*.jsonl"))
+        self.assertEqual(len(jsonl_file.read_text(encoding="utf-8").splitlines()), len(items))
+
+        exported_files = export_jsonl_to_json()
+        self.assertEqual(len(exported_files), 1)
+        legacy_file = next(Path("data/legacy/json").glob("search_comments_*.json"))
+        self.assertEqual(Path(exported_files[0]).read_text(encoding="utf-8"), legacy_file.read_text(encoding="utf-8"))
+
+    async def test_export_skips_truncated_line(self):
+        jsonl_dir = Path("data/zhihu/jsonl")
+        jsonl_dir.mkdir(parents=True)
+        (jsonl_dir / "search_contents_2025-01-01.jsonl").write_text('{"content_id": "1"}\n{"content_id": ', encoding="utf-8")
+
+        exported_files = export_jsonl_to_json()
+        with open(exported_files[0], encoding="utf-8") as f:
+            self.assertEqual(json.load(f), [{"content_id": "1"}])
+
+    async def test_export_uses_save_data_dir(self):
+        with mock.patch.object(config, "SAVE_DATA_DIR", "output"):
+            writer = AsyncFileWriter(platform="weibo", crawler_type="search", json_lines=True)
+            await writer.write_single_item_to_json({"note_id": "1"}, "contents")
+            exported_files = export_jsonl_to_json()
+
+        self.assertEqual(len(exported_files), 1)
+        self.assertTrue(Path(exported_files[0]).is_relative_to("output/weibo/json"))
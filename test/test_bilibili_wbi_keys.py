@@ -0,0 +1,59 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from media_platform.bilibili.client import BilibiliClient
+
+
+class TestBilibiliWbiKeys(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.client = BilibiliClient(headers={}, playwright_page=mock.Mock(), cookie_dict={})
+        self.fetches = 0
+
+        async def get_wbi_keys():
+            self.fetches += 1
+            await asyncio.sleep(0.01)
+            return f"img{self.fetches}", f"sub{self.fetches}"
+
+        self.client.get_wbi_keys = get_wbi_keys
+
+    async def test_concurrent_requests_fetch_keys_once(self):
+        signers = await asyncio.gather(*(self.client.get_wbi_signer() for _ in range(5)))
+
+        self.assertEqual(self.fetches, 1)
+        self.assertTrue(all(signer is signers[0] for signer in signers))
+
+    async def test_refetch_after_ttl_expiry(self):
+        with mock.patch.object(config, "BILI_WBI_KEYS_TTL", 0.2):
+            await self.client.get_wbi_signer()
+            await self.client.get_wbi_signer()
+            self.assertEqual(self.fetches, 1)
+            await asyncio.sleep(0.25)
+            await asyncio.gather(*(self.client.get_wbi_signer() for _ in range(3)))
+        self.assertEqual(self.fetches, 2)
+
+    async def test_invalidate_refetches_once(self):
+        first = await self.client.get_wbi_signer()
+        requested_at = time.monotonic()
+        self.client.invalidate_wbi_keys(requested_at)
+        second = await self.client.get_wbi_signer()
+
+        self.assertIsNot(first, second)
+        # 密钥刷新之前发出的请求返回签名失败时，不再丢弃已经刷新的密钥
+        self.client.invalidate_wbi_keys(requested_at)
+        self.assertIs(await self.client.get_wbi_signer(), second)
+        self.assertEqual(self.fetches, 2)
@@ -0,0 +1,70 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from tools.circuit_breaker import CircuitBreaker
+
+
+class TestCircuitBreaker(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_trips_recover_once(self):
+        recovered = []
+
+        async def recover():
+            recovered.append(1)
+
+        breaker = CircuitBreaker("test", open_seconds=0.05, on_recover=recover)
+        await asyncio.gather(*(breaker.trip("blocked") for _ in range(5)))
+
+        self.assertEqual(recovered, [1])
+        self.assertEqual(breaker.trips, 1)
+        self.assertFalse(breaker.is_open)
+
+    async def test_open_breaker_pauses_requests_but_not_event_loop(self):
+        breaker = CircuitBreaker("test", open_seconds=0.1)
+        ticks = []
+        requests_done = []
+
+        async def ticker():
+            for i in range(5):
+                ticks.append(i)
+                await asyncio.sleep(0.01)
+
+        async def request():
+            await breaker.wait_closed()
+            requests_done.append(breaker.is_open)
+
+        trip_task = asyncio.create_task(breaker.trip("blocked"))
+        await asyncio.sleep(0)
+        self.assertTrue(breaker.is_open)
+        request_task = asyncio.create_task(request())
+        await ticker()
+        # 熔断期间其他协程照常运行，请求协程仍在等待
+        self.assertEqual(ticks, [0, 1, 2, 3, 4])
+        self.assertEqual(requests_done, [])
+
+        await asyncio.gather(trip_task, request_task)
+        self.assertEqual(requests_done, [False])
+
+    async def test_recover_error_still_closes(self):
+        async def recover():
+            raise RuntimeError("page closed")
+
+        breaker = CircuitBreaker("test", open_seconds=0, on_recover=recover)
+        await breaker.trip("blocked")
+        self.assertFalse(breaker.is_open)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from tools.comment_index import CommentIndex
+from tools.postprocess_manifest import FileChange
+
+
+def get_post_id(comment):
+    return comment.get("note_id")
+
+
+def full_change(file_path: Path) -> FileChange:
+    stat = os.stat(file_path)
+    return FileChange(file_path, stat.st_size, stat.st_mtime_ns, 0, 0)
+
+
+class TestCommentIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.index = CommentIndex(str(self.root / "index" / "comment_index.db"))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def write(self, name: str, comments) -> Path:
+        file_path = self.root / name
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(comment) + "\n" for comment in comments)
+        return file_path
+
+    def test_query_only_requested_posts(self):
+        day1 = self.write("search_comments_2025-12-15.jsonl", [
+            {"note_id": 1, "comment_id": 10},
+            {"note_id": 2, "comment_id": 20},
+            {"comment_id": 99},
+        ])
+        day2 = self.write("search_comments_2025-12-16.jsonl", [
+            {"note_id": 1, "comment_id": 10},
+            {"note_id": 1, "comment_id": 11},
+        ])
+        self.assertEqual(self.index.index_file("weibo", full_change(day1), get_post_id)[0], 2)
+        self.assertEqual(self.index.index_file("weibo", full_change(day2), get_post_id)[0], 2)
+
+        comments = self.index.get_comments("weibo", ["1"], [day1.stem, day2.stem])
+        self.assertEqual(list(comments), ["1"])
+        self.assertEqual([c["comment_id"] for c in comments["1"]], [10, 11])
+
+        # 只查询指定来源文件
+        comments = self.index.get_comments("weibo", ["1", "2"], [day2.stem])
+        self.assertEqual([c["comment_id"] for c in comments["1"]], [10, 11])
+        self.assertNotIn("2", comments)
+        self.assertEqual(self.index.get_comments("bilibili", ["1"], [day1.stem]), {})
+
+    def test_append_and_reindex(self):
+        file_path = self.write("search_comments_2025-12-15.jsonl", [{"note_id": 1, "comment_id": 10}])
+        count, offset, records = self.index.index_file("weibo", full_change(file_path), get_post_id)
+        self.assertEqual((count, offset, records), (1, os.path.getsize(file_path), 1))
+
+        # 追加的评论从上次的位置继续索引
+        with open(file_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"note_id": 1, "comment_id": 11}) + "\n")
+        change = full_change(file_path)._replace(offset=offset, records=records)
+        self.assertEqual(self.index.index_file("weibo", change, get_post_id)[0], 1)
+        comments = self.index.get_comments("weibo", ["1"], [file_path.stem])
+        self.assertEqual([c["comment_id"] for c in comments["1"]], [10, 11])
+
+        # 从头处理时替换该文件之前的索引
+        self.write("search_comments_2025-12-15.jsonl", [{"note_id": 1, "comment_id": 12}])
+        self.assertEqual(self.index.index_file("weibo", full_change(file_path), get_post_id)[0], 1)
+        comments = self.index.get_comments("weibo", ["1"], [file_path.stem])
+        self.assertEqual([c["comment_id"] for c in comments["1"]], [12])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import unittest
+from typing import Dict
+from unittest import mock
+
+import config
+from base.base_crawler import AbstractStore
+from store.write_behind import close_write_behind_stores, get_write_behind_store
+from tools.crawl_checkpoint import CrawlCheckpoint, close_crawl_checkpoints, get_crawl_checkpoint
+from tools.seen_index import SeenIndex
+
+
+def _write_checkpoints(worker_id: int, checkpoint_path: str, seen_index_path: str, count: int):
+    """子进程：模拟分片爬取的 worker，每个作品提交一次断点和已爬取索引"""
+    checkpoint = CrawlCheckpoint("test", checkpoint_path)
+    seen_index = SeenIndex("test", seen_index_path)
+    for i in range(count):
+        item_id = f"{worker_id}-{i}"
+        if checkpoint.is_item_done(item_id):
+            continue
+        checkpoint.mark_item_done(item_id)
+        checkpoint.save_comment_cursor(item_id, {"page": 1})
+        checkpoint.mark_comments_done(item_id)
+        seen_index.mark_seen("content", [item_id])
+    checkpoint.close()
+    seen_index.close()
+
+
+class BlockingStore(AbstractStore):
+    """store_content 在 release 之前不会返回，store_creator 总是失败"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def store_content(self, content_item: Dict):
+        await self.release.wait()
+
+    async def store_comment(self, comment_item: Dict):
+        pass
+
+    async def store_creator(self, creator: Dict):
+        raise ConnectionError("db gone")
+
+
+class TestCrawlCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "checkpoint.db")
+
+    def tearDown(self):
+        close_crawl_checkpoints()
+        self.tmp_dir.cleanup()
+
+    def test_pages_items_and_comment_cursor(self):
+        checkpoint = CrawlCheckpoint("bili", self.db_path)
+        checkpoint.mark_page_done("python", 2)
+        checkpoint.mark_item_done(1001)
+        checkpoint.save_comment_cursor(1001, {"next": 3, "count": 40})
+        checkpoint.close()
+
+        checkpoint = CrawlCheckpoint("bili", self.db_path)
+        self.assertTrue(checkpoint.is_page_done("python", 2))
+        self.assertFalse(checkpoint.is_page_done("python", 3))
+        self.assertTrue(checkpoint.is_item_done("1001"))
+        self.assertEqual(checkpoint.get_comment_cursor(1001), {"next": 3, "count": 40})
+        self.assertFalse(checkpoint.is_comments_done(1001))
+
+        checkpoint.mark_comments_done(1001)
+        self.assertTrue(checkpoint.is_comments_done(1001))
+        self.assertIsNone(checkpoint.get_comment_cursor(1001))
+        # 不同平台互不影响
+        self.assertFalse(CrawlCheckpoint("wb", self.db_path).is_item_done("1001"))
+        checkpoint.close()
+
+    def test_fresh_run_resets_and_resume_keeps(self):
+        checkpoint = CrawlCheckpoint("xhs", self.db_path)
+        checkpoint.mark_page_done("python", 1)
+        checkpoint.close()
+
+        with mock.patch.object(config, "CRAWL_CHECKPOINT_PATH", self.db_path), \
+                mock.patch.object(config, "RESUME_CRAWL", True):
+            self.assertTrue(get_crawl_checkpoint("xhs").is_page_done("python", 1))
+            close_crawl_checkpoints()
+            with mock.patch.object(config, "RESUME_CRAWL", False):
+                self.assertFalse(get_crawl_checkpoint("xhs").is_page_done("python", 1))
+
+    def test_disabled_checkpoint_is_noop(self):
+        checkpoint = CrawlCheckpoint("dy", self.db_path, enabled=False)
+        checkpoint.mark_page_done("python", 1)
+        self.assertFalse(checkpoint.is_page_done("python", 1))
+        self.assertFalse(os.path.exists(self.db_path))
+
+
+@mock.patch.object(config, "ENABLE_SEEN_INDEX", False)
+class TestCheckpointAfterStored(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint = CrawlCheckpoint("test", os.path.join(self.tmp_dir.name, "checkpoint.db"))
+
+    async def asyncTearDown(self):
+        self.checkpoint.close()
+        self.tmp_dir.cleanup()
+
+    async def test_mark_waits_until_data_is_written(self):
+        store = get_write_behind_store("test", BlockingStore)
+        await store.store_content({"id": 1})
+        self.checkpoint.mark_item_done(1)
+        await asyncio.sleep(0.05)
+        self.assertFalse(self.checkpoint.is_item_done(1))
+
+        store.store.release.set()
+        await close_write_behind_stores("test")
+        self.assertTrue(self.checkpoint.is_item_done(1))
+
+    async def test_mark_is_dropped_when_write_fails(self):
+        store = get_write_behind_store("test", BlockingStore)
+        store.max_retries = 0
+        await store.store_creator({"id": 1})
+        self.checkpoint.mark_page_done("python", 1)
+        with self.assertRaises(Exception):
+            await close_write_behind_stores("test")
+        self.assertFalse(self.checkpoint.is_page_done("python", 1))
+
+    async def test_mark_immediately_without_store(self):
+        self.checkpoint.mark_comments_done(1)
+        self.assertTrue(self.checkpoint.is_comments_done(1))
+
+
+class TestCheckpointMultiProcess(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_workers_write_same_database(self):
+        checkpoint_path = os.path.join(self.tmp_dir.name, "checkpoint.db")
+        seen_index_path = os.path.join(self.tmp_dir.name, "seen_index.db")
+        workers, count = 8, 300
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_write_checkpoints, args=(worker_id, checkpoint_path, seen_index_path, count))
+            for worker_id in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        # 任何一个子进程遇到 database is locked 都会异常退出
+        self.assertEqual([process.exitcode for process in processes], [0] * workers)
+        checkpoint = CrawlCheckpoint("test", checkpoint_path)
+        seen_index = SeenIndex("test", seen_index_path)
+        item_ids = [f"{worker_id}-{i}" for worker_id in range(workers) for i in range(count)]
+        self.assertTrue(all(checkpoint.is_item_done(item_id) and checkpoint.is_comments_done(item_id) for item_id in item_ids))
+        self.assertEqual(len(seen_index.fresh_ids("content", item_ids)), workers * count)
+        # WAL 模式下子进程读取断点时不会阻塞其它子进程提交
+        self.assertEqual(checkpoint._conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(seen_index._conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        checkpoint.close()
+        seen_index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+
+from tools.crawler_pipeline import CrawlerPipeline
+
+
+class TestCrawlerPipeline(unittest.IsolatedAsyncioTestCase):
+
+    async def test_items_flow_through_all_stages(self):
+        pipeline = CrawlerPipeline("test", metrics_interval=0)
+        details, comments = [], []
+
+        async def handle_detail(item):
+            await asyncio.sleep(0.01)
+            details.append(item)
+            await comment_stage.put(item * 10)
+
+        async def handle_comment(item):
+            if item == 30:
+                raise ValueError("blocked")
+            comments.append(item)
+
+        pipeline.add_stage("detail", handle_detail, workers=3, max_size=2)
+        comment_stage = pipeline.add_stage("comments", handle_comment, workers=2)
+
+        async def produce():
+            for i in range(1, 6):
+                await pipeline.stages[0].put(i)
+
+        await pipeline.run(produce())
+
+        self.assertEqual(sorted(details), [1, 2, 3, 4, 5])
+        self.assertEqual(sorted(comments), [10, 20, 40, 50])
+        self.assertEqual(comment_stage.processed, 4)
+        self.assertEqual(comment_stage.failed, 1)
+
+    async def test_stages_run_concurrently(self):
+        pipeline = CrawlerPipeline("test", metrics_interval=0)
+        running, peak = 0, 0
+
+        async def handle(_):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        stage = pipeline.add_stage("detail", handle, workers=4)
+
+        async def produce():
+            for i in range(8):
+                await stage.put(i)
+
+        await pipeline.run(produce())
+        self.assertEqual(peak, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
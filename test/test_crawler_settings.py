@@ -0,0 +1,44 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+from unittest import mock
+
+import config
+from base.crawler_settings import CrawlerSettings
+
+
+class TestCrawlerSettings(unittest.TestCase):
+
+    @mock.patch.multiple(config, KEYWORDS="a,b", CRAWLER_TYPE="search",
+                         WEIBO_SPECIFIED_ID_LIST=["1", "2"], BILI_CREATOR_ID_LIST=["9"])
+    def test_from_config(self):
+        weibo = CrawlerSettings.from_config("wb")
+        self.assertEqual(weibo.platform, "wb")
+        self.assertEqual(weibo.keywords, "a,b")
+        self.assertEqual(weibo.specified_id_list, ("1", "2"))
+        self.assertEqual(CrawlerSettings.from_config("bili").creator_id_list, ("9",))
+
+    def test_overrides_do_not_touch_config(self):
+        keywords, crawler_type = config.KEYWORDS, config.CRAWLER_TYPE
+        weibo = CrawlerSettings.from_config("wb", keywords="x", crawler_type="detail", specified_id_list=["3"])
+        zhihu = CrawlerSettings.from_config("zhihu", keywords="y", enable_get_comments=False)
+
+        self.assertEqual((weibo.keywords, weibo.crawler_type, weibo.specified_id_list), ("x", "detail", ("3",)))
+        self.assertEqual((zhihu.keywords, zhihu.enable_get_comments), ("y", False))
+        self.assertEqual((config.KEYWORDS, config.CRAWLER_TYPE), (keywords, crawler_type))
+        with self.assertRaises(AttributeError):
+            weibo.keywords = "z"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import config
+from tools.data_file_reader import find_data_files, iter_json_array, iter_jsonl
+
+
+class TestDataFileReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_iter_json_array_across_chunks(self):
+        items = [{"note_id": str(i), "content": "内容]},{" * (i % 7)} for i in range(300)]
+        file_path = self.root / "search_contents.json"
+        file_path.write_text(json.dumps(items, ensure_ascii=False, indent=4), encoding="utf-8")
+        self.assertEqual(list(iter_json_array(str(file_path), chunk_size=16)), items)
+
+    def test_iter_json_array_dict_wrapper_and_empty(self):
+        file_path = self.root / "comments.json"
+        file_path.write_text(json.dumps({"total": 2, "comments": [{"a": 1}, {"a": 2}]}), encoding="utf-8")
+        self.assertEqual(list(iter_json_array(str(file_path))), [{"a": 1}, {"a": 2}])
+        file_path.write_text("[]", encoding="utf-8")
+        self.assertEqual(list(iter_json_array(str(file_path))), [])
+
+    def test_iter_jsonl_skips_broken_line(self):
+        file_path = self.root / "search_comments.jsonl"
+        file_path.write_text('{"a": 1}\n\n{"a": 2}\n{"a": ', encoding="utf-8")
+        self.assertEqual(list(iter_jsonl(str(file_path))), [{"a": 1}, {"a": 2}])
+
+    def test_find_data_files_prefers_jsonl(self):
+        for name in ("json/search_contents_2025-12-15.json", "jsonl/search_contents_2025-12-15.jsonl",
+                     "json/search_contents_2025-12-16.json", "json/search_comments_2025-12-15.json"):
+            (self.root / name).parent.mkdir(exist_ok=True)
+            (self.root / name).write_text("[]", encoding="utf-8")
+
+        files = find_data_files(self.root, "search_contents")
+        self.assertEqual([f.name for f in files], ["search_contents_2025-12-15.jsonl", "search_contents_2025-12-16.json"])
+        files = find_data_files(self.root, "search_contents", ["2025-12-16"])
+        self.assertEqual([f.name for f in files], ["search_contents_2025-12-16.json"])
+
+
+class TestDataPostProcessorLoading(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.config_patch = mock.patch.object(config, "LLM_VERDICT_CACHE_PATH", "")
+        self.config_patch.start()
+
+    def tearDown(self):
+        self.config_patch.stop()
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def write(path: str, items, json_lines: bool = False):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            if json_lines:
+                f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+            else:
+                json.dump(items, f, ensure_ascii=False, indent=4)
+
+    async def test_load_contents_and_comments(self):
+        from data_postprocessor import DataPostProcessor
+
+        self.write("data/weibo/json/search_contents_2025-12-15.json", [{"note_id": 1, "content": "a"}, {"note_id": 2}])
+        self.write("data/weibo/jsonl/search_contents_2025-12-16.jsonl", [{"note_id": "2"}, {"note_id": 3}], json_lines=True)
+        self.write("data/weibo/json/search_comments_2025-12-15.json",
+                   [{"note_id": 1, "comment_id": 10}, {"note_id": 1, "comment_id": 11}])
+        self.write("data/weibo/jsonl/search_comments_2025-12-16.jsonl",
+                   [{"note_id": 1, "comment_id": 11}, {"note_id": 3, "comment_id": 30}], json_lines=True)
+
+        processor = DataPostProcessor("事件")
+        all_data = await processor.load_all_platform_data()
+        self.assertEqual([item["note_id"] for item in all_data["weibo"]], [1, 2, 3])
+        self.assertEqual(all_data["bilibili"], [])
+
+        processor.relevant_ids["weibo"] = ["1"]
+        try:
+            processor.index_comments()
+            processor.merge_comments_to_data(all_data)
+        finally:
+            processor.close_comment_index()
+            processor.manifest.close()
+        self.assertEqual([c["comment_id"] for c in all_data["weibo"][0]["comments"]], ["10", "11"])
+        # 不相关的内容不合并评论
+        self.assertNotIn("comments", all_data["weibo"][2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+
+from unittest import IsolatedAsyncioTestCase
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database.db_batch import batch_upsert
+from database.models import Base, XhsNoteComment
+
+
+class TestBatchUpsert(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_insert_then_update_existing(self):
+        async with AsyncSession(self.engine) as session:
+            await batch_upsert(
+                session, XhsNoteComment,
+                [{"comment_id": "1", "like_count": "1"}, {"comment_id": "2", "like_count": "2"}],
+                key_column="comment_id", insert_defaults={"add_ts": 100},
+            )
+            await batch_upsert(
+                session, XhsNoteComment,
+                [{"comment_id": "2", "like_count": "20", "content": "ignored"}, {"comment_id": "3", "like_count": "3"}],
+                key_column="comment_id", insert_defaults={"add_ts": 200}, update_columns=["like_count"],
+            )
+            await session.commit()
+
+            rows = (await session.execute(select(XhsNoteComment).order_by(XhsNoteComment.comment_id))).scalars().all()
+            self.assertEqual([r.comment_id for r in rows], ["1", "2", "3"])
+            self.assertEqual([r.like_count for r in rows], ["1", "20", "3"])
+            self.assertEqual([r.add_ts for r in rows], [100, 100, 200])
+            self.assertIsNone(rows[1].content)
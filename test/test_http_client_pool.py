@@ -0,0 +1,55 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+from unittest import IsolatedAsyncioTestCase
+
+from tools.http_client_pool import HttpClientPool
+
+
+class TestHttpClientPool(IsolatedAsyncioTestCase):
+
+    async def test_reuses_one_client_per_proxy(self):
+        pool = HttpClientPool(max_clients=2)
+        direct = pool.get_client()
+        proxied = pool.get_client("http://127.0.0.1:8001")
+
+        self.assertIs(pool.get_client(), direct)
+        self.assertIs(pool.get_client("http://127.0.0.1:8001"), proxied)
+        self.assertIsNot(direct, proxied)
+        await pool.aclose()
+
+    async def test_evicts_least_recently_used_proxy(self):
+        pool = HttpClientPool(max_clients=2)
+        first = pool.get_client("http://127.0.0.1:8001")
+        second = pool.get_client("http://127.0.0.1:8002")
+        pool.get_client("http://127.0.0.1:8001")
+        pool.get_client("http://127.0.0.1:8003")
+
+        self.assertEqual(list(pool._clients), ["http://127.0.0.1:8001", "http://127.0.0.1:8003"])
+        self.assertFalse(first.is_closed)
+        await pool.aclose()
+        self.assertTrue(second.is_closed)
+        self.assertEqual(len(pool._closing), 0)
+
+    async def test_evicted_client_is_closed_and_recreated(self):
+        pool = HttpClientPool(max_clients=1)
+        first = pool.get_client("http://127.0.0.1:8001")
+        pool.get_client("http://127.0.0.1:8002")
+        await pool.aclose()
+        self.assertTrue(first.is_closed)
+
+        # aclose 之后再次获取时重新创建连接池
+        recreated = pool.get_client("http://127.0.0.1:8001")
+        self.assertIsNot(recreated, first)
+        self.assertFalse(recreated.is_closed)
+        await pool.aclose()
+        self.assertTrue(recreated.is_closed)
@@ -0,0 +1,39 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import unittest
+
+from tools.importtime_benchmark import ImportTime, parse_importtime
+
+SAMPLE_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      1404 |      50178 |     asyncio.base_events
+import time:       435 |      56821 |   asyncio
+some unrelated warning line
+import time:      1569 |     583087 | main
+"""
+
+
+class TestImportTimeBenchmark(unittest.TestCase):
+
+    def test_parse_importtime(self):
+        items = parse_importtime(SAMPLE_OUTPUT)
+        self.assertEqual(len(items), 4)
+        self.assertEqual(items[0], ImportTime("_io", 120, 120))
+        self.assertEqual(items[-1], ImportTime("main", 1569, 583087))
+
+    def test_parse_importtime_empty(self):
+        self.assertEqual(parse_importtime(""), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+import execjs
+
+from tools.js_worker import JsWorkerError, JsWorkerPool
+
+# 固定随机数和时间，使签名结果可复现
+DETERMINISTIC_PRELUDE = "Math.random = function () { return 0.5; };\nDate.now = function () { return 1700000000000; };\n"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+
+
+@unittest.skipUnless(shutil.which("node"), "node is not installed")
+class TestJsWorkerPool(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_js(self, source: str) -> str:
+        js_path = os.path.join(self.tmp_dir.name, "sign.js")
+        with open(js_path, "w", encoding="utf-8") as f:
+            f.write(source)
+        return js_path
+
+    async def test_douyin_sign_matches_execjs(self):
+        with open("libs/douyin.js", encoding="utf-8-sig") as f:
+            source = DETERMINISTIC_PRELUDE + f.read()
+        js_path = self.write_js(source)
+        params = "device_platform=webapp&aid=6383&aweme_id=7300000000000000000"
+        expected = execjs.compile(source).call("sign_datail", params, USER_AGENT)
+
+        pool = JsWorkerPool(js_path, size=2)
+        try:
+            results = await asyncio.gather(*(pool.call("sign_datail", params, USER_AGENT) for _ in range(5)))
+        finally:
+            await pool.close()
+        self.assertEqual(results, [expected] * 5)
+
+    async def test_zhihu_sign_matches_execjs(self):
+        with open("libs/zhihu.js", encoding="utf-8-sig") as f:
+            source = DETERMINISTIC_PRELUDE + f.read()
+        js_path = self.write_js(source)
+        url, cookies = "/api/v4/search_v3?q=python&offset=0&limit=20", "d_c0=AJCXmFAbZRqPTiW0n8vtHbPcKlNb6hOEbFo=|1700000000"
+        expected = execjs.compile(source).call("get_sign", url, cookies)
+
+        pool = JsWorkerPool(js_path, size=2)
+        try:
+            results = await asyncio.gather(*(pool.call("get_sign", url, cookies) for _ in range(3)))
+        finally:
+            await pool.close()
+        self.assertEqual(results, [expected] * 3)
+
+    async def test_js_error_keeps_worker_usable(self):
+        js_path = self.write_js("function add(a, b) { return a + b; }\nfunction fail() { throw new Error('boom'); }\n")
+        pool = JsWorkerPool(js_path, size=1)
+        try:
+            with self.assertRaises(JsWorkerError):
+                await pool.call("fail")
+            self.assertEqual(await pool.call("add", 1, 2), 3)
+        finally:
+            await pool.close()
+
+    async def test_restart_after_process_exit(self):
+        js_path = self.write_js("function add(a, b) { return a + b; }\nfunction quit() { process.exit(1); }\n")
+        pool = JsWorkerPool(js_path, size=1)
+        try:
+            with self.assertRaises(JsWorkerError):
+                await pool.call("quit")
+            self.assertEqual(await pool.call("add", "a", "b"), "ab")
+        finally:
+            await pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
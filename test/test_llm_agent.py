@@ -0,0 +1,79 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from ai_agent import LLMAgent, RelevanceVerdictCache
+
+
+class TestLLMAgentBatch(IsolatedAsyncioTestCase):
+
+    async def test_batch_verdicts_with_single_item_fallback(self):
+        agent = LLMAgent(api_key="test-key")
+        prompts = []
+
+        async def fake_call_llm(prompt, max_tokens=1000):
+            prompts.append(prompt)
+            if len(prompts) == 1:
+                # 批量结果缺少第 2 条
+                return "```json\n" + json.dumps([
+                    {"id": "1", "is_relevant": True, "score": 0.9, "reason": "相关"},
+                    {"id": "3", "is_relevant": False, "score": 0.1, "reason": "无关"},
+                ]) + "\n```"
+            return json.dumps({"is_relevant": True, "score": 0.6, "reason": "单条判断"})
+
+        agent._call_llm = fake_call_llm
+        contents = {
+            "a": {"content": "第一条足够长的微博内容文本"},
+            "b": {"content": "第二条足够长的微博内容文本"},
+            "c": {"content": "第三条足够长的微博内容文本"},
+            "d": {"content": "太短"},
+        }
+        verdicts = await agent.judge_relevance_batch(contents, "某地暴雨事件", platform="weibo")
+
+        self.assertEqual(len(prompts), 2)
+        self.assertEqual(prompts[0].count("某地暴雨事件"), 1)
+        self.assertEqual(verdicts["a"]["score"], 0.9)
+        self.assertEqual(verdicts["b"]["reason"], "单条判断")
+        self.assertFalse(verdicts["c"]["is_relevant"])
+        self.assertEqual(verdicts["d"]["reason"], "内容文本过短")
+
+    def test_split_batches_by_items_and_chars(self):
+        agent = LLMAgent(api_key="test-key")
+        contents = {str(i): {"content": "x" * 100} for i in range(7)}
+        batches = agent.split_relevance_batches(contents, "weibo", max_items=3, max_chars=250)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 2, 1])
+
+    async def test_verdict_cache_skips_repeated_calls(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = RelevanceVerdictCache(os.path.join(tmp_dir, "verdicts.db"))
+            agent = LLMAgent(api_key="test-key", verdict_cache=cache)
+            calls = []
+
+            async def fake_call_llm(prompt, max_tokens=1000):
+                calls.append(prompt)
+                return json.dumps({"is_relevant": False, "score": 0.2, "reason": "无关"})
+
+            agent._call_llm = fake_call_llm
+            content = {"content": "一条足够长的微博内容文本"}
+            first = await agent.judge_relevance(content, "某地暴雨事件", platform="weibo")
+            second = await agent.judge_relevance(content, "某地暴雨事件", platform="weibo")
+            await agent.judge_relevance(content, "另一个事件描述", platform="weibo")
+            cache.close()
+
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(first, second)
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
@@ -0,0 +1,36 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from ai_agent.rate_limiter import LLMRateLimiter
+
+
+class TestLLMRateLimiter(IsolatedAsyncioTestCase):
+
+    async def test_waits_when_token_budget_exhausted(self):
+        limiter = LLMRateLimiter(requests_per_minute=600, tokens_per_minute=120)
+        start = time.monotonic()
+        await limiter.acquire(120)
+        self.assertLess(time.monotonic() - start, 0.1)
+        # 每秒补充 2 个 token，再申请 1 个需要等待约 0.5 秒
+        await limiter.acquire(1)
+        self.assertGreaterEqual(time.monotonic() - start, 0.4)
+
+    async def test_unlimited_when_zero(self):
+        limiter = LLMRateLimiter()
+        start = time.monotonic()
+        for _ in range(100):
+            await limiter.acquire(10000)
+        self.assertLess(time.monotonic() - start, 0.1)
@@ -0,0 +1,72 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import os
+import tempfile
+import unittest
+
+from store.media_blob_store import MediaBlobStore, write_media_file
+
+
+class TestMediaBlobStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.blob_store = MediaBlobStore(os.path.join(self.tmp_dir.name, "blobs"))
+
+    def tearDown(self):
+        self.blob_store.close()
+        self.tmp_dir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp_dir.name, name)
+
+    def blob_count(self) -> int:
+        return sum(len(files) for root, _, files in os.walk(self.blob_store.root) if root != self.blob_store.root)
+
+    async def test_save_bytes_deduplicates_content(self):
+        await self.blob_store.save_bytes(b"same image", self.path("note1.jpg"))
+        await self.blob_store.save_bytes(b"same image", self.path("note2.jpg"))
+        await self.blob_store.save_bytes(b"other image", self.path("note3.jpg"))
+
+        self.assertTrue(os.path.samefile(self.path("note1.jpg"), self.path("note2.jpg")))
+        with open(self.path("note2.jpg"), "rb") as f:
+            self.assertEqual(f.read(), b"same image")
+        self.assertEqual(self.blob_count(), 2)
+        self.assertEqual(self.blob_store.dedup_hits, 1)
+
+    async def test_overwrite_does_not_change_linked_files(self):
+        await self.blob_store.save_bytes(b"same image", self.path("note1.jpg"))
+        await self.blob_store.save_bytes(b"same image", self.path("note2.jpg"))
+        await write_media_file(self.path("note1.jpg"), b"new image")
+
+        with open(self.path("note1.jpg"), "rb") as f:
+            self.assertEqual(f.read(), b"new image")
+        with open(self.path("note2.jpg"), "rb") as f:
+            self.assertEqual(f.read(), b"same image")
+
+    async def test_ingest_downloaded_file_and_skip_by_url(self):
+        for name in ("a.mp4", "b.mp4"):
+            with open(self.path(name), "wb") as f:
+                f.write(b"video bytes")
+        await self.blob_store.ingest_file(self.path("a.mp4"), "https://cdn.test/a.mp4")
+        await self.blob_store.ingest_file(self.path("b.mp4"), "https://cdn.test/b.mp4")
+        self.assertTrue(os.path.samefile(self.path("a.mp4"), self.path("b.mp4")))
+        self.assertEqual(self.blob_count(), 1)
+
+        self.assertTrue(self.blob_store.link_existing("https://cdn.test/a.mp4", self.path("c.mp4")))
+        self.assertTrue(os.path.samefile(self.path("a.mp4"), self.path("c.mp4")))
+        self.assertFalse(self.blob_store.link_existing("https://cdn.test/unknown.mp4", self.path("d.mp4")))
+        self.assertFalse(os.path.exists(self.path("d.mp4")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+from unittest import mock
+
+import config
+from tools import media_download_manager
+from tools.media_download_manager import (MediaDownloadManager, close_media_download_manager,
+                                          get_media_download_manager)
+
+
+class TestMediaDownloadManager(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(config, "ENABLE_MEDIA_DEDUP", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_per_host_concurrency(self):
+        manager = MediaDownloadManager(workers=8, per_host_concurrency=2, max_retries=0, max_size=0)
+        running, peak = {}, {}
+
+        def make_download(host: str):
+            async def download(save_path: str) -> bool:
+                running[host] = running.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), running[host])
+                await asyncio.sleep(0.02)
+                running[host] -= 1
+                return True
+            return download
+
+        for i in range(6):
+            for host in ("a.cdn.test", "b.cdn.test"):
+                await manager.submit(f"https://{host}/{i}.jpg", f"/tmp/not-exist/{i}.jpg", make_download(host))
+        await manager.close()
+
+        self.assertEqual(peak, {"a.cdn.test": 2, "b.cdn.test": 2})
+        self.assertEqual(manager.succeeded, 12)
+        self.assertEqual(manager.failed, 0)
+
+    async def test_retry_then_give_up(self):
+        manager = MediaDownloadManager(workers=2, per_host_concurrency=2, max_retries=2, retry_delay=0)
+        calls = {"flaky": 0, "broken": 0}
+
+        async def flaky(save_path: str) -> bool:
+            calls["flaky"] += 1
+            return calls["flaky"] > 1
+
+        async def broken(save_path: str) -> bool:
+            calls["broken"] += 1
+            raise RuntimeError("connection reset")
+
+        await manager.submit("https://cdn.test/1.jpg", "/tmp/not-exist/1.jpg", flaky)
+        await manager.submit("https://cdn.test/2.jpg", "/tmp/not-exist/2.jpg", broken)
+        await manager.close()
+
+        self.assertEqual(calls, {"flaky": 2, "broken": 3})
+        self.assertEqual(manager.succeeded, 1)
+        self.assertEqual(manager.failed, 1)
+
+    @mock.patch.object(media_download_manager, "close_media_blob_store")
+    async def test_close_per_platform(self, close_blob_store):
+        release = asyncio.Event()
+        downloaded = []
+
+        async def slow(save_path: str) -> bool:
+            await release.wait()
+            downloaded.append(save_path)
+            return True
+
+        await get_media_download_manager("xhs").submit("https://a.cdn.test/1.jpg", "/tmp/not-exist/xhs.jpg", slow)
+        await get_media_download_manager("dy").submit("https://b.cdn.test/1.jpg", "/tmp/not-exist/dy.jpg", slow)
+        self.assertIsNot(get_media_download_manager("xhs"), get_media_download_manager("dy"))
+
+        # 一个平台等待下载完成时，另一个平台关闭只等待自己的下载任务
+        closing_xhs = asyncio.create_task(close_media_download_manager("xhs"))
+        await asyncio.sleep(0.05)
+        closing_dy = asyncio.create_task(close_media_download_manager("dy"))
+        await asyncio.sleep(0.05)
+        self.assertFalse(closing_dy.done())
+        release.set()
+        await asyncio.gather(closing_xhs, closing_dy)
+
+        self.assertEqual(sorted(downloaded), ["/tmp/not-exist/dy.jpg", "/tmp/not-exist/xhs.jpg"])
+        # 最后一个下载管理器关闭后才关闭内容寻址存储
+        close_blob_store.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
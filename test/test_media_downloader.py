@@ -0,0 +1,113 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from tools.media_downloader import _write_part_meta, part_file_name, part_meta_file_name, stream_download
+
+CONTENT = bytes(range(256)) * 40
+URL = "https://cdn.test/v.mp4"
+ETAG = '"v1"'
+
+
+def make_client(support_range: bool, requests: list, range_offset: int = 0) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        range_header = request.headers.get("Range")
+        if support_range and range_header and request.headers.get("If-Range") == ETAG:
+            # range_offset 模拟服务端返回了与请求不一致的分段
+            start = int(range_header[len("bytes="):-1]) - range_offset
+            headers = {"ETag": ETAG, "Content-Range": f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}"}
+            return httpx.Response(206, content=CONTENT[start:], headers=headers)
+        return httpx.Response(200, content=CONTENT, headers={"ETag": ETAG})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestStreamDownload(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.save_path = os.path.join(self.tmp_dir.name, "video.mp4")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_saved(self) -> bytes:
+        with open(self.save_path, "rb") as f:
+            return f.read()
+
+    async def test_download_writes_file_and_removes_part(self):
+        requests = []
+        async with make_client(True, requests) as client:
+            self.assertTrue(await stream_download(client, URL, self.save_path, chunk_size=1000))
+        self.assertEqual(self.read_saved(), CONTENT)
+        self.assertFalse(os.path.exists(part_file_name(self.save_path)))
+        self.assertNotIn("Range", requests[0].headers)
+
+    def write_part(self, content: bytes, validator=None):
+        with open(part_file_name(self.save_path), "wb") as f:
+            f.write(content)
+        if validator:
+            _write_part_meta(self.save_path, URL, validator)
+
+    async def test_resume_from_part_file(self):
+        self.write_part(CONTENT[:3000], ETAG)
+        requests = []
+        async with make_client(True, requests) as client:
+            self.assertTrue(await stream_download(client, URL, self.save_path))
+        self.assertEqual(requests[0].headers["Range"], "bytes=3000-")
+        self.assertEqual(requests[0].headers["If-Range"], ETAG)
+        self.assertEqual(self.read_saved(), CONTENT)
+        self.assertFalse(os.path.exists(part_meta_file_name(self.save_path)))
+
+    async def test_restart_when_range_not_supported(self):
+        self.write_part(b"stale", ETAG)
+        async with make_client(False, []) as client:
+            self.assertTrue(await stream_download(client, URL, self.save_path))
+        self.assertEqual(self.read_saved(), CONTENT)
+
+    async def test_restart_when_part_has_no_validator(self):
+        self.write_part(b"stale")
+        requests = []
+        async with make_client(True, requests) as client:
+            self.assertTrue(await stream_download(client, URL, self.save_path))
+        self.assertNotIn("Range", requests[0].headers)
+        self.assertEqual(self.read_saved(), CONTENT)
+
+    async def test_restart_when_resource_changed(self):
+        self.write_part(b"old version", '"v0"')
+        async with make_client(True, []) as client:
+            self.assertTrue(await stream_download(client, URL, self.save_path))
+        self.assertEqual(self.read_saved(), CONTENT)
+
+    async def test_restart_when_content_range_mismatch(self):
+        self.write_part(CONTENT[:3000], ETAG)
+        requests = []
+        async with make_client(True, requests, range_offset=100) as client:
+            self.assertTrue(await stream_download(client, URL, self.save_path))
+        self.assertEqual(len(requests), 2)
+        self.assertNotIn("Range", requests[1].headers)
+        self.assertEqual(self.read_saved(), CONTENT)
+
+    async def test_http_error_returns_false(self):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+        async with client:
+            self.assertFalse(await stream_download(client, URL, self.save_path))
+        self.assertFalse(os.path.exists(self.save_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
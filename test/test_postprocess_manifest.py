@@ -0,0 +1,164 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import config
+from tools.postprocess_manifest import PostprocessManifest, iter_new_records
+
+
+class TestPostprocessManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.db_path = str(self.root / "manifest.db")
+        self.manifest = PostprocessManifest("事件", self.db_path)
+
+    def tearDown(self):
+        self.manifest.close()
+        self.tmp_dir.cleanup()
+
+    def append(self, file_path: Path, items, partial: str = ""):
+        with open(file_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(item) + "\n" for item in items)
+            f.write(partial)
+
+    def process(self, kind: str, file_path: Path):
+        """读取需要处理的记录并提交清单，返回读到的记录"""
+        change = self.manifest.get_change(kind, "weibo", file_path)
+        if change is None:
+            return None
+        items = []
+        offset, records = change.offset, change.records
+        for item, offset in iter_new_records(change):
+            items.append(item)
+            records += 1
+        self.manifest.mark_processed(kind, "weibo", change, offset, records)
+        self.manifest.commit()
+        return items
+
+    def test_jsonl_only_new_records(self):
+        file_path = self.root / "search_contents_2025-12-15.jsonl"
+        # 最后一行是爬虫还没写完的半行，这次不读取
+        self.append(file_path, [{"note_id": 1}, {"note_id": 2}], partial='{"note_id": ')
+        self.assertEqual(self.process("search_contents", file_path), [{"note_id": 1}, {"note_id": 2}])
+        self.assertIsNone(self.process("search_contents", file_path))
+
+        with open(file_path, "a", encoding="utf-8") as f:
+            f.write('3}\n')
+        self.append(file_path, [{"note_id": 4}])
+        self.assertEqual(self.process("search_contents", file_path), [{"note_id": 3}, {"note_id": 4}])
+
+        # 已处理的部分被改写时从头处理
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps({"note_id": i * 10}) for i in range(1, 5)) + "\n")
+        self.assertEqual(len(self.process("search_contents", file_path)), 4)
+
+    def test_json_array_reprocessed_on_change(self):
+        file_path = self.root / "search_contents_2025-12-15.json"
+        file_path.write_text(json.dumps([{"note_id": 1}]), encoding="utf-8")
+        self.assertEqual(self.process("search_contents", file_path), [{"note_id": 1}])
+        self.assertIsNone(self.process("search_contents", file_path))
+
+        file_path.write_text(json.dumps([{"note_id": 1}, {"note_id": 2}]), encoding="utf-8")
+        self.assertEqual(len(self.process("search_contents", file_path)), 2)
+
+    def test_uncommitted_and_scoped(self):
+        file_path = self.root / "search_contents_2025-12-15.jsonl"
+        self.append(file_path, [{"note_id": 1}])
+        change = self.manifest.get_change("search_contents", "weibo", file_path)
+        self.manifest.mark_processed("search_contents", "weibo", change, os.path.getsize(file_path), 1)
+        # 没有 commit 的记录不生效
+        self.assertIsNotNone(self.manifest.get_change("search_contents", "weibo", file_path))
+        self.manifest.commit()
+        self.assertIsNone(self.manifest.get_change("search_contents", "weibo", file_path))
+
+        # 不同事件、不同类型互不影响
+        other = PostprocessManifest("另一个事件", self.db_path)
+        try:
+            self.assertIsNotNone(other.get_change("search_contents", "weibo", file_path))
+        finally:
+            other.close()
+        self.assertIsNotNone(self.manifest.get_change("search_comments", "weibo", file_path))
+
+        self.manifest.reset()
+        self.assertIsNotNone(self.manifest.get_change("search_contents", "weibo", file_path))
+
+
+
+class TestIncrementalPostprocess(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.config_patch = mock.patch.object(config, "LLM_VERDICT_CACHE_PATH", "")
+        self.config_patch.start()
+        Path("data/bilibili/jsonl").mkdir(parents=True)
+
+    def tearDown(self):
+        self.config_patch.stop()
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def append(name: str, items):
+        with open(f"data/bilibili/jsonl/{name}", "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+
+    async def run_processor(self):
+        """运行一次后处理，返回交给大模型判断的内容ID"""
+        from data_postprocessor import DataPostProcessor
+
+        judged = []
+
+        async def judge(batch, event_description, platform=None):
+            judged.extend(batch)
+            return {item_id: {"is_relevant": True, "score": 1.0, "reason": ""} for item_id in batch}
+
+        processor = DataPostProcessor("事件")
+        with mock.patch.object(processor.llm_agent, "judge_relevance_batch", side_effect=judge):
+            await processor.process()
+        return judged
+
+    @staticmethod
+    def load_latest():
+        with open("data/relevant/relevant_data_latest.json", encoding="utf-8") as f:
+            return {item["relevance_id"]: item for item in json.load(f)}
+
+    async def test_rerun_only_processes_new_records(self):
+        self.append("search_contents_2025-12-15.jsonl", [{"video_id": 1, "title": "a"}])
+        self.append("search_comments_2025-12-15.jsonl", [{"video_id": 1, "comment_id": 10}])
+        self.assertEqual(await self.run_processor(), ["1"])
+        self.assertEqual([c["comment_id"] for c in self.load_latest()["1"]["comments"]], ["10"])
+
+        self.append("search_contents_2025-12-15.jsonl", [{"video_id": 2, "title": "b"}])
+        self.append("search_comments_2025-12-15.jsonl", [{"video_id": 1, "comment_id": 11}])
+        self.assertEqual(await self.run_processor(), ["2"])
+        latest = self.load_latest()
+        self.assertEqual(sorted(latest), ["1", "2"])
+        self.assertEqual([c["comment_id"] for c in latest["1"]["comments"]], ["10", "11"])
+
+        # 没有变化时不再判断，也不重新保存
+        mtime = os.path.getmtime("data/relevant/relevant_data_latest.json")
+        self.assertEqual(await self.run_processor(), [])
+        self.assertEqual(os.path.getmtime("data/relevant/relevant_data_latest.json"), mtime)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from tools.rate_limiter import EndpointRateLimiter, PlatformRateLimiter
+
+
+class TestRateLimiter(IsolatedAsyncioTestCase):
+
+    async def test_requests_are_spaced_by_rate(self):
+        limiter = EndpointRateLimiter("test", rate=20, min_rate=1, max_rate=20)
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire()
+        # 第一个请求立即放行，之后每个间隔 0.05 秒
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_aimd(self):
+        limiter = EndpointRateLimiter("test", rate=1, min_rate=0.2, max_rate=1.5, increase_step=0.25, decrease_factor=0.5, cooldown=0)
+        limiter.on_success()
+        self.assertAlmostEqual(limiter.rate, 1.25)
+        limiter.on_success()
+        limiter.on_success()
+        self.assertAlmostEqual(limiter.rate, 1.5)
+        for _ in range(5):
+            limiter.on_throttled()
+        self.assertAlmostEqual(limiter.rate, 0.2)
+
+    def test_endpoint_ignores_query(self):
+        self.assertEqual(PlatformRateLimiter.endpoint_of("https://api.bilibili.com/x/v2/reply/wbi/main?oid=1"), "/x/v2/reply/wbi/main")
+
+    def test_endpoint_replaces_ids_in_path(self):
+        endpoint_of = PlatformRateLimiter.endpoint_of
+        self.assertEqual(
+            endpoint_of("https://www.zhihu.com/api/v4/comment_v5/answers/123/root_comment"),
+            endpoint_of("https://www.zhihu.com/api/v4/comment_v5/answers/456/root_comment"),
+        )
+        self.assertEqual(endpoint_of("https://www.zhihu.com/question/1/answer/2"), "/question/{id}/answer/{id}")
+        self.assertEqual(endpoint_of("https://www.xiaohongshu.com/explore/64a1b2c3d4e5f60718293a4b"), "/explore/{id}")
+        self.assertEqual(endpoint_of("https://www.bilibili.com/video/BV1xx411c7mD"), "/video/{id}")
+        self.assertEqual(endpoint_of("https://www.zhihu.com/api/v4/search_v3"), "/api/v4/search_v3")
@@ -0,0 +1,119 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from typing import Dict, List
+
+from base.base_crawler import AbstractStore
+from store.write_behind import WriteBehindStore, close_write_behind_stores, get_write_behind_store
+from tools.seen_index import KIND_CONTENT, SeenIndex
+
+
+class RecordingStore(AbstractStore):
+
+    def __init__(self):
+        self.calls = []
+
+    async def store_content(self, content_item: Dict):
+        pass
+
+    async def store_comment(self, comment_item: Dict):
+        self.calls.append(("comment", comment_item["id"]))
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        self.calls.append(("comments", [item["id"] for item in comment_items]))
+
+    async def store_creator(self, creator: Dict):
+        pass
+
+
+class BlockingStore(RecordingStore):
+    """release 之前的写入一直阻塞，模拟还没有写入存储的数据"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def store_content(self, content_item: Dict):
+        await self.release.wait()
+
+
+class TestSeenIndex(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "seen_index.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_content_freshness(self):
+        index = SeenIndex("bili", self.db_path, freshness_hours=1)
+        self.assertFalse(index.is_content_fresh(1001))
+        index.mark_content_seen(1001)
+        self.assertTrue(index.is_content_fresh("1001"))
+        self.assertFalse(SeenIndex("xhs", self.db_path, freshness_hours=1).is_content_fresh(1001))
+
+        # 超过新鲜期后需要重新爬取
+        index._conn.execute("UPDATE seen_item SET crawled_at = ?", (int(time.time()) - 7200,))
+        self.assertFalse(index.is_content_fresh(1001))
+        self.assertEqual(index.fresh_ids(KIND_CONTENT, [1001, 1002]), set())
+        index.close()
+
+    def test_content_scoped_by_source(self):
+        index = SeenIndex("bili", self.db_path, freshness_hours=1)
+        index.mark_content_seen(1001, "BV1xx", source="python")
+        self.assertTrue(index.is_content_fresh(1001, "python"))
+        self.assertTrue(index.is_content_fresh("BV1xx", "python"))
+        # 换一个关键词搜到同一作品时仍要以新的关键词保存
+        self.assertFalse(index.is_content_fresh(1001, "golang"))
+        self.assertFalse(index.is_content_fresh(1001))
+        index.close()
+
+    def test_comments_pending_not_skipped(self):
+        index = SeenIndex("bili", self.db_path, freshness_hours=1)
+        index.mark_content_seen(1001)
+        self.assertFalse(index.is_content_fresh(1001, comments_pending=True))
+        index.close()
+
+    async def test_mark_waits_until_data_is_written(self):
+        index = SeenIndex("test", self.db_path, freshness_hours=1)
+        store = get_write_behind_store("test", BlockingStore)
+        await store.store_content({"id": 1001})
+        index.mark_content_seen(1001)
+        await asyncio.sleep(0.05)
+        self.assertFalse(index.is_content_fresh(1001))
+
+        store.store.release.set()
+        await close_write_behind_stores("test")
+        self.assertTrue(index.is_content_fresh(1001))
+        index.close()
+
+    async def test_write_behind_skips_stored_comments(self):
+        index = SeenIndex("bili", self.db_path, freshness_hours=24)
+        recording_store = RecordingStore()
+        store = WriteBehindStore(recording_store, flush_interval=0.01, seen_index=index)
+        await store.store_comments_batch([{"id": 1, "comment_id": "c1"}, {"id": 2, "comment_id": "c2"}])
+        await store.flush()
+        await store.store_comments_batch([{"id": 2, "comment_id": "c2"}, {"id": 3, "comment_id": "c3"}])
+        await store.store_comment({"id": 1, "comment_id": "c1"})
+        await store.close()
+
+        self.assertEqual(recording_store.calls, [("comments", [1, 2]), ("comments", [3])])
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
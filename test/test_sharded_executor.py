@@ -0,0 +1,145 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
+
+import config
+from base.base_crawler import AbstractStore
+from base.crawler_settings import CrawlerSettings
+from store.weibo import WeibostoreFactory
+from store.write_behind import close_write_behind_stores
+from tools.sharded_executor import ShardedCrawlExecutor, shard_settings
+from var import crawler_type_var
+
+
+class RecordingStore(AbstractStore):
+
+    def __init__(self):
+        self.calls = []
+
+    async def store_content(self, content_item: Dict):
+        self.calls.append(("content", content_item["id"]))
+
+    async def store_comment(self, comment_item: Dict):
+        self.calls.append(("comment", comment_item["id"]))
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        self.calls.extend(("comment", item["id"]) for item in comment_items)
+
+    async def store_creator(self, creator: Dict):
+        self.calls.append(("creator", creator["id"]))
+
+
+class FakeCrawler:
+    """子进程中运行的爬虫：每个关键词保存一条微博"""
+
+    def __init__(self, settings: CrawlerSettings):
+        self.settings = settings
+
+    async def start(self):
+        crawler_type_var.set(self.settings.crawler_type)
+        store = WeibostoreFactory.create_store()
+        for keyword in self.settings.keywords.split(","):
+            await store.store_content({"id": keyword})
+
+    async def close(self):
+        await close_write_behind_stores(self.settings.platform)
+
+
+def _settings(**overrides) -> CrawlerSettings:
+    return CrawlerSettings.from_config("wb", **overrides)
+
+
+class TestShardSettings(TestCase):
+
+    def test_shards_keywords_round_robin(self):
+        shards = shard_settings(_settings(crawler_type="search", keywords="a, b,c,,d,e"), 2)
+        self.assertEqual([shard.keywords for shard in shards], ["a,c,e", "b,d"])
+
+    def test_shards_ids_by_crawler_type_and_drops_empty_shards(self):
+        detail = shard_settings(_settings(crawler_type="detail", specified_id_list=["1", "2"], creator_id_list=["9"]), 4)
+        self.assertEqual([shard.specified_id_list for shard in detail], [("1",), ("2",)])
+        self.assertEqual({shard.creator_id_list for shard in detail}, {("9",)})
+
+        creator = shard_settings(_settings(crawler_type="creator", creator_id_list=["7", "8", "9"]), 2)
+        self.assertEqual([shard.creator_id_list for shard in creator], [("7", "9"), ("8",)])
+
+        self.assertEqual(len(shard_settings(_settings(crawler_type="search", keywords=""), 3)), 1)
+
+
+class TestShardedCrawlExecutor(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.staging_dir = os.path.join(self.tmp_dir.name, "workers")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write_lines(self, worker: str, file_name: str, lines: List[str]):
+        jsonl_dir = os.path.join(self.staging_dir, worker, "weibo", "jsonl")
+        os.makedirs(jsonl_dir, exist_ok=True)
+        with open(os.path.join(jsonl_dir, file_name), "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+
+    async def test_merge_staged_is_incremental(self):
+        store = RecordingStore()
+        executor = ShardedCrawlExecutor(_settings(), "unused:Crawler", workers=2, staging_dir=self.staging_dir, store=store)
+        self._write_lines("worker_0", "search_contents_2024-01-01.jsonl", [json.dumps({"id": 1}) + "\n"])
+        # 子进程正在写入的半行暂不合并
+        self._write_lines("worker_1", "search_comments_2024-01-01.jsonl", [json.dumps({"id": 2}) + "\n", '{"id": 3'])
+
+        self.assertEqual(await executor.merge_staged(), 2)
+        self._write_lines("worker_1", "search_comments_2024-01-01.jsonl", ["}\n"])
+        self._write_lines("worker_1", "search_creators_2024-01-01.jsonl", [json.dumps({"id": 4}) + "\n"])
+        self.assertEqual(await executor.merge_staged(), 2)
+        await executor._get_store().close()
+
+        self.assertEqual(sorted(store.calls), [("comment", 2), ("comment", 3), ("content", 1), ("creator", 4)])
+        self.assertEqual(dict(executor.merged), {"contents": 1, "comments": 2, "creators": 1})
+
+    async def test_merge_offsets_survive_restart(self):
+        store = RecordingStore()
+        executor = ShardedCrawlExecutor(_settings(), "unused:Crawler", workers=1, staging_dir=self.staging_dir, store=store)
+        self._write_lines("worker_0", "search_contents_2024-01-01.jsonl", [json.dumps({"id": 1}) + "\n"])
+        await executor.merge_staged()
+        await executor._get_store().close()
+
+        # 主进程中断后 --resume：已写入存储的记录不再重复合并
+        self._write_lines("worker_0", "search_contents_2024-01-01.jsonl", [json.dumps({"id": 2}) + "\n"])
+        resumed = ShardedCrawlExecutor(_settings(), "unused:Crawler", workers=1, staging_dir=self.staging_dir, store=store)
+        resumed._offsets = resumed._load_offsets()
+        self.assertEqual(await resumed.merge_staged(), 1)
+        await resumed._get_store().close()
+
+        self.assertEqual(store.calls, [("content", 1), ("content", 2)])
+
+    async def test_run_merges_worker_processes(self):
+        store = RecordingStore()
+        with mock.patch.multiple(config, ENABLE_SEEN_INDEX=False, ENABLE_CRAWL_CHECKPOINT=False, RESUME_CRAWL=False):
+            executor = ShardedCrawlExecutor(
+                _settings(crawler_type="search", keywords="a,b,c"),
+                f"{__name__}:FakeCrawler",
+                workers=2,
+                staging_dir=self.staging_dir,
+                merge_interval=0.1,
+                store=store,
+            )
+            await executor.run()
+
+        self.assertEqual(sorted(store.calls), [("content", "a"), ("content", "b"), ("content", "c")])
+        self.assertEqual([process.exitcode for process in executor._processes], [0, 0])
+        self.assertFalse(os.path.exists(self.staging_dir))
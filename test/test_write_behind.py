@@ -0,0 +1,120 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from base.base_crawler import AbstractStore
+from store.write_behind import (StoreWriteError, WriteBehindStore, close_write_behind_stores,
+                                 get_write_behind_store)
+
+
+class RecordingStore(AbstractStore):
+
+    def __init__(self):
+        self.calls = []
+
+    async def store_content(self, content_item: Dict):
+        self.calls.append(("content", content_item["id"]))
+
+    async def store_comment(self, comment_item: Dict):
+        self.calls.append(("comment", comment_item["id"]))
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        self.calls.append(("comments", [item["id"] for item in comment_items]))
+
+    async def store_creator(self, creator: Dict):
+        self.calls.append(("creator", creator["id"]))
+
+    async def store_contact(self, contact_item: Dict):
+        self.calls.append(("contact", contact_item["id"]))
+
+
+class FlakyStore(RecordingStore):
+    """第 fail_times 次之前的 store_creator 调用抛出异常"""
+
+    def __init__(self, fail_times: int):
+        super().__init__()
+        self.fail_times = fail_times
+
+    async def store_creator(self, creator: Dict):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("db gone")
+        await super().store_creator(creator)
+
+
+class TestWriteBehindStore(IsolatedAsyncioTestCase):
+
+    async def test_batches_comments_in_order_and_flushes_on_close(self):
+        recording_store = RecordingStore()
+        store = WriteBehindStore(recording_store, max_size=2, batch_size=100, flush_interval=0.05)
+        await store.store_content({"id": 1})
+        await store.store_comment({"id": 2})
+        await store.store_comments_batch([{"id": 3}, {"id": 4}])
+        await store.store_contact({"id": 5})
+        await store.close()
+
+        self.assertEqual(recording_store.calls, [("content", 1), ("comments", [2, 3, 4]), ("contact", 5)])
+        self.assertEqual(store.pending, 0)
+
+    async def test_passthrough_methods_accept_keyword_arguments(self):
+        recording_store = RecordingStore()
+        store = WriteBehindStore(recording_store, flush_interval=0.01)
+        await store.store_contact(contact_item={"id": 1})
+        await store.store_content(content_item={"id": 2})
+        await store.close()
+
+        self.assertEqual(recording_store.calls, [("contact", 1), ("content", 2)])
+
+    async def test_retries_failed_batch_without_rewriting_written_items(self):
+        flaky_store = FlakyStore(fail_times=2)
+        store = WriteBehindStore(flaky_store, batch_size=100, flush_interval=0.05, retry_delay=0.01)
+        await store.store_content({"id": 1})
+        await store.store_creator({"id": 2})
+        await store.close()
+
+        self.assertEqual(flaky_store.calls, [("content", 1), ("creator", 2)])
+
+    async def test_close_raises_when_items_could_not_be_written(self):
+        flaky_store = FlakyStore(fail_times=10)
+        store = WriteBehindStore(flaky_store, flush_interval=0.01, max_retries=1, retry_delay=0.01)
+        await store.store_creator({"id": 1})
+        with self.assertRaises(StoreWriteError):
+            await store.close()
+
+    @mock.patch.object(config, "ENABLE_SEEN_INDEX", False)
+    async def test_singleton_per_platform(self):
+        first = get_write_behind_store("test", RecordingStore)
+        self.assertIs(first, get_write_behind_store("test", RecordingStore))
+        await first.store_creator({"id": 1})
+        await close_write_behind_stores()
+
+        self.assertEqual(first.store.calls, [("creator", 1)])
+        self.assertIsNot(first, get_write_behind_store("test", RecordingStore))
+        await close_write_behind_stores()
+
+    @mock.patch.object(config, "ENABLE_SEEN_INDEX", False)
+    async def test_close_one_platform(self):
+        first = get_write_behind_store("test", RecordingStore)
+        other = get_write_behind_store("other", RecordingStore)
+        await first.store_creator({"id": 1})
+        await other.store_creator({"id": 2})
+        await close_write_behind_stores("test")
+
+        self.assertEqual(first.store.calls, [("creator", 1)])
+        # 其它平台的存储不受影响
+        self.assertIs(other, get_write_behind_store("other", RecordingStore))
+        await close_write_behind_stores()
+        self.assertEqual(other.store.calls, [("creator", 2)])
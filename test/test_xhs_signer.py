@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from media_platform.xhs.signer import PlaywrightXhsSigner
+
+
+FAKE_X_S = "XYW_" + "e" * 80
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+
+class FakePage:
+    def __init__(self, context: FakeContext):
+        self.context = context
+        self.evaluate_calls = []
+        self.active = 0
+        self.max_active = 0
+        self.closed = False
+
+    async def goto(self, url):
+        pass
+
+    async def evaluate(self, expression, arg=None):
+        self.evaluate_calls.append(expression)
+        if "localStorage" in expression:
+            return "b1-value"
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return {"X-s": FAKE_X_S, "X-t": 1700000000000}
+
+    async def close(self):
+        self.closed = True
+
+
+class TestPlaywrightXhsSigner(unittest.IsolatedAsyncioTestCase):
+
+    async def test_sign_headers_and_cached_b1(self):
+        page = FakePage(FakeContext())
+        signer = PlaywrightXhsSigner(page, {"a1": "a1-value"}, pool_size=1)
+        headers = await signer.sign("/api/sns/web/v1/feed", {"source_note_id": "1"})
+        await signer.sign("/api/sns/web/v1/feed", {"source_note_id": "2"})
+
+        self.assertEqual(headers["X-S"], FAKE_X_S)
+        self.assertEqual(headers["X-T"], "1700000000000")
+        self.assertIn("x-S-Common", headers)
+        # b1 只读取一次，之后每次签名只有一次 evaluate
+        self.assertEqual(sum("localStorage" in call for call in page.evaluate_calls), 1)
+        self.assertEqual(len(page.evaluate_calls), 3)
+        self.assertEqual(signer.sign_count, 2)
+
+        signer.update_cookies({"a1": "new"})
+        await signer.sign("/api/sns/web/v1/feed")
+        self.assertEqual(sum("localStorage" in call for call in page.evaluate_calls), 2)
+
+    async def test_concurrent_sign_uses_page_pool(self):
+        context = FakeContext()
+        page = FakePage(context)
+        signer = PlaywrightXhsSigner(page, {}, pool_size=3)
+        await asyncio.gather(*(signer.sign(f"/api/{i}") for i in range(9)))
+
+        self.assertEqual(len(context.pages), 2)
+        for used_page in [page] + context.pages:
+            # 每个页面同一时间只签一个请求，9 个请求分散到 3 个页面
+            self.assertEqual(used_page.max_active, 1)
+            self.assertTrue(any("_webmsxyw" in call for call in used_page.evaluate_calls))
+
+        await signer.close()
+        self.assertTrue(all(extra_page.closed for extra_page in context.pages))
+        self.assertFalse(page.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,18 +3,29 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict, List
+import textwrap
+from typing import Dict, List, Optional
 import aiofiles
+
+import config
 from tools.utils import utils
 
 class AsyncFileWriter:
-    def __init__(self, platform: str, crawler_type: str):
+    def __init__(self, platform: str, crawler_type: str, json_lines: bool = False):
+        """
+        Args:
+            platform: 平台名称，对应 <SAVE_DATA_DIR>/<platform> 目录
+            crawler_type: 爬取类型
+            json_lines: 为 True 时 JSON 数据以 JSON Lines 格式追加写入 data/<platform>/jsonl，
+                        每条记录只追加一行，避免每次写入都重写整个 JSON 数组文件
+        """
         self.lock = asyncio.Lock()
         self.platform = platform
         self.crawler_type = crawler_type
+        self.json_lines = json_lines
 
     def _get_file_path(self, file_type: str, item_type: str) -> str:
-        base_path = f"data/{self.platform}/{file_type}"
+        base_path = f"{config.SAVE_DATA_DIR}/{self.platform}/{file_type}"
         pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
         file_name = f"{self.crawler_type}_{item_type}_{utils.get_current_date()}.{file_type}"
         return f"{base_path}/{file_name}"
@@ -30,6 +41,10 @@ class AsyncFileWriter:
                 await writer.writerow(item)
 
     async def write_single_item_to_json(self, item: Dict, item_type: str):
+        if self.json_lines:
+            await self.write_single_item_to_jsonl(item, item_type)
+            return
+
         file_path = self._get_file_path('json', item_type)
         async with self.lock:
             existing_data = []
@@ -43,8 +58,76 @@ class AsyncFileWriter:
                             existing_data = [existing_data]
                     except json.JSONDecodeError:
                         existing_data = []
-            
+
             existing_data.append(item)
 
             async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
\ No newline at end of file
+                await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
+
+    async def write_single_item_to_jsonl(self, item: Dict, item_type: str):
+        """
+        以 JSON Lines 格式追加写入一条记录，写入开销与文件已有大小无关
+        Args:
+            item: 数据
+            item_type: 数据类型，如 contents / comments / creators
+
+        Returns:
+
+        """
+        file_path = self._get_file_path('jsonl', item_type)
+        line = json.dumps(item, ensure_ascii=False) + "\n"
+        async with self.lock:
+            async with aiofiles.open(file_path, 'a', encoding='utf-8') as f:
+                await f.write(line)
+
+
+def convert_jsonl_to_json(jsonl_path: str, json_path: str) -> int:
+    """
+    将 JSON Lines 文件转换为旧版的 JSON 数组格式（与 write_single_item_to_json 的输出格式一致），
+    逐行读取并逐条写出，不会一次性把整个文件加载到内存
+    Args:
+        jsonl_path: JSON Lines 文件路径
+        json_path: 输出的 JSON 文件路径
+
+    Returns:
+        写出的记录条数
+    """
+    count = 0
+    tmp_path = f"{json_path}.tmp"
+    with open(jsonl_path, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+        for line in src:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                # 进程被中断时最后一行可能只写了一半，跳过即可
+                utils.logger.warning(f"[convert_jsonl_to_json] skip broken line in {jsonl_path}")
+                continue
+            dst.write("[\n" if count == 0 else ",\n")
+            dst.write(textwrap.indent(json.dumps(item, ensure_ascii=False, indent=4), " " * 4))
+            count += 1
+        dst.write("\n]" if count else "[]")
+    os.replace(tmp_path, json_path)
+    return count
+
+
+def export_jsonl_to_json(base_dir: Optional[str] = None) -> List[str]:
+    """
+    将 base_dir/<platform>/jsonl 下的所有 JSON Lines 文件导出为 base_dir/<platform>/json 下同名的 JSON 数组文件
+    Args:
+        base_dir: 数据根目录，默认为 config.SAVE_DATA_DIR
+
+    Returns:
+        导出的 JSON 文件路径列表
+    """
+    exported_files: List[str] = []
+    for jsonl_file in sorted(pathlib.Path(base_dir or config.SAVE_DATA_DIR).glob("*/jsonl/*.jsonl")):
+        json_dir = jsonl_file.parent.parent / "json"
+        json_dir.mkdir(parents=True, exist_ok=True)
+        json_file = json_dir / f"{jsonl_file.stem}.json"
+        count = convert_jsonl_to_json(str(jsonl_file), str(json_file))
+        utils.logger.info(f"[export_jsonl_to_json] {jsonl_file} -> {json_file}, {count} items")
+        exported_files.append(str(json_file))
+    return exported_files
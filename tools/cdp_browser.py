@@ -26,7 +26,9 @@ class CDPBrowserManager:
     CDP浏览器管理器，负责启动和管理通过CDP连接的浏览器
     """
 
-    def __init__(self):
+    def __init__(self, platform: Optional[str] = None):
+        # 平台名称，用于区分各平台保存登录状态的用户数据目录
+        self.platform = platform or config.PLATFORM
         self.launcher = BrowserLauncher()
         self.browser: Optional[Browser] = None
         self.browser_context: Optional[BrowserContext] = None
@@ -131,7 +133,7 @@ class CDPBrowserManager:
             user_data_dir = os.path.join(
                 os.getcwd(),
                 "browser_data",
-                f"cdp_{config.USER_DATA_DIR % config.PLATFORM}",
+                f"cdp_{config.USER_DATA_DIR % self.platform}",
             )
             os.makedirs(user_data_dir, exist_ok=True)
             utils.logger.info(f"[CDPBrowserManager] 用户数据目录: {user_data_dir}")
@@ -0,0 +1,75 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 平台请求熔断器：疑似被封禁时暂停该平台的请求，冷却后执行一次恢复操作（如刷新 cookies），
+#            等待期间只有该平台的请求协程挂起，事件循环中的其他任务照常运行
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import config
+from tools import utils
+
+
+class CircuitBreaker:
+    """
+    熔断器的两个状态：
+        closed: 正常放行请求
+        open: 请求在 wait_closed 处等待，直到冷却结束并完成恢复操作
+    多个协程同时触发熔断时只有第一个负责冷却和恢复，其余的等待同一次恢复完成
+    """
+
+    def __init__(
+        self,
+        name: str,
+        open_seconds: float = config.CRAWLER_CIRCUIT_BREAKER_OPEN_SEC,
+        on_recover: Optional[Callable[[], Awaitable]] = None,
+    ):
+        self.name = name
+        self.open_seconds = open_seconds
+        self.on_recover = on_recover
+        self.trips = 0
+        self._closed = asyncio.Event()
+        self._closed.set()
+
+    @property
+    def is_open(self) -> bool:
+        return not self._closed.is_set()
+
+    async def wait_closed(self):
+        """发起请求前调用，熔断打开时等待恢复"""
+        await self._closed.wait()
+
+    async def trip(self, reason: str):
+        """
+        打开熔断，返回时熔断已经恢复
+        Args:
+            reason: 触发原因，用于日志
+        """
+        if self.is_open:
+            await self._closed.wait()
+            return
+        self._closed.clear()
+        self.trips += 1
+        utils.logger.warning(
+            f"[CircuitBreaker.trip] {self.name} may be blocked ({reason}), pause requests for {self.open_seconds}s"
+        )
+        try:
+            await asyncio.sleep(self.open_seconds)
+            if self.on_recover:
+                try:
+                    await self.on_recover()
+                except Exception as e:
+                    utils.logger.error(f"[CircuitBreaker.trip] {self.name} recover failed: {e}")
+        finally:
+            self._closed.set()
+        utils.logger.info(f"[CircuitBreaker.trip] {self.name} resume requests")
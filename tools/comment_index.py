@@ -0,0 +1,146 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 评论索引（SQLite）：数据后处理时把评论文件按 (平台, 所属内容ID) 建立索引，
+#            合并评论时只查询相关内容的评论
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import config
+from tools.postprocess_manifest import FileChange, iter_new_records
+
+# 每次批量写入的评论条数
+_INSERT_BATCH_SIZE = 1000
+# SQLite 单条语句的参数个数有上限，批量查询时分批
+_QUERY_CHUNK_SIZE = 500
+
+
+class CommentIndex:
+    """
+    评论按来源文件（文件名去掉扩展名，如 search_comments_2025-12-15）和文件内序号保存，
+    查询时按来源文件和序号排序，与按文件顺序读取的结果一致。
+    哪些文件需要重新索引由 PostprocessManifest 决定，重复索引同一段记录时会覆盖之前的结果
+    """
+
+    def __init__(self, db_path: str = config.POSTPROCESS_COMMENT_INDEX_PATH):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS comment (
+                platform TEXT NOT NULL,
+                source TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                post_id TEXT NOT NULL,
+                comment_id TEXT,
+                data TEXT NOT NULL,
+                PRIMARY KEY (platform, source, seq)
+            );
+            CREATE INDEX IF NOT EXISTS idx_comment_post ON comment (platform, post_id);
+            """
+        )
+        self._conn.commit()
+
+    def index_file(
+        self, platform: str, change: FileChange, get_post_id: Callable[[Dict], Optional[str]]
+    ) -> Tuple[int, int, int]:
+        """
+        为评论文件中需要处理的记录建立索引：从头处理时先删除该文件之前的索引，
+        JSON Lines 文件追加了内容时只索引新追加的记录
+        Args:
+            platform: 平台名称
+            change: 文件的变化（见 PostprocessManifest.get_change）
+            get_post_id: 从评论中取出所属内容ID
+
+        Returns:
+            (本次写入索引的评论条数, 文件处理到的位置, 文件中已处理的记录数)
+        """
+        source = change.file_path.stem
+        count = 0
+        offset = change.offset
+        seq = change.records
+        rows = []
+        try:
+            if change.offset == 0:
+                self._conn.execute("DELETE FROM comment WHERE platform = ? AND source = ?", (platform, source))
+            for comment, offset in iter_new_records(change):
+                seq += 1
+                post_id = get_post_id(comment)
+                if not post_id:
+                    continue
+                comment_id = comment.get("comment_id")
+                rows.append((
+                    platform, source, seq, str(post_id),
+                    str(comment_id) if comment_id is not None else None,
+                    json.dumps(comment, ensure_ascii=False),
+                ))
+                if len(rows) >= _INSERT_BATCH_SIZE:
+                    self._insert(rows)
+                    count += len(rows)
+                    rows = []
+            if rows:
+                self._insert(rows)
+                count += len(rows)
+        except Exception:
+            # 读取失败时放弃这个文件已写入的部分，避免被后续文件的提交一起提交
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+        return count, offset, seq
+
+    def _insert(self, rows: List[tuple]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO comment (platform, source, seq, post_id, comment_id, data) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def get_comments(self, platform: str, post_ids: Iterable[str], sources: List[str]) -> Dict[str, List[Dict]]:
+        """
+        查询指定内容的评论，同一条评论出现在多个来源文件中时只保留第一次出现的
+        Args:
+            platform: 平台名称
+            post_ids: 内容ID
+            sources: 只查询这些来源文件（文件名去掉扩展名）中的评论
+
+        Returns:
+            内容ID -> 评论列表
+        """
+        post_ids = list(dict.fromkeys(str(post_id) for post_id in post_ids))
+        if not post_ids or not sources:
+            return {}
+        rows = []
+        source_placeholders = ",".join("?" * len(sources))
+        for i in range(0, len(post_ids), _QUERY_CHUNK_SIZE):
+            chunk = post_ids[i:i + _QUERY_CHUNK_SIZE]
+            rows.extend(self._conn.execute(
+                f"SELECT source, seq, post_id, comment_id, data FROM comment "
+                f"WHERE platform = ? AND post_id IN ({','.join('?' * len(chunk))}) "
+                f"AND source IN ({source_placeholders})",
+                (platform, *chunk, *sources),
+            ).fetchall())
+        rows.sort(key=lambda row: (row[0], row[1]))
+
+        comments: Dict[str, List[Dict]] = {}
+        seen_comment_ids = set()
+        for _, _, post_id, comment_id, data in rows:
+            if comment_id is not None:
+                if comment_id in seen_comment_ids:
+                    continue
+                seen_comment_ids.add(comment_id)
+            comments.setdefault(post_id, []).append(json.loads(data))
+        return comments
+
+    def close(self):
+        self._conn.close()
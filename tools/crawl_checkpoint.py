@@ -0,0 +1,161 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 断点续爬：记录已完成的搜索页、作品以及评论翻页游标（SQLite），--resume 时跳过已完成的部分
+
+import functools
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import config
+from store.write_behind import call_after_written
+from tools import utils
+
+# 评论全部爬取完成时保存的游标值
+_COMMENTS_DONE = "done"
+
+
+class CrawlCheckpoint:
+    """
+    一个平台的断点记录，按 (平台, 类型, 键) 保存：
+        page: "<关键词>:<页码>"，该搜索页（含详情和评论）已处理完
+        item: 作品ID，该作品的详情已保存
+        comment: 作品ID，值为评论翻页游标（JSON）或 done
+    """
+
+    def __init__(self, platform: str, db_path: str = config.CRAWL_CHECKPOINT_PATH, enabled: bool = True):
+        self.platform = platform
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        if not enabled:
+            return
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=config.CRAWL_STATE_DB_TIMEOUT)
+        # 多进程分片爬取时各子进程共用该数据库，WAL 模式下读写互不阻塞，写入冲突时等待而不是报 database is locked
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS crawl_checkpoint (
+                platform TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (platform, kind, key)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def _get(self, kind: str, key: str) -> Optional[str]:
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT value FROM crawl_checkpoint WHERE platform = ? AND kind = ? AND key = ?",
+            (self.platform, kind, str(key)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, kind: str, key: str, value: str):
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO crawl_checkpoint (platform, kind, key, value, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (self.platform, kind, str(key), value, int(time.time())),
+        )
+        self._conn.commit()
+
+    def _set_when_stored(self, kind: str, key: str, value: str):
+        """
+        数据先进入存储的写缓冲队列，等该平台已经入队的数据全部写入存储后才记录断点，
+        爬虫崩溃后 --resume 不会跳过还没写入的数据
+        """
+        call_after_written(self.platform, functools.partial(self._set, kind, key, value))
+
+    def reset(self):
+        """清空该平台的断点，从头开始爬取"""
+        if self._conn is None:
+            return
+        self._conn.execute("DELETE FROM crawl_checkpoint WHERE platform = ?", (self.platform,))
+        self._conn.commit()
+
+    def is_page_done(self, keyword: str, page: int) -> bool:
+        return self._get("page", f"{keyword}:{page}") is not None
+
+    def mark_page_done(self, keyword: str, page: int):
+        self._set_when_stored("page", f"{keyword}:{page}", "1")
+
+    def is_item_done(self, item_id: str) -> bool:
+        return self._get("item", item_id) is not None
+
+    def mark_item_done(self, item_id: str):
+        self._set_when_stored("item", item_id, "1")
+
+    def is_comments_done(self, item_id: str) -> bool:
+        return self._get("comment", item_id) == _COMMENTS_DONE
+
+    def get_comment_cursor(self, item_id: str) -> Optional[Dict]:
+        """上次中断时的评论翻页游标，没有记录或已爬完时返回None"""
+        value = self._get("comment", item_id)
+        if value is None or value == _COMMENTS_DONE:
+            return None
+        return json.loads(value)
+
+    def is_comments_pending(self, item_id: str) -> bool:
+        """评论已经开始爬取但还没有爬完"""
+        value = self._get("comment", item_id)
+        return value is not None and value != _COMMENTS_DONE
+
+    def save_comment_cursor(self, item_id: str, cursor: Dict):
+        """保存评论翻页游标，应在当前页评论已经交给存储之后调用，游标在这些评论写入存储后才记录"""
+        self._set_when_stored("comment", item_id, json.dumps(cursor))
+
+    def mark_comments_done(self, item_id: str):
+        self._set_when_stored("comment", item_id, _COMMENTS_DONE)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_checkpoints: Dict[str, CrawlCheckpoint] = {}
+
+
+def get_crawl_checkpoint(platform: str) -> CrawlCheckpoint:
+    """
+    获取平台的断点记录（单例）。首次获取时，非 --resume 模式会清空之前的断点
+    Args:
+        platform: 平台名称
+
+    Returns:
+
+    """
+    checkpoint = _checkpoints.get(platform)
+    if checkpoint is None:
+        checkpoint = CrawlCheckpoint(platform, config.CRAWL_CHECKPOINT_PATH, enabled=config.ENABLE_CRAWL_CHECKPOINT)
+        if config.RESUME_CRAWL:
+            utils.logger.info(f"[CrawlCheckpoint] resume {platform} crawl from checkpoint {config.CRAWL_CHECKPOINT_PATH}")
+        else:
+            checkpoint.reset()
+        _checkpoints[platform] = checkpoint
+    return checkpoint
+
+
+def close_crawl_checkpoints():
+    checkpoints = list(_checkpoints.values())
+    _checkpoints.clear()
+    for checkpoint in checkpoints:
+        checkpoint.close()
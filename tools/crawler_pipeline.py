@@ -0,0 +1,107 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬取流水线：各阶段（搜索 -> 详情 -> 媒体/评论）之间通过 asyncio 队列衔接，各阶段并发执行
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+from tools import utils
+
+
+class PipelineStage:
+    """流水线的一个阶段，由 workers 个协程从队列中取数据并调用 handler 处理"""
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[None]], workers: int, max_size: int = 0):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.processed = 0
+        self.failed = 0
+        self._tasks: List[asyncio.Task] = []
+
+    async def put(self, item: Any):
+        """放入待处理数据，队列满时等待（背压），避免上游阶段远远跑在下游前面"""
+        await self.queue.put(item)
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work(), name=f"{self.name}-{i}") for i in range(self.workers)]
+
+    async def _work(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                await self.handler(item)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                utils.logger.error(f"[PipelineStage.{self.name}] handle item failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def metrics(self) -> str:
+        return f"{self.name}(queue={self.queue.qsize()}, done={self.processed}, failed={self.failed})"
+
+
+class CrawlerPipeline:
+    """
+    按添加顺序串联的多阶段流水线。producer 负责向第一个阶段投放数据，
+    每个阶段的 handler 可以继续向后面的阶段投放数据
+    """
+
+    def __init__(self, name: str, metrics_interval: float = 10):
+        self.name = name
+        self.metrics_interval = metrics_interval
+        self.stages: List[PipelineStage] = []
+
+    def add_stage(self, name: str, handler: Callable[[Any], Awaitable[None]], workers: int, max_size: int = 0) -> PipelineStage:
+        stage = PipelineStage(name, handler, workers, max_size)
+        self.stages.append(stage)
+        return stage
+
+    def log_metrics(self):
+        utils.logger.info(f"[CrawlerPipeline.{self.name}] " + ", ".join(stage.metrics() for stage in self.stages))
+
+    async def _report_metrics(self):
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            self.log_metrics()
+
+    async def run(self, producer: Awaitable[None]):
+        """
+        启动所有阶段并执行 producer，producer 结束后按阶段顺序等待队列处理完毕
+        Args:
+            producer: 向第一个阶段投放数据的协程
+        """
+        for stage in self.stages:
+            stage.start()
+        reporter: Optional[asyncio.Task] = None
+        if self.metrics_interval > 0:
+            reporter = asyncio.create_task(self._report_metrics())
+        try:
+            await producer
+            # 上游阶段处理完之后才不会再有新数据进入下游阶段，所以按顺序等待
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            if reporter:
+                reporter.cancel()
+            for stage in self.stages:
+                await stage.stop()
+            self.log_metrics()
@@ -0,0 +1,148 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬虫结果文件的流式读取：JSON Lines 逐行读取，旧版 JSON 数组文件增量解析，
+#            都是逐条产出记录，不会把整个文件一次性加载到内存
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tools import utils
+
+# 读取 JSON 数组文件时每次从磁盘读取的字符数
+_READ_CHUNK_SIZE = 1024 * 1024
+
+
+
+def _intern_keys(pairs: List) -> Dict:
+    """
+    逐条解析时 json 不会在记录之间共享字段名字符串，每条记录都会有一份自己的字段名，
+    记录数量多时字段名的内存占用很可观，这里让相同的字段名共用一个字符串
+    """
+    return {sys.intern(key): value for key, value in pairs}
+
+
+_decoder = json.JSONDecoder(object_pairs_hook=_intern_keys)
+# 数组元素之间的空白和逗号
+_SEPARATOR = re.compile(r"[\s,]*")
+
+
+def iter_jsonl(file_path: str) -> Iterator[Dict]:
+    """逐行读取 JSON Lines 文件，跳过空行和中断时只写了一半的行"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield _decoder.decode(line)
+            except json.JSONDecodeError:
+                utils.logger.warning(f"[data_file_reader.iter_jsonl] skip broken line in {file_path}")
+
+
+def iter_jsonl_from(file_path: str, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """
+    从字节偏移 offset 开始逐行读取 JSON Lines 文件，产出 (记录, 该行结束处的字节偏移)。
+    没有换行符结尾的最后一行可能是爬虫正在写入的半行，不读取，下次从这一行的开头继续
+    """
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield _decoder.decode(line.decode("utf-8")), offset
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                utils.logger.warning(f"[data_file_reader.iter_jsonl_from] skip broken line in {file_path}")
+
+
+def iter_json_array(file_path: str, chunk_size: int = _READ_CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    增量解析 JSON 数组文件，逐个产出数组元素，内存中只保留当前读取的分块和正在解析的元素。
+    文件内容是对象时（例如 {"data": [...]}），产出其中第一个非空列表的元素
+    Args:
+        file_path: JSON 文件路径
+        chunk_size: 每次读取的字符数
+
+    Returns:
+
+    """
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer:
+            return
+        if not buffer.startswith("["):
+            # 非数组格式很少见，直接整体解析
+            data = json.loads(buffer + f.read())
+            if isinstance(data, dict):
+                data = next((value for value in data.values() if isinstance(value, list) and value), [])
+            if isinstance(data, list):
+                yield from data
+            return
+
+        pos = 1
+        eof = False
+        while True:
+            pos = _SEPARATOR.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    utils.logger.warning(f"[data_file_reader.iter_json_array] {file_path} is truncated or broken")
+                    return
+                # 当前元素跨越了分块边界，读取更多内容后重试
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield item
+            pos = end
+            if pos > chunk_size:
+                buffer = buffer[pos:]
+                pos = 0
+
+
+def iter_records(file_path: Path) -> Iterator[Dict]:
+    """按扩展名选择读取方式"""
+    if file_path.suffix == ".jsonl":
+        return iter_jsonl(str(file_path))
+    return iter_json_array(str(file_path))
+
+
+def find_data_files(platform_dir: Path, base_pattern: str, target_dates: Optional[List[str]] = None) -> List[Path]:
+    """
+    查找平台目录下 json/ 和 jsonl/ 中的结果文件，同名文件（jsonl 导出的 json）只保留 jsonl
+    Args:
+        platform_dir: 平台数据目录，如 data/weibo
+        base_pattern: 文件名前缀，如 search_contents / search_comments
+        target_dates: 只返回文件名中包含这些日期的文件，为空时返回全部
+
+    Returns:
+        按文件名排序的文件列表
+    """
+    files: Dict[str, Path] = {}
+    for sub_dir, suffix in (("json", "json"), ("jsonl", "jsonl")):
+        for file_path in (platform_dir / sub_dir).glob(f"{base_pattern}_*.{suffix}"):
+            files[file_path.stem] = file_path
+    if target_dates:
+        files = {stem: path for stem, path in files.items() if any(date in stem for date in target_dates)}
+    return [files[stem] for stem in sorted(files)]
@@ -0,0 +1,127 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 后处理数据加载基准：对比整文件 json.load 与流式并行读取的吞吐和峰值内存（RSS）
+#            用法: python -m tools.data_loader_benchmark --files 8 --comments 50000
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Set
+
+from tools.data_file_reader import iter_records
+
+
+def generate_files(data_dir: Path, files: int, comments: int, json_lines: bool, dup_ratio: float):
+    """
+    生成 files 个评论文件，每个文件 comments 条评论，分布在 1000 个内容下，
+    每天的文件中有 dup_ratio 比例的评论与前一天重复（重复爬取同一批内容的评论）
+    """
+    for i in range(files):
+        suffix = "jsonl" if json_lines else "json"
+        first_id = int(i * comments * (1 - dup_ratio))
+        items = (
+            {
+                "comment_id": str(j),
+                "note_id": str(j % 1000),
+                "content": "评论内容" * 20,
+                "nickname": f"user{j}",
+                "like_count": str(j),
+            }
+            for j in range(first_id, first_id + comments)
+        )
+        with open(data_dir / f"search_comments_2025-12-{i + 10:02d}.{suffix}", "w", encoding="utf-8") as f:
+            if json_lines:
+                f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+            else:
+                json.dump(list(items), f, ensure_ascii=False, indent=4)
+
+
+def load_legacy(files: List[Path]) -> int:
+    """原来的方式：逐个文件 json.load 到内存，再按内容ID分组"""
+    grouped: Dict[str, List[Dict]] = defaultdict(list)
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as f:
+            if file_path.suffix == ".jsonl":
+                comments = [json.loads(line) for line in f if line.strip()]
+            else:
+                comments = json.load(f)
+        for comment in comments:
+            grouped[comment["note_id"]].append(comment)
+    return sum(len(comments) for comments in grouped.values())
+
+
+def load_streaming(files: List[Path]) -> int:
+    """逐条流式读取，边读边分组并按评论ID去重"""
+    grouped: Dict[str, List[Dict]] = defaultdict(list)
+    seen: Set[str] = set()
+    for file_path in files:
+        for comment in iter_records(file_path):
+            if comment["comment_id"] not in seen:
+                seen.add(comment["comment_id"])
+                grouped[comment["note_id"]].append(comment)
+    return sum(len(comments) for comments in grouped.values())
+
+
+def run_once(mode: str, data_dir: Path):
+    """在当前进程中运行一种加载方式并输出结果（由 main 在子进程中调用，保证峰值 RSS 互不影响）"""
+    files = sorted(data_dir.iterdir())
+    start = time.perf_counter()
+    count = load_legacy(files) if mode == "legacy" else load_streaming(files)
+    elapsed = time.perf_counter() - start
+    # Linux 下 ru_maxrss 的单位是 KB
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    records = sum(1 for file_path in files for _ in iter_records(file_path))
+    print(json.dumps({"mode": mode, "records": records, "kept": count, "seconds": elapsed, "peak_rss_mb": peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark post-processing comment loading")
+    parser.add_argument("--files", type=int, default=8, help="number of daily comment files")
+    parser.add_argument("--comments", type=int, default=50000, help="comments per file")
+    parser.add_argument("--jsonl", action="store_true", help="generate JSON Lines files instead of JSON arrays")
+    parser.add_argument("--dup-ratio", type=float, default=0.5, help="share of each file repeated from the previous day")
+    parser.add_argument("--run", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_once(args.run, Path(args.data_dir))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(tmp_dir)
+        generate_files(data_dir, args.files, args.comments, args.jsonl, args.dup_ratio)
+        size_mb = sum(os.path.getsize(f) for f in data_dir.iterdir()) / 1024 / 1024
+        print(f"{args.files} files, {args.files * args.comments} comments, {size_mb:.1f}MB")
+        for mode in ("legacy", "streaming"):
+            proc = subprocess.run(
+                [sys.executable, "-m", "tools.data_loader_benchmark", "--run", mode,
+                 "--data-dir", tmp_dir],
+                capture_output=True, text=True, check=True,
+            )
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(
+                f"{mode:>10}: {result['records'] / result['seconds']:.0f} records/s, {result['seconds']:.2f}s, "
+                f"kept {result['kept']} comments, peak RSS {result['peak_rss_mb']:.0f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 平台API客户端复用的 httpx 连接池，避免每次请求都重新建立 TCP/TLS 连接
+
+import asyncio
+import importlib.util
+from collections import OrderedDict
+from typing import List, Optional, Set
+
+import httpx
+
+import config
+from tools import utils
+
+
+def _http2_available() -> bool:
+    """HTTP/2 依赖 h2 包（pip install httpx[http2]），未安装时回退到 HTTP/1.1"""
+    return importlib.util.find_spec("h2") is not None
+
+
+class HttpClientPool:
+    """
+    按代理地址维护长连接的 httpx.AsyncClient，每个平台客户端持有一个实例，
+    在 create_*_client 时创建，在爬虫 close() 时关闭。
+    轮换代理时只保留最近使用的 max_clients 个连接池，更早的代理的连接池会被关闭，
+    保留上一个代理的连接池是为了让切换代理前已经发出的请求正常完成
+    """
+
+    def __init__(
+        self,
+        max_connections: int = config.HTTPX_MAX_CONNECTIONS,
+        max_keepalive_connections: int = config.HTTPX_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = config.HTTPX_KEEPALIVE_EXPIRY,
+        http2: bool = config.HTTPX_ENABLE_HTTP2,
+        max_clients: int = config.HTTPX_MAX_PROXY_CLIENTS,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and not _http2_available():
+            utils.logger.warning("[HttpClientPool] HTTPX_ENABLE_HTTP2 is set but h2 is not installed, fallback to HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.max_clients = max(1, max_clients)
+        self._clients: "OrderedDict[Optional[str], httpx.AsyncClient]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+
+    def get_client(self, proxy: Optional[str] = None) -> httpx.AsyncClient:
+        """
+        获取指定代理对应的 httpx.AsyncClient，不存在时创建
+        Args:
+            proxy: httpx 代理地址，None 表示直连
+
+        Returns:
+
+        """
+        client = self._clients.get(proxy)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(proxy=proxy, limits=self.limits, http2=self.http2)
+            self._clients[proxy] = client
+        self._clients.move_to_end(proxy)
+        while len(self._clients) > self.max_clients:
+            _, expired_client = self._clients.popitem(last=False)
+            self._close_in_background(expired_client)
+        return client
+
+    def _close_in_background(self, client: httpx.AsyncClient):
+        """get_client 是同步方法，过期代理的连接池交给后台任务关闭，aclose 时等待这些任务完成"""
+        if client.is_closed:
+            return
+        task = asyncio.get_running_loop().create_task(client.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def aclose(self):
+        """关闭所有连接池"""
+        clients: List[httpx.AsyncClient] = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            if not client.is_closed:
+                await client.aclose()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
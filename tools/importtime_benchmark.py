@@ -0,0 +1,107 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 启动耗时基准：用 python -X importtime 统计导入入口模块的耗时，用于发现启动变慢的回归
+#            用法: python -m tools.importtime_benchmark --module main --runs 5 --top 15
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(output: str) -> List[ImportTime]:
+    """
+    解析 -X importtime 输出到 stderr 的内容
+    Args:
+        output: 形如 "import time:  self [us] | cumulative | imported package" 的多行文本
+
+    Returns:
+        每个模块的导入耗时（微秒），顺序与输出一致
+    """
+    results: List[ImportTime] = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # 表头行
+            continue
+        results.append(ImportTime(parts[2].strip(), int(parts[0]), int(parts[1])))
+    return results
+
+
+def measure_import(module: str) -> List[ImportTime]:
+    """在新的解释器进程中导入 module 并返回各模块导入耗时"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.splitlines()[-1] if proc.stderr else ''}")
+    return parse_importtime(proc.stderr)
+
+
+def run_benchmark(module: str, runs: int) -> Dict[str, List[ImportTime]]:
+    """重复测量 runs 次，返回模块名 -> 每次的耗时"""
+    samples: Dict[str, List[ImportTime]] = {}
+    for _ in range(runs):
+        # 同一模块可能在输出中出现多次（子模块循环导入时），每次运行只取耗时最大的一条
+        per_run: Dict[str, ImportTime] = {}
+        for item in measure_import(module):
+            if item.module not in per_run or item.cumulative_us > per_run[item.module].cumulative_us:
+                per_run[item.module] = item
+        for name, item in per_run.items():
+            samples.setdefault(name, []).append(item)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI startup import time with python -X importtime")
+    parser.add_argument("--module", default="main", help="entry module to import")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreter runs")
+    parser.add_argument("--top", type=int, default=15, help="show the N slowest modules by cumulative time")
+    args = parser.parse_args()
+
+    samples = run_benchmark(args.module, max(1, args.runs))
+    total = samples.get(args.module)
+    if not total:
+        print(f"module {args.module} not found in importtime output")
+        sys.exit(1)
+    total_ms = [item.cumulative_us / 1000 for item in total]
+    print(
+        f"import {args.module}: median {statistics.median(total_ms):.1f}ms, "
+        f"min {min(total_ms):.1f}ms, max {max(total_ms):.1f}ms over {len(total_ms)} runs"
+    )
+
+    ranked = sorted(
+        samples.items(),
+        key=lambda kv: statistics.median(item.cumulative_us for item in kv[1]),
+        reverse=True,
+    )
+    print(f"{'cumulative(ms)':>15} {'self(ms)':>10}  module")
+    for name, items in ranked[:args.top]:
+        cumulative = statistics.median(item.cumulative_us for item in items) / 1000
+        self_time = statistics.median(item.self_us for item in items) / 1000
+        print(f"{cumulative:>15.1f} {self_time:>10.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 常驻 Node.js 签名进程池：签名 js 只加载一次，每次签名通过 stdin/stdout 收发一行 JSON，
+#            代替 execjs 每次调用都新建 Node.js 进程的方式，并且不会阻塞事件循环
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import config
+from tools import utils
+
+# Node.js 端的引导脚本：在当前上下文中执行签名 js（顶层函数成为全局函数），然后逐行处理调用请求。
+# js 中的 console.log 重定向到 stderr，避免污染用于通信的 stdout
+_BOOTSTRAP_JS = r"""
+const fs = require('fs');
+const vm = require('vm');
+const readline = require('readline');
+console.log = console.error;
+vm.runInThisContext(fs.readFileSync(process.argv[1], 'utf8').replace(/^\uFEFF/, ''));
+const rl = readline.createInterface({input: process.stdin});
+rl.on('line', (line) => {
+    let response;
+    try {
+        const request = JSON.parse(line);
+        response = {result: globalThis[request.func](...request.args)};
+    } catch (e) {
+        response = {error: String(e && e.stack || e)};
+    }
+    process.stdout.write(JSON.stringify(response) + '\n');
+});
+"""
+
+# 单行响应的最大长度
+_STREAM_LIMIT = 4 * 1024 * 1024
+
+
+class JsWorkerError(Exception):
+    """签名 js 执行出错或 Node.js 进程异常退出"""
+
+
+class JsWorker:
+    """一个常驻的 Node.js 进程，同一时间只处理一个调用"""
+
+    def __init__(self, js_path: str, node_path: str = config.JS_SIGN_NODE_PATH, timeout: float = config.JS_SIGN_TIMEOUT):
+        self.js_path = os.path.abspath(js_path)
+        self.node_path = node_path
+        self.timeout = timeout
+        self._process: Optional[asyncio.subprocess.Process] = None
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            self.node_path, "-e", _BOOTSTRAP_JS, self.js_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=_STREAM_LIMIT,
+        )
+
+    async def call(self, func: str, *args) -> Any:
+        """
+        调用签名 js 中的全局函数
+        Args:
+            func: 函数名
+            *args: 参数，需要可以 JSON 序列化
+
+        Returns:
+            函数返回值
+        """
+        if self._process is None or self._process.returncode is not None:
+            await self.start()
+        request = json.dumps({"func": func, "args": list(args)}, ensure_ascii=False) + "\n"
+        try:
+            self._process.stdin.write(request.encode("utf-8"))
+            await self._process.stdin.drain()
+            line = await asyncio.wait_for(self._process.stdout.readline(), self.timeout)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            self._kill()
+            raise JsWorkerError(f"call {func} in {self.js_path} failed: {e!r}") from e
+        except asyncio.CancelledError:
+            # 响应还没读到，进程中残留的输出会错配给下一次调用，直接结束该进程
+            self._kill()
+            raise
+        if not line:
+            self._kill()
+            raise JsWorkerError(f"node process for {self.js_path} exited unexpectedly")
+        response: Dict = json.loads(line)
+        if "error" in response:
+            raise JsWorkerError(response["error"])
+        return response.get("result")
+
+    def _kill(self):
+        process, self._process = self._process, None
+        if process is not None and process.returncode is None:
+            process.kill()
+
+    async def close(self):
+        process, self._process = self._process, None
+        if process is None or process.returncode is not None:
+            return
+        process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), 1)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+
+class JsWorkerPool:
+    """
+    同一个签名 js 的多个常驻进程，调用时取一个空闲进程，
+    并发的签名请求分散到多个进程中并行执行
+    """
+
+    def __init__(self, js_path: str, size: int = config.JS_SIGN_WORKER_POOL_SIZE):
+        self.js_path = js_path
+        self.size = max(1, size)
+        self.calls = 0
+        self._workers: List[JsWorker] = []
+        self._idle: Optional[asyncio.Queue] = None
+
+    async def call(self, func: str, *args) -> Any:
+        if self._idle is None:
+            # 进程在第一次调用时才启动，调用失败的进程会在下次调用时自动重启
+            self._idle = asyncio.Queue()
+            self._workers = [JsWorker(self.js_path) for _ in range(self.size)]
+            for worker in self._workers:
+                self._idle.put_nowait(worker)
+        worker: JsWorker = await self._idle.get()
+        try:
+            self.calls += 1
+            return await worker.call(func, *args)
+        finally:
+            self._idle.put_nowait(worker)
+
+    async def close(self):
+        await asyncio.gather(*(worker.close() for worker in self._workers), return_exceptions=True)
+        self._workers = []
+        self._idle = None
+
+
+_pools: Dict[str, JsWorkerPool] = {}
+
+
+def get_js_worker_pool(js_path: str) -> JsWorkerPool:
+    """获取签名 js 对应的进程池（单例）"""
+    pool = _pools.get(js_path)
+    if pool is None:
+        pool = JsWorkerPool(js_path)
+        _pools[js_path] = pool
+    return pool
+
+
+async def close_js_worker_pools():
+    """爬虫结束时调用，关闭所有常驻的 Node.js 进程"""
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        if pool.calls:
+            utils.logger.info(f"[JsWorkerPool] {pool.js_path} signed {pool.calls} requests")
+        await pool.close()
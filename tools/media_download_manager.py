@@ -0,0 +1,173 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 媒体下载管理器：图片/视频下载任务进入独立的有界队列，由后台 worker 池按 CDN 域名限制并发下载，
+#            爬取元数据的协程只负责投递任务，不会被下载阻塞
+
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import config
+from store.media_blob_store import close_media_blob_store, get_media_blob_store
+from tools import utils
+
+# 下载函数：接收保存路径，返回是否下载成功
+DownloadFunc = Callable[[str], Awaitable[bool]]
+
+
+class MediaDownloadManager:
+    """
+    媒体下载 worker 池。submit 只负责入队（队列满时等待），
+    worker 按 URL 的域名限制同一 CDN 的并发数，下载失败时按指数退避重试
+    """
+
+    def __init__(
+        self,
+        workers: int = config.MEDIA_DOWNLOAD_WORKERS,
+        per_host_concurrency: int = config.MEDIA_DOWNLOAD_PER_HOST_CONCURRENCY,
+        max_retries: int = config.MEDIA_DOWNLOAD_JOB_RETRIES,
+        max_size: int = config.MEDIA_DOWNLOAD_QUEUE_MAX_SIZE,
+        retry_delay: float = 1.0,
+    ):
+        self.workers = max(1, workers)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.max_retries = max_retries
+        self.max_size = max_size
+        self.retry_delay = retry_delay
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.downloaded_bytes = 0
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        """队列中尚未开始的下载任务数"""
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, url: str, save_path: str, download: DownloadFunc):
+        """
+        投递一个下载任务
+        Args:
+            url: 媒体地址，用于按域名限制并发
+            save_path: 保存路径
+            download: 实际执行下载的函数，通常是平台客户端的 download_* 方法
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work(), name=f"media-download-{i}") for i in range(self.workers)]
+        self.submitted += 1
+        await self._queue.put((url, save_path, download))
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def _work(self):
+        while True:
+            job: Tuple[str, str, DownloadFunc] = await self._queue.get()
+            try:
+                await self._download(*job)
+            finally:
+                self._queue.task_done()
+
+    async def _download(self, url: str, save_path: str, download: DownloadFunc):
+        if config.ENABLE_MEDIA_DEDUP and get_media_blob_store().link_existing(url, save_path):
+            self.skipped += 1
+            return
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+            try:
+                async with self._host_semaphore(url):
+                    success = await download(save_path)
+            except Exception as e:
+                utils.logger.error(f"[MediaDownloadManager._download] download {url} error: {e}")
+                success = False
+            if success:
+                self.succeeded += 1
+                if os.path.exists(save_path):
+                    self.downloaded_bytes += os.path.getsize(save_path)
+                    if config.ENABLE_MEDIA_DEDUP:
+                        await get_media_blob_store().ingest_file(save_path, url)
+                utils.logger.info(f"[MediaDownloadManager._download] save media {save_path} success ...")
+                return
+        self.failed += 1
+        utils.logger.error(f"[MediaDownloadManager._download] download {url} failed after {self.max_retries} retries")
+
+    def log_stats(self):
+        utils.logger.info(
+            f"[MediaDownloadManager] submitted={self.submitted}, succeeded={self.succeeded}, failed={self.failed}, "
+            f"skipped={self.skipped}, pending={self.pending}, downloaded={self.downloaded_bytes / 1024 / 1024:.1f}MB"
+        )
+
+    async def close(self):
+        """等待队列中的任务全部下载完成后停止 worker"""
+        if self._queue is not None and self._tasks:
+            await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self.log_stats()
+
+
+_managers: Dict[str, MediaDownloadManager] = {}
+# 正在等待剩余下载完成的管理器数量，它们仍在使用内容寻址存储
+_closing = 0
+
+
+def get_media_download_manager(platform: str) -> MediaDownloadManager:
+    """
+    获取平台对应的媒体下载管理器（单例）
+    Args:
+        platform: 平台名称，同一进程内并行运行的多个爬虫各自使用独立的 worker 池
+
+    Returns:
+
+    """
+    manager = _managers.get(platform)
+    if manager is None:
+        manager = MediaDownloadManager()
+        _managers[platform] = manager
+    return manager
+
+
+async def close_media_download_manager(platform: Optional[str] = None):
+    """
+    爬虫结束时调用：等待剩余的媒体下载完成并释放单例，需在平台客户端关闭连接池之前调用
+    Args:
+        platform: 只关闭该平台的下载管理器，其它平台的下载任务不受影响；为空时关闭所有平台
+    """
+    global _closing
+    platforms = [key for key in _managers if platform is None or key == platform]
+    managers = [_managers.pop(key) for key in platforms]
+    _closing += 1
+    try:
+        for manager in managers:
+            await manager.close()
+    finally:
+        _closing -= 1
+    # 最后一个下载管理器关闭后才关闭内容寻址存储
+    if not _managers and not _closing:
+        close_media_blob_store()
@@ -0,0 +1,148 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 媒体文件流式下载：分块写入 .part 临时文件，完成后原子重命名，中断后通过 HTTP Range 续传
+
+import json
+import os
+import re
+from typing import Dict, Optional
+
+import aiofiles
+import httpx
+
+import config
+from tools import utils
+
+
+def part_file_name(save_path: str) -> str:
+    """下载中的临时文件名"""
+    return save_path + ".part"
+
+
+def part_meta_file_name(save_path: str) -> str:
+    """临时文件对应的元数据（URL 和 ETag/Last-Modified），续传时用来确认服务端文件没有变化"""
+    return save_path + ".part.json"
+
+
+def _response_validator(response: httpx.Response) -> Optional[str]:
+    """If-Range 只能使用强 ETag，没有时使用 Last-Modified"""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _content_range_start(response: httpx.Response) -> Optional[int]:
+    match = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+    return int(match.group(1)) if match else None
+
+
+def _resumable_validator(save_path: str, url: str) -> Optional[str]:
+    """
+    返回可以用于续传的 If-Range 值。临时文件不是这个 URL 下载的、或者没有记录校验值时无法确认内容一致，
+    删除临时文件从头下载
+    """
+    part_path = part_file_name(save_path)
+    if not os.path.exists(part_path) or not os.path.getsize(part_path):
+        return None
+    meta = {}
+    try:
+        with open(part_meta_file_name(save_path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if meta.get("url") == url and meta.get("validator"):
+        return meta["validator"]
+    _remove_part(save_path)
+    return None
+
+
+def _write_part_meta(save_path: str, url: str, validator: Optional[str]):
+    with open(part_meta_file_name(save_path), "w", encoding="utf-8") as f:
+        json.dump({"url": url, "validator": validator}, f)
+
+
+def _remove_part(save_path: str):
+    for path in (part_file_name(save_path), part_meta_file_name(save_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def stream_download(
+    client: httpx.AsyncClient,
+    url: str,
+    save_path: str,
+    headers: Optional[Dict] = None,
+    timeout: float = 60,
+    chunk_size: int = config.MEDIA_DOWNLOAD_CHUNK_SIZE,
+    max_retries: int = config.MEDIA_DOWNLOAD_MAX_RETRIES,
+) -> bool:
+    """
+    将 url 对应的媒体文件下载到 save_path，内存中最多只保留一个分块。
+    已存在的 .part 文件（上次中断留下的）会通过 Range + If-Range 请求继续下载，
+    服务端不支持 Range、文件已经变化或者返回的分段位置不对时从头下载
+    Args:
+        client: httpx 客户端（来自平台客户端的连接池）
+        url: 媒体文件地址
+        save_path: 保存路径，目录需已存在
+        headers: 请求头
+        timeout: 超时时间（秒），作用于建立连接和每次读取
+        chunk_size: 每次写入磁盘的分块大小
+        max_retries: 连接中断时的重试次数
+
+    Returns:
+        是否下载成功
+    """
+    part_path = part_file_name(save_path)
+    for attempt in range(max_retries + 1):
+        validator = _resumable_validator(save_path, url)
+        downloaded = os.path.getsize(part_path) if validator else 0
+        request_headers = dict(headers or {})
+        if downloaded:
+            # 服务端文件变化时 If-Range 不成立，服务端会返回完整的 200 响应
+            request_headers["Range"] = f"bytes={downloaded}-"
+            request_headers["If-Range"] = validator
+        try:
+            async with client.stream(
+                "GET", url, headers=request_headers, timeout=timeout, follow_redirects=True
+            ) as response:
+                if response.status_code == 416 and downloaded:
+                    # 临时文件与服务端文件对不上（例如文件已变化），删除后从头下载
+                    _remove_part(save_path)
+                    continue
+                response.raise_for_status()
+                resume = response.status_code == 206 and downloaded > 0
+                if resume and _content_range_start(response) != downloaded:
+                    # 返回的分段不是从临时文件末尾开始，拼接后文件会损坏
+                    utils.logger.warning(f"[media_downloader.stream_download] unexpected Content-Range for {url}, restart")
+                    _remove_part(save_path)
+                    continue
+                # 200 表示服务端忽略了 Range（或者文件已变化），需要从头写入
+                if not resume:
+                    _write_part_meta(save_path, url, _response_validator(response))
+                async with aiofiles.open(part_path, "ab" if resume else "wb") as f:
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        await f.write(chunk)
+            os.replace(part_path, save_path)
+            _remove_part(save_path)
+            return True
+        except httpx.HTTPStatusError as exc:
+            utils.logger.error(f"[media_downloader.stream_download] {exc.__class__.__name__} for {exc.request.url} - {exc}")
+            return False
+        except httpx.HTTPError as exc:
+            utils.logger.warning(
+                f"[media_downloader.stream_download] {exc.__class__.__name__} for {url} - {exc}, "
+                f"retry {attempt + 1}/{max_retries}"
+            )
+    utils.logger.error(f"[media_downloader.stream_download] download {url} failed after {max_retries} retries")
+    return False
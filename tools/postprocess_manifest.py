@@ -0,0 +1,156 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 数据后处理清单（SQLite）：记录每个输入文件处理到的位置，
+#            再次运行时跳过没有变化的文件，JSON Lines 文件只读取末尾新追加的记录
+
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import config
+from tools.data_file_reader import iter_json_array, iter_jsonl_from
+
+# 校验已处理部分时读取 offset 之前的字节数
+_TAIL_HASH_SIZE = 4096
+
+
+class FileChange(NamedTuple):
+    file_path: Path
+    size: int
+    mtime_ns: int
+    # 从该字节偏移开始读取，只有 JSON Lines 文件在末尾追加了内容时大于0
+    offset: int
+    # offset 之前已经处理过的记录数
+    records: int
+
+
+def _tail_hash(file_path: Path, offset: int) -> str:
+    """offset 之前最后一段内容的哈希，用于确认已处理的部分没有被改写"""
+    start = max(0, offset - _TAIL_HASH_SIZE)
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+def iter_new_records(change: FileChange) -> Iterator[Tuple[Dict, int]]:
+    """
+    读取文件中需要处理的记录，产出 (记录, 处理完该记录后文件的处理位置)。
+    JSON 数组文件无法从中间开始读取，有变化时总是完整读取
+    """
+    if change.file_path.suffix == ".jsonl":
+        yield from iter_jsonl_from(str(change.file_path), change.offset)
+    else:
+        for record in iter_json_array(str(change.file_path)):
+            yield record, change.size
+
+
+class PostprocessManifest:
+    """
+    按 (事件, 类型, 平台, 文件) 记录文件的大小、修改时间、已处理位置和已处理记录数。
+    相关性判断依赖事件描述，事件描述不同的运行互不影响。
+    mark_processed 只记录在内存中，整个后处理流程成功后再 commit，中途失败时下次会重新处理这些记录
+    """
+
+    def __init__(self, event_description: str, db_path: str = config.POSTPROCESS_MANIFEST_PATH, enabled: bool = True):
+        self.scope = hashlib.sha256(event_description.encode("utf-8")).hexdigest()[:16]
+        self._pending: List[tuple] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        if not enabled:
+            return
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS processed_file (
+                scope TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                records INTEGER NOT NULL,
+                tail_hash TEXT NOT NULL,
+                processed_at INTEGER NOT NULL,
+                PRIMARY KEY (scope, kind, platform, file_path)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_change(self, kind: str, platform: str, file_path: Path) -> Optional[FileChange]:
+        """
+        检查文件自上次处理后的变化
+        Args:
+            kind: 文件类型，如 search_contents / search_comments
+            platform: 平台名称
+            file_path: 文件路径
+
+        Returns:
+            没有变化时返回None；JSON Lines 文件只在末尾追加了内容时从上次的位置继续，其它变化从头处理
+        """
+        stat = os.stat(file_path)
+        full = FileChange(file_path, stat.st_size, stat.st_mtime_ns, 0, 0)
+        if self._conn is None:
+            return full
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, offset, records, tail_hash FROM processed_file "
+            "WHERE scope = ? AND kind = ? AND platform = ? AND file_path = ?",
+            (self.scope, kind, platform, str(file_path)),
+        ).fetchone()
+        if row is None:
+            return full
+        size, mtime_ns, offset, records, tail_hash = row
+        if size == stat.st_size and mtime_ns == stat.st_mtime_ns:
+            return None
+        if file_path.suffix == ".jsonl" and stat.st_size >= offset and _tail_hash(file_path, offset) == tail_hash:
+            return full._replace(offset=offset, records=records)
+        return full
+
+    def reset(self):
+        """清除当前事件的处理记录，下次检查时所有文件都从头处理"""
+        if self._conn is None:
+            return
+        self._conn.execute("DELETE FROM processed_file WHERE scope = ?", (self.scope,))
+        self._conn.commit()
+
+    def mark_processed(self, kind: str, platform: str, change: FileChange, offset: int, records: int):
+        """
+        记录文件已处理到 offset（共 records 条记录），commit 之后生效
+        """
+        if self._conn is None:
+            return
+        self._pending.append((
+            self.scope, kind, platform, str(change.file_path), change.size, change.mtime_ns,
+            offset, records, _tail_hash(change.file_path, offset), int(time.time()),
+        ))
+
+    def commit(self):
+        if self._conn is None or not self._pending:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO processed_file "
+            "(scope, kind, platform, file_path, size, mtime_ns, offset, records, tail_hash, processed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._pending,
+        )
+        self._conn.commit()
+        self._pending = []
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
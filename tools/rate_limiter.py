@@ -0,0 +1,123 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 平台API请求限流器：按平台、按接口的令牌桶，根据风控信号自适应调整速率（AIMD）
+
+import asyncio
+import re
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+import config
+from tools import utils
+
+# URL 路径中的作品/评论/用户ID：纯数字、长的十六进制哈希，或者较长的含数字的字母数字串（如 BV 号、微博 mid），可以带文件扩展名
+_ID_SEGMENT_PATTERN = re.compile(r"(\d+|[0-9a-fA-F]{16,}|(?=[A-Za-z]*\d)[A-Za-z0-9]{10,})(\.\w+)?")
+
+
+class EndpointRateLimiter:
+    """
+    单个接口的限流器，请求按 1/rate 的间隔依次放行。
+    请求成功时速率加性增加，出现验证码/封禁等风控信号时速率乘性减少并暂停一段时间
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = config.CRAWLER_RATE_LIMIT_QPS,
+        min_rate: float = config.CRAWLER_RATE_LIMIT_MIN_QPS,
+        max_rate: float = config.CRAWLER_RATE_LIMIT_MAX_QPS,
+        increase_step: float = config.CRAWLER_RATE_LIMIT_INCREASE_STEP,
+        decrease_factor: float = config.CRAWLER_RATE_LIMIT_DECREASE_FACTOR,
+        cooldown: float = config.CRAWLER_RATE_LIMIT_COOLDOWN_SEC,
+    ):
+        self.name = name
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        """等待直到轮到当前请求，预约时间槽时没有 await，多个协程并发调用也不会超发"""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttled(self):
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._next_slot = max(self._next_slot, time.monotonic() + self.cooldown)
+        utils.logger.warning(
+            f"[EndpointRateLimiter.on_throttled] {self.name} throttled by platform, "
+            f"slow down to {self.rate:.2f} req/s and pause {self.cooldown}s"
+        )
+
+
+class PlatformRateLimiter:
+    """一个平台的所有接口限流器，同一平台的所有客户端实例共用"""
+
+    def __init__(self, platform: str):
+        self.platform = platform
+        self._endpoints: Dict[str, EndpointRateLimiter] = {}
+
+    @staticmethod
+    def endpoint_of(url: str) -> str:
+        """
+        按 URL 路径区分接口，忽略查询参数，路径中的ID替换为 {id}，
+        如知乎 /api/v4/comment_v5/answers/123/root_comment 与其它回答的评论接口共用一个限流器
+        """
+        segments = urlparse(url).path.split("/")
+        return "/".join("{id}" if _ID_SEGMENT_PATTERN.fullmatch(segment) else segment for segment in segments) or "/"
+
+    def get_endpoint(self, endpoint: str) -> EndpointRateLimiter:
+        limiter = self._endpoints.get(endpoint)
+        if limiter is None:
+            limiter = EndpointRateLimiter(f"{self.platform}{endpoint}")
+            self._endpoints[endpoint] = limiter
+        return limiter
+
+    async def acquire(self, endpoint: str):
+        if config.ENABLE_CRAWLER_RATE_LIMIT:
+            await self.get_endpoint(endpoint).acquire()
+
+    def record(self, endpoint: str, throttled: bool):
+        """
+        根据请求结果调整接口速率
+        Args:
+            endpoint: 接口路径
+            throttled: 是否出现了限流/验证码/封禁等风控信号
+        """
+        limiter = self.get_endpoint(endpoint)
+        if throttled:
+            limiter.on_throttled()
+        else:
+            limiter.on_success()
+
+
+_platform_limiters: Dict[str, PlatformRateLimiter] = {}
+
+
+def get_rate_limiter(platform: str) -> PlatformRateLimiter:
+    """获取平台的限流器（单例）"""
+    limiter = _platform_limiters.get(platform)
+    if limiter is None:
+        limiter = PlatformRateLimiter(platform)
+        _platform_limiters[platform] = limiter
+    return limiter
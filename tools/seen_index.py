@@ -0,0 +1,178 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 已爬取数据索引（SQLite）：跨多次运行记录已爬取的作品和评论，新鲜期内的作品不再重复获取详情，已保存的评论不再重复写入
+
+import sqlite3
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import config
+from tools import utils
+
+KIND_CONTENT = "content"
+KIND_COMMENT = "comment"
+
+# SQLite 单条语句的参数个数有上限，批量查询时分批
+_QUERY_CHUNK_SIZE = 500
+
+
+class SeenIndex:
+    """
+    一个平台的已爬取索引，按 (平台, 类型, ID) 记录最后爬取时间。
+    爬取时间在 freshness_hours 以内的视为新鲜，不再重复爬取；超过后重新爬取以更新点赞数等统计数据
+    """
+
+    def __init__(
+        self,
+        platform: str,
+        db_path: str = config.SEEN_INDEX_PATH,
+        freshness_hours: float = config.SEEN_INDEX_FRESHNESS_HOURS,
+        enabled: bool = True,
+    ):
+        self.platform = platform
+        self.freshness_hours = freshness_hours
+        self.skipped = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        if not enabled:
+            return
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=config.CRAWL_STATE_DB_TIMEOUT)
+        # 多进程分片爬取时各子进程共用该数据库，WAL 模式下读写互不阻塞，写入冲突时等待而不是报 database is locked
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_item (
+                platform TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                crawled_at INTEGER NOT NULL,
+                PRIMARY KEY (platform, kind, item_id)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def _fresh_since(self) -> int:
+        return int(time.time() - self.freshness_hours * 3600)
+
+    def fresh_ids(self, kind: str, item_ids: Iterable) -> Set[str]:
+        """返回 item_ids 中处于新鲜期内的 ID"""
+        ids = [str(item_id) for item_id in item_ids if item_id]
+        if self._conn is None or not ids:
+            return set()
+        fresh: Set[str] = set()
+        for i in range(0, len(ids), _QUERY_CHUNK_SIZE):
+            chunk = ids[i:i + _QUERY_CHUNK_SIZE]
+            rows = self._conn.execute(
+                f"SELECT item_id FROM seen_item WHERE platform = ? AND kind = ? AND crawled_at >= ? "
+                f"AND item_id IN ({','.join('?' * len(chunk))})",
+                (self.platform, kind, self._fresh_since(), *chunk),
+            ).fetchall()
+            fresh.update(row[0] for row in rows)
+        return fresh
+
+    def mark_seen(self, kind: str, item_ids: Iterable):
+        """记录（或刷新）爬取时间"""
+        if self._conn is None:
+            return
+        now = int(time.time())
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO seen_item (platform, kind, item_id, crawled_at) VALUES (?, ?, ?, ?)",
+            [(self.platform, kind, str(item_id), now) for item_id in item_ids if item_id],
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _content_key(content_id, source: str = "") -> str:
+        """作品按来源（搜索关键词等）分别记录，换一个关键词搜到同一作品时仍会以新的来源保存"""
+        return f"{source}\t{content_id}" if source else str(content_id)
+
+    def is_content_fresh(self, content_id, source: str = "", comments_pending: bool = False) -> bool:
+        """
+        作品在新鲜期内以同一来源爬取完成过时返回True，调用方只应跳过详情的获取
+        Args:
+            content_id: 作品ID
+            source: 来源关键词
+            comments_pending: 断点记录中该作品的评论尚未爬完时为True，此时不跳过
+
+        Returns:
+
+        """
+        if not content_id or comments_pending:
+            return False
+        key = self._content_key(content_id, source)
+        if key in self.fresh_ids(KIND_CONTENT, [key]):
+            self.skipped += 1
+            return True
+        return False
+
+    def mark_content_seen(self, *content_ids, source: str = ""):
+        """
+        作品的详情和评论都处理完后调用，等已入队的数据写入存储后才记录，避免崩溃后跳过还没保存的作品
+        Args:
+            content_ids: 作品ID（同一作品有多个ID时一起传入）
+            source: 来源关键词
+
+        Returns:
+
+        """
+        if self._conn is None:
+            return
+        # store.write_behind 依赖本模块，这里延迟导入
+        from store.write_behind import call_after_written
+
+        keys = [self._content_key(content_id, source) for content_id in content_ids if content_id]
+        call_after_written(self.platform, partial(self.mark_seen, KIND_CONTENT, keys))
+
+    def filter_new_comments(self, comment_items: List[Dict]) -> List[Dict]:
+        """过滤掉新鲜期内已经保存过的评论"""
+        fresh = self.fresh_ids(KIND_COMMENT, (item.get("comment_id") for item in comment_items))
+        if not fresh:
+            return comment_items
+        return [item for item in comment_items if str(item.get("comment_id")) not in fresh]
+
+    def mark_comments_seen(self, comment_items: List[Dict]):
+        self.mark_seen(KIND_COMMENT, (item.get("comment_id") for item in comment_items))
+
+    def close(self):
+        if self._conn is not None:
+            if self.skipped:
+                utils.logger.info(f"[SeenIndex] {self.platform} skipped {self.skipped} recently crawled contents")
+            self._conn.close()
+            self._conn = None
+
+
+_indexes: Dict[str, SeenIndex] = {}
+
+
+def get_seen_index(platform: str) -> SeenIndex:
+    """获取平台的已爬取索引（单例）"""
+    index = _indexes.get(platform)
+    if index is None:
+        index = SeenIndex(
+            platform,
+            config.SEEN_INDEX_PATH,
+            config.SEEN_INDEX_FRESHNESS_HOURS,
+            enabled=config.ENABLE_SEEN_INDEX,
+        )
+        _indexes[platform] = index
+    return index
+
+
+def close_seen_indexes():
+    indexes = list(_indexes.values())
+    _indexes.clear()
+    for index in indexes:
+        index.close()
@@ -0,0 +1,286 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 多进程分片爬取：关键词/指定ID/创作者列表分给多个子进程并行爬取，每个子进程有独立的事件循环、浏览器和账号，
+#            子进程的数据以 JSON Lines 暂存，由主进程增量合并到配置的存储中并汇总进度
+
+import asyncio
+import functools
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import config
+from base.base_crawler import AbstractStore
+from base.crawler_settings import CrawlerSettings
+from store.write_behind import WriteBehindStore
+from tools import utils
+from tools.crawl_checkpoint import close_crawl_checkpoints, get_crawl_checkpoint
+from tools.data_file_reader import iter_jsonl_from
+from tools.js_worker import close_js_worker_pools
+from tools.seen_index import close_seen_indexes
+from var import crawler_type_var
+
+# 平台 -> 存储工厂的导入路径，主进程用它创建 SAVE_DATA_OPTION 对应的存储实现
+_STORE_FACTORIES = {
+    "xhs": "store.xhs:XhsStoreFactory",
+    "dy": "store.douyin:DouyinStoreFactory",
+    "ks": "store.kuaishou:KuaishouStoreFactory",
+    "bili": "store.bilibili:BiliStoreFactory",
+    "wb": "store.weibo:WeibostoreFactory",
+    "tieba": "store.tieba:TieBaStoreFactory",
+    "zhihu": "store.zhihu:ZhihuStoreFactory",
+}
+
+# 暂存文件名中的数据类型 -> 存储方法
+_STORE_METHODS = {
+    "contents": "store_content",
+    "comments": "store_comment",
+    "creators": "store_creator",
+    "contacts": "store_contact",
+    "dynamics": "store_dynamic",
+}
+
+# 暂存目录中记录各暂存文件已合并到的位置，--resume 时从这里继续合并，不会重复写入
+_OFFSETS_FILE = "merge_offsets.json"
+
+# 每个子进程的 CDP 调试端口间隔，避免多个子进程同时查找可用端口时选中同一个
+_CDP_PORT_STEP = 10
+
+
+def _split_round_robin(items: Sequence[str], workers: int) -> List[List[str]]:
+    shards: List[List[str]] = [[] for _ in range(workers)]
+    for i, item in enumerate(items):
+        shards[i % workers].append(item)
+    return [shard for shard in shards if shard]
+
+
+def shard_settings(settings: CrawlerSettings, workers: int) -> List[CrawlerSettings]:
+    """
+    按爬取类型把关键词（search）、指定ID（detail）或创作者（creator）轮流分成最多 workers 份
+    Args:
+        settings: 整个爬取任务的运行参数
+        workers: 子进程数量
+
+    Returns:
+        每个子进程的运行参数，列表为空的分片不会创建
+    """
+    workers = max(1, workers)
+    if settings.crawler_type == "search":
+        keywords = [keyword.strip() for keyword in settings.keywords.split(",") if keyword.strip()]
+        shards = [settings._replace(keywords=",".join(shard)) for shard in _split_round_robin(keywords, workers)]
+    elif settings.crawler_type in ("detail", "creator"):
+        field = "specified_id_list" if settings.crawler_type == "detail" else "creator_id_list"
+        shards = [
+            settings._replace(**{field: tuple(shard)})
+            for shard in _split_round_robin(getattr(settings, field), workers)
+        ]
+    else:
+        shards = []
+    return shards or [settings]
+
+
+async def _crawl(crawler_path: str, settings: CrawlerSettings):
+    module_name, class_name = crawler_path.split(":")
+    crawler = getattr(importlib.import_module(module_name), class_name)(settings)
+    try:
+        await crawler.start()
+    finally:
+        await crawler.close()
+        close_crawl_checkpoints()
+        close_seen_indexes()
+        await close_js_worker_pools()
+
+
+def _worker_main(worker_id: int, crawler_path: str, settings: CrawlerSettings, config_values: Dict, staging_dir: str):
+    """子进程入口：恢复主进程的配置（含命令行参数），数据以 JSON Lines 暂存到 staging_dir，爬取分到的分片"""
+    for name, value in config_values.items():
+        setattr(config, name, value)
+    config.SAVE_DATA_OPTION = "jsonl"
+    config.SAVE_DATA_DIR = staging_dir
+    # 断点已由主进程清空，子进程以续爬模式运行，不会清掉其它子进程写入的断点
+    config.RESUME_CRAWL = True
+    if worker_id:
+        # 同一个浏览器用户目录不能同时被多个浏览器使用
+        config.USER_DATA_DIR = f"{config.USER_DATA_DIR}_worker{worker_id}"
+        config.CDP_DEBUG_PORT += worker_id * _CDP_PORT_STEP
+    asyncio.run(_crawl(crawler_path, settings))
+
+
+class ShardedCrawlExecutor:
+    """
+    主进程：每个分片启动一个子进程（spawn，互不共享事件循环和浏览器），定期把子进程暂存文件中新增的完整行
+    写入 SAVE_DATA_OPTION 对应的存储，并输出汇总进度。子进程全部退出并合并完成后删除暂存目录
+    """
+
+    def __init__(
+        self,
+        settings: CrawlerSettings,
+        crawler_path: str,
+        workers: int = config.CRAWLER_WORKERS,
+        staging_dir: str = config.CRAWLER_WORKER_STAGING_DIR,
+        merge_interval: float = config.CRAWLER_WORKER_MERGE_INTERVAL,
+        worker_cookies: Sequence[str] = config.CRAWLER_WORKER_COOKIES,
+        store: Optional[AbstractStore] = None,
+    ):
+        """
+        Args:
+            settings: 整个爬取任务的运行参数
+            crawler_path: 爬虫类的导入路径，如 media_platform.weibo:WeiboCrawler
+            workers: 子进程数量
+            staging_dir: 子进程数据的暂存目录
+            merge_interval: 合并暂存数据的间隔（秒）
+            worker_cookies: 各子进程的账号 cookies，按子进程序号轮流分配
+            store: 合并写入的存储实现，默认根据平台和 SAVE_DATA_OPTION 创建
+        """
+        self.settings = settings
+        self.crawler_path = crawler_path
+        self.staging_dir = staging_dir
+        self.merge_interval = merge_interval
+        self.shards = shard_settings(settings, workers)
+        if worker_cookies:
+            self.shards = [
+                shard._replace(cookies=worker_cookies[i % len(worker_cookies)]) for i, shard in enumerate(self.shards)
+            ]
+        self.merged: Counter = Counter()
+        self._inner_store = store
+        self._store: Optional[WriteBehindStore] = None
+        self._offsets: Dict[str, int] = {}
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+
+    def _create_store(self) -> AbstractStore:
+        module_name, class_name = _STORE_FACTORIES[self.settings.platform].split(":")
+        factory = getattr(importlib.import_module(module_name), class_name)
+        store_class = factory.STORES.get(config.SAVE_DATA_OPTION)
+        if not store_class:
+            raise ValueError("[ShardedCrawlExecutor._create_store] Invalid save option only supported csv or db or json or jsonl or sqlite ...")
+        # 文件存储按爬取类型命名文件
+        crawler_type_var.set(self.settings.crawler_type)
+        return store_class()
+
+    def _load_offsets(self) -> Dict[str, int]:
+        offsets_path = os.path.join(self.staging_dir, _OFFSETS_FILE)
+        if not os.path.exists(offsets_path):
+            return {}
+        with open(offsets_path, encoding="utf-8") as f:
+            return {
+                os.path.join(self.staging_dir, relative_path): offset
+                for relative_path, offset in json.load(f).items()
+            }
+
+    def _save_offsets(self, offsets: Dict[str, int]):
+        """先写临时文件再替换，中途崩溃不会留下不完整的记录"""
+        if not os.path.isdir(self.staging_dir):
+            return
+        offsets_path = os.path.join(self.staging_dir, _OFFSETS_FILE)
+        tmp_path = f"{offsets_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({os.path.relpath(path, self.staging_dir): offset for path, offset in offsets.items()}, f)
+        os.replace(tmp_path, offsets_path)
+
+    def _get_store(self) -> WriteBehindStore:
+        # 子进程写入暂存文件前已经用已爬取索引过滤过评论，这里不再过滤
+        if self._store is None:
+            self._store = WriteBehindStore(self._inner_store or self._create_store())
+        return self._store
+
+    async def merge_staged(self) -> int:
+        """
+        把暂存文件中上次合并之后新增的完整行写入存储，正在写入的半行留到下次合并
+        Returns:
+            本次合并的记录数
+        """
+        store = self._get_store()
+        count = 0
+        for file_path in sorted(Path(self.staging_dir).glob("worker_*/*/jsonl/*.jsonl")):
+            # 文件名为 <爬取类型>_<数据类型>_<日期>.jsonl
+            parts = file_path.stem.split("_")
+            method = _STORE_METHODS.get(parts[1]) if len(parts) == 3 else None
+            if method is None or not callable(getattr(store.store, method, None)):
+                continue
+            store_method = getattr(store, method)
+            path = str(file_path)
+            offset = self._offsets.get(path, 0)
+            for record, offset in iter_jsonl_from(path, offset):
+                await store_method(record)
+                self.merged[parts[1]] += 1
+                count += 1
+            self._offsets[path] = offset
+        if count:
+            # 合并到的位置等这些记录写入存储后才保存，崩溃后 --resume 会重新合并还没写入的记录
+            store.call_after_written(functools.partial(self._save_offsets, dict(self._offsets)))
+        return count
+
+    def log_progress(self):
+        running = sum(process.is_alive() for process in self._processes)
+        merged = ", ".join(f"{item_type}={count}" for item_type, count in sorted(self.merged.items())) or "nothing"
+        utils.logger.info(
+            f"[ShardedCrawlExecutor] {self.settings.platform}: {running}/{len(self._processes)} workers running, "
+            f"merged {merged}, pending writes={self._get_store().pending}"
+        )
+
+    def _start_workers(self):
+        # 子进程重新导入 config，需要把命令行参数覆盖后的配置传过去
+        config_values = {name: value for name, value in vars(config).items() if name.isupper()}
+        context = multiprocessing.get_context("spawn")
+        for worker_id, shard in enumerate(self.shards):
+            process = context.Process(
+                target=_worker_main,
+                args=(worker_id, self.crawler_path, shard, config_values, os.path.join(self.staging_dir, f"worker_{worker_id}")),
+                name=f"crawler-worker-{worker_id}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        utils.logger.info(
+            f"[ShardedCrawlExecutor._start_workers] started {len(self._processes)} workers for "
+            f"{self.settings.platform} {self.settings.crawler_type} crawl"
+        )
+
+    async def run(self):
+        """启动子进程并合并数据，所有子进程退出后返回"""
+        if config.RESUME_CRAWL:
+            # --resume 时从上次已写入存储的位置继续合并暂存数据
+            self._offsets = self._load_offsets()
+        else:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            self._offsets = {}
+            # 断点只在主进程中清空一次
+            get_crawl_checkpoint(self.settings.platform)
+            close_crawl_checkpoints()
+        self._start_workers()
+        try:
+            while any(process.is_alive() for process in self._processes):
+                await asyncio.sleep(self.merge_interval)
+                await self.merge_staged()
+                self.log_progress()
+        finally:
+            for process in self._processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+        await self.merge_staged()
+        await self._get_store().close()
+        self.log_progress()
+        # 暂存数据已全部写入存储，删除后下次 --resume 不会重复合并
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        failed = [process.name for process in self._processes if process.exitcode]
+        if failed:
+            utils.logger.error(
+                f"[ShardedCrawlExecutor.run] workers {failed} exited abnormally, use --resume to continue the crawl"
+            )
@@ -0,0 +1,79 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 签名性能基准：对比 execjs（每次调用启动 Node.js 进程）与常驻进程池的每秒签名次数
+#            用法: python -m tools.sign_benchmark --platform dy --count 200
+
+import argparse
+import asyncio
+import time
+from typing import Dict, Tuple
+
+import execjs
+
+from tools.js_worker import JsWorkerPool
+
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+
+# 平台 -> (签名 js, 函数名, 参数)
+SIGN_CASES: Dict[str, Tuple[str, str, Tuple]] = {
+    "dy": (
+        "libs/douyin.js",
+        "sign_datail",
+        ("device_platform=webapp&aid=6383&channel=channel_pc_web&aweme_id=7300000000000000000", _USER_AGENT),
+    ),
+    "zhihu": (
+        "libs/zhihu.js",
+        "get_sign",
+        ("/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&offset=0&limit=20", "d_c0=AJCXmFAbZRqPTiW0n8vtHbPcKlNb6hOEbFo=|1700000000"),
+    ),
+}
+
+
+def bench_execjs(js_path: str, func: str, args: Tuple, count: int) -> float:
+    with open(js_path, mode="r", encoding="utf-8-sig") as f:
+        ctx = execjs.compile(f.read())
+    start = time.perf_counter()
+    for _ in range(count):
+        ctx.call(func, *args)
+    return count / (time.perf_counter() - start)
+
+
+async def bench_worker_pool(js_path: str, func: str, args: Tuple, count: int, size: int) -> float:
+    pool = JsWorkerPool(js_path, size)
+    try:
+        # 预热：启动进程并加载 js
+        await pool.call(func, *args)
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.call(func, *args) for _ in range(count)))
+        return count / (time.perf_counter() - start)
+    finally:
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare execjs and persistent node worker signing throughput")
+    parser.add_argument("--platform", choices=list(SIGN_CASES), default="dy")
+    parser.add_argument("--count", type=int, default=200, help="signatures per run")
+    parser.add_argument("--pool-size", type=int, default=2, help="node worker processes")
+    args = parser.parse_args()
+
+    js_path, func, sign_args = SIGN_CASES[args.platform]
+    # execjs 很慢，只跑少量次数
+    execjs_rate = bench_execjs(js_path, func, sign_args, max(1, args.count // 10))
+    worker_rate = asyncio.run(bench_worker_pool(js_path, func, sign_args, args.count, args.pool_size))
+    print(f"{args.platform} {func}: execjs {execjs_rate:.1f}/s, worker pool({args.pool_size}) {worker_rate:.1f}/s, "
+          f"x{worker_rate / execjs_rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()